@@ -16,146 +16,18 @@ SCRIPT_DIR = os.path.dirname(os.path.abspath(__file__))
 CAPSTONE_AGENTS_DIR = os.path.dirname(os.path.dirname(SCRIPT_DIR))
 DEFAULT_AGENTS_DIR = os.path.join(CAPSTONE_AGENTS_DIR, "agents")
 
-
-def read_agent_file(filepath: str) -> str | None:
-    """Read and return the content of an agent file."""
-    try:
-        with open(filepath, 'r', encoding='utf-8') as f:
-            return f.read()
-    except Exception as e:
-        print(f"Warning: Could not read {filepath}: {e}")
-        return None
-
-
-def find_agent_files(agents_dir: str, roles: list[str] | None = None) -> list[dict]:
-    """
-    Discover all agent files in the agents directory.
-    Returns a list of dicts with 'role', 'type', and 'filepath'.
-    
-    Prefers unified agent files ({role}.md) over legacy split files.
-    """
-    agents = []
-    if not os.path.isdir(agents_dir):
-        print(f"Error: Agents directory not found: {agents_dir}")
-        return agents
-
-    for role_name in sorted(os.listdir(agents_dir)):
-        role_path = os.path.join(agents_dir, role_name)
-        if not os.path.isdir(role_path):
-            continue
-
-        # Filter by roles if specified
-        if roles and role_name not in roles:
-            continue
-
-        # Check for unified agent file first
-        unified_file = os.path.join(role_path, f"{role_name}.md")
-        if os.path.exists(unified_file):
-            agents.append({
-                'role': role_name,
-                'type': 'unified',
-                'filepath': unified_file,
-                'filename': f"{role_name}.md"
-            })
-            continue  # Skip legacy files if unified exists
-
-        # Fall back to legacy files (not in legacy/ subfolder for backwards compat)
-        for filename in os.listdir(role_path):
-            if not filename.endswith('.md'):
-                continue
-            # Skip legacy subfolder
-            if filename == 'legacy':
-                continue
-
-            filepath = os.path.join(role_path, filename)
-            if os.path.isdir(filepath):
-                continue
-            
-            # Determine agent type (planning or implementation)
-            if 'planning' in filename.lower():
-                agent_type = 'planning'
-            elif 'implementation' in filename.lower():
-                agent_type = 'impl'
-            else:
-                agent_type = 'default'
-
-            agents.append({
-                'role': role_name,
-                'type': agent_type,
-                'filepath': filepath,
-                'filename': filename
-            })
-    
-    return agents
-
-
-
-def generate_trigger(role: str, agent_type: str) -> str:
-    """Generate the @-mention trigger for an agent."""
-    if agent_type in ['default', 'unified']:
-        return f"@{role}"
-    else:
-        return f"@{role} {agent_type}"
+# Shared discovery and rendering engine (scripts/agent_library.py, scripts/agent_renderers.py)
+sys.path.insert(0, os.path.join(CAPSTONE_AGENTS_DIR, "scripts"))
+import build_manifest  # noqa: E402
+from agent_library import discover_agents, generate_trigger, select_agents  # noqa: E402
+from agent_renderers import format_antigravity, render_antigravity  # noqa: E402
+from agent_watch import DEFAULT_INTERVAL, watch_and_rebuild  # noqa: E402
+from context_layout import LAYOUTS, describe_prefix  # noqa: E402
 
 
 def generate_context_file(agents: list[dict], workspace: str) -> str:
     """Generate the contents of the antigravity_context.md file."""
-    lines = [
-        "# Capstone Agents - Antigravity Context",
-        "",
-        "This file contains the definitions for all Capstone Agents.",
-        "You can invoke an agent by using its **trigger handle** (e.g., `@frontend planning`).",
-        "",
-        "When the user types a trigger, you MUST adopt the persona and follow the instructions",
-        "for that agent role. Continue acting as that agent until the user invokes a different trigger.",
-        "",
-        f"**Current Workspace**: `{workspace}`",
-        "",
-        "---",
-        "",
-        "## Available Agents",
-        "",
-        "| Trigger | Role | Type |",
-        "|---------|------|------|",
-    ]
-
-    # Add summary table
-    for agent in agents:
-        trigger = generate_trigger(agent['role'], agent['type'])
-        lines.append(f"| `{trigger}` | {agent['role'].replace('-', ' ').title()} | {agent['type'].title()} |")
-
-    lines.append("")
-    lines.append("---")
-    lines.append("")
-
-    # Add full agent definitions
-    for agent in agents:
-        trigger = generate_trigger(agent['role'], agent['type'])
-        content = read_agent_file(agent['filepath'])
-        
-        if content is None:
-            continue
-
-        role_title = agent['role'].replace('-', ' ').title()
-        type_title = agent['type'].title()
-
-        lines.append(f"## Agent: {role_title} ({type_title})")
-        lines.append("")
-        lines.append(f"**Trigger**: `{trigger}`")
-        lines.append("")
-        lines.append("**Instructions**:")
-        lines.append("")
-        lines.append("<details>")
-        lines.append(f"<summary>View full instructions for {trigger}</summary>")
-        lines.append("")
-        lines.append(content.strip())
-        lines.append("")
-        lines.append("</details>")
-        lines.append("")
-        lines.append("---")
-        lines.append("")
-
-    return "\n".join(lines)
+    return format_antigravity(agents, workspace)
 
 
 def main():
@@ -167,6 +39,12 @@ Examples:
   # Generate context for all agents
   python generate_context.py --workspace /path/to/your/project
 
+  # Planning mode only (unified agents without their IMPLEMENTATION MODE section)
+  python generate_context.py --workspace . --mode planning
+
+  # Workspace path last, so every workspace shares one cacheable prefix
+  python generate_context.py --workspace . --layout stable
+
   # Specific roles only
   python generate_context.py --workspace . --roles coordinator,frontend,backend
 
@@ -175,6 +53,9 @@ Examples:
 
   # Preview without writing
   python generate_context.py --workspace . --dry-run
+
+  # Regenerate whenever an agent file changes
+  python generate_context.py --workspace . --watch
         """
     )
     parser.add_argument("-w", "--workspace", default=".",
@@ -183,10 +64,21 @@ Examples:
                         help="Custom path to agents directory")
     parser.add_argument("--roles",
                         help="Comma-separated list of roles to include (e.g., coordinator,frontend,backend)")
+    parser.add_argument("--mode", choices=["planning", "implementation"],
+                        help="Only include this mode of unified agents (default: both modes)")
+    parser.add_argument("--layout", choices=LAYOUTS, default="default",
+                        help="'stable' puts the workspace in a trailing session block so the context prefix "
+                             "is the same for every workspace (default: %(default)s)")
     parser.add_argument("-o", "--output", default="antigravity_context.md",
                         help="Output filename (default: antigravity_context.md)")
     parser.add_argument("--dry-run", action="store_true",
                         help="Preview output without writing to file")
+    parser.add_argument("--force", action="store_true",
+                        help="Regenerate the output even if the agent files are unchanged")
+    parser.add_argument("--watch", action="store_true",
+                        help="Keep running and regenerate the output when agent files change")
+    parser.add_argument("--watch-interval", type=float, default=DEFAULT_INTERVAL,
+                        help="Seconds between polls of the agents tree in watch mode (default: %(default)s)")
 
     args = parser.parse_args()
 
@@ -205,10 +97,15 @@ Examples:
     print(f"Output: {output_path}")
     if roles:
         print(f"Roles filter: {', '.join(roles)}")
+    if args.mode:
+        print(f"Mode: {args.mode} only")
+    if args.layout != "default":
+        print(f"Layout: {args.layout}")
     print("-" * 60)
 
-    # Find agent files
-    agents = find_agent_files(agents_dir, roles)
+    # Find agent files (contents are read once, only if the output must be rebuilt)
+    library = discover_agents(agents_dir)
+    agents = select_agents(library, roles)
     if not agents:
         print("Error: No agent files found.")
         sys.exit(1)
@@ -220,9 +117,19 @@ Examples:
     print("-" * 60)
 
     # Generate context
-    context_content = generate_context_file(agents, workspace)
+    def render_context(lib=library):
+        return render_antigravity(lib, workspace, roles, args.mode, args.layout)
+
+    def write_context(lib=library, force=False):
+        manifest = build_manifest.load_manifest()
+        key = build_manifest.inputs_key(lib, "antigravity", roles, workspace=workspace, mode=args.mode,
+                                        layout=args.layout)
+        status = build_manifest.write_artifact(output_path, key, lambda: render_context(lib), manifest, force)
+        build_manifest.save_manifest(manifest)
+        return status
 
     if args.dry_run:
+        context_content = render_context()
         print("DRY RUN - Would generate:")
         print("=" * 60)
         # Print first 2000 chars as preview
@@ -231,12 +138,19 @@ Examples:
             print(f"\n... ({len(context_content) - 2000} more characters)")
         print("=" * 60)
         print(f"Total size: {len(context_content)} characters")
+        if args.layout == "stable":
+            print(f"Context {describe_prefix(context_content)}")
     else:
         try:
-            with open(output_path, 'w', encoding='utf-8') as f:
-                f.write(context_content)
-            print(f"Successfully generated: {output_path}")
-            print(f"Total size: {len(context_content)} characters")
+            status = write_context(force=args.force)
+            if status == build_manifest.REUSED:
+                print(f"Up to date (reused): {output_path}")
+            else:
+                print(f"Successfully generated (rebuilt): {output_path}")
+            print(f"Total size: {os.path.getsize(output_path)} bytes")
+            if args.layout == "stable":
+                with open(output_path, 'r', encoding='utf-8') as f:
+                    print(f"Context {describe_prefix(f.read())}")
             print("")
             print("Next steps:")
             print(f"  1. Open your Antigravity IDE session")
@@ -246,6 +160,9 @@ Examples:
             print(f"Error writing output file: {e}")
             sys.exit(1)
 
+        if args.watch:
+            watch_and_rebuild(library, lambda lib: f"{write_context(lib)} {output_path}",
+                              roles, interval=args.watch_interval)
 
 if __name__ == "__main__":
     main()
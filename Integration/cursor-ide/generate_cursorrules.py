@@ -19,6 +19,14 @@ from pathlib import Path
 SCRIPT_DIR = Path(__file__).parent.resolve()
 DEFAULT_AGENTS_DIR = SCRIPT_DIR.parent.parent / "agents"
 
+# Shared discovery and rendering engine (scripts/agent_library.py, scripts/agent_renderers.py)
+sys.path.insert(0, str(SCRIPT_DIR.parent.parent / "scripts"))
+import build_manifest  # noqa: E402
+from agent_library import discover_agents as discover_library  # noqa: E402
+from agent_library import load_library, read_content, role_variants  # noqa: E402
+from agent_renderers import format_cursorrules  # noqa: E402
+from agent_watch import DEFAULT_INTERVAL, watch_and_rebuild  # noqa: E402
+
 
 def discover_agents(agents_dir: Path) -> dict:
     """
@@ -27,67 +35,7 @@ def discover_agents(agents_dir: Path) -> dict:
     Returns:
         dict: {role_name: {"planning": path_or_none, "implementation": path_or_none, "default": path_or_none}}
     """
-    agents = {}
-    
-    if not agents_dir.exists():
-        print(f"Error: Agents directory not found: {agents_dir}")
-        return agents
-    
-    for role_dir in sorted(agents_dir.iterdir()):
-        if not role_dir.is_dir():
-            continue
-        
-        role_name = role_dir.name
-        agents[role_name] = {
-            "planning": None,
-            "implementation": None,
-            "default": None
-        }
-        
-        for md_file in role_dir.glob("*.md"):
-            filename = md_file.name.lower()
-            if "-planning" in filename:
-                agents[role_name]["planning"] = md_file
-            elif "-implementation" in filename:
-                agents[role_name]["implementation"] = md_file
-            else:
-                # Single file agent (e.g., coordinator.md)
-                agents[role_name]["default"] = md_file
-    
-    return agents
-
-
-def read_agent_file(filepath: Path) -> str:
-    """Read agent markdown file content."""
-    try:
-        with open(filepath, "r", encoding="utf-8") as f:
-            return f.read().strip()
-    except Exception as e:
-        print(f"Warning: Could not read {filepath}: {e}")
-        return ""
-
-
-def extract_description(content: str) -> str:
-    """Extract the first meaningful description line from agent content."""
-    lines = content.split("\n")
-    for line in lines:
-        line = line.strip()
-        # Skip headers and empty lines
-        if line.startswith("#") or not line:
-            continue
-        # Skip "## Role Description" type headers
-        if line.startswith("**") or line.startswith("You are"):
-            continue
-        # Found a description line
-        if len(line) > 10:
-            # Truncate if too long
-            return line[:150] + "..." if len(line) > 150 else line
-    return "Specialized agent role"
-
-
-def format_role_name(role: str) -> str:
-    """Format role name for display (e.g., 'software-architect' -> 'Software Architect')."""
-    return role.replace("-", " ").title()
+    return role_variants(load_library(str(agents_dir)))
 
 
 def generate_cursorrules(
@@ -110,91 +58,7 @@ def generate_cursorrules(
     Returns:
         str: Complete .cursorrules file content
     """
-    
-    # Header
-    output = []
-    output.append("# Capstone Multi-Agent System")
-    output.append("")
-    output.append("You are a multi-agent AI assistant with access to specialized roles from the Capstone Agents framework.")
-    output.append("Each role has specific expertise, tools, and workflows. Switch between roles when the user requests.")
-    output.append("")
-    output.append("## How to Switch Roles")
-    output.append("- When user says `@RoleName` or `Act as RoleName`, adopt that role's persona and capabilities")
-    output.append("- For roles with planning/impl variants, use `@RoleName planning` or `@RoleName impl`")
-    output.append("- Default role is **Coordinator** if no role is specified")
-    output.append("- You can suggest switching roles when a task better fits another agent")
-    output.append("")
-    output.append("## Available Agents")
-    output.append("")
-    
-    # List available roles for quick reference
-    available_roles = []
-    for role_name, files in sorted(agents.items()):
-        if roles_filter and role_name not in roles_filter:
-            continue
-        display_name = format_role_name(role_name)
-        variants = []
-        if files["planning"] or files["default"]:
-            if not impl_only:
-                variants.append("planning")
-        if files["implementation"]:
-            if not planning_only:
-                variants.append("impl")
-        if variants:
-            available_roles.append(f"- **{display_name}**: {', '.join(variants)}")
-    
-    output.extend(available_roles)
-    output.append("")
-    output.append("---")
-    output.append("")
-    
-    # Agent definitions
-    for role_name, files in sorted(agents.items()):
-        if roles_filter and role_name not in roles_filter:
-            continue
-        
-        display_name = format_role_name(role_name)
-        
-        # Planning agent
-        planning_file = files["planning"] or files["default"]
-        if planning_file and not impl_only:
-            content = read_agent_file(planning_file)
-            if content:
-                description = extract_description(content)
-                output.append(f"### [AGENT: {display_name}]")
-                output.append(f"**Type:** planning")
-                output.append(f"**Description:** {description}")
-                output.append("")
-                output.append(content)
-                output.append("")
-                output.append("---")
-                output.append("")
-        
-        # Implementation agent (if separate file exists)
-        if files["implementation"] and not planning_only:
-            content = read_agent_file(files["implementation"])
-            if content:
-                description = extract_description(content)
-                output.append(f"### [AGENT: {display_name} (impl)]")
-                output.append(f"**Type:** implementation")
-                output.append(f"**Description:** {description}")
-                output.append("")
-                output.append(content)
-                output.append("")
-                output.append("---")
-                output.append("")
-    
-    # Footer with usage tips
-    output.append("## Multi-Agent Collaboration Tips")
-    output.append("")
-    output.append("1. **Coordinator First**: Start with `@Coordinator` to create a project plan")
-    output.append("2. **Delegate Tasks**: Let Coordinator assign tasks to specialized agents")
-    output.append("3. **File-Based Handoff**: Agents communicate via plan files (e.g., `coordinator-plan.md`)")
-    output.append("4. **Parallel Work**: Open multiple chat tabs, each with a different agent")
-    output.append("5. **Reference Files**: Use `@filename` to share context between agents")
-    output.append("")
-    
-    return "\n".join(output)
+    return format_cursorrules(agents, roles_filter, planning_only, impl_only)
 
 
 def main():
@@ -220,6 +84,9 @@ Examples:
   
   # Custom agents directory
   python generate_cursorrules.py --workspace . --agents-dir /path/to/agents
+  
+  # Regenerate whenever an agent file changes
+  python generate_cursorrules.py --workspace . --watch
         """
     )
     
@@ -256,6 +123,22 @@ Examples:
         action="store_true",
         help="Print output instead of writing to file"
     )
+    parser.add_argument(
+        "--force",
+        action="store_true",
+        help="Regenerate the output even if the agent files are unchanged"
+    )
+    parser.add_argument(
+        "--watch",
+        action="store_true",
+        help="Keep running and regenerate the output when agent files change"
+    )
+    parser.add_argument(
+        "--watch-interval",
+        type=float,
+        default=DEFAULT_INTERVAL,
+        help="Seconds between polls of the agents tree in watch mode (default: %(default)s)"
+    )
     
     args = parser.parse_args()
     
@@ -273,9 +156,10 @@ Examples:
     if args.roles:
         roles_filter = [r.strip().lower() for r in args.roles.split(",")]
     
-    # Discover agents
+    # Discover agents (contents are read once, only if the output must be rebuilt)
     print(f"Scanning agents in: {agents_dir}")
-    agents = discover_agents(agents_dir)
+    library = discover_library(str(agents_dir))
+    agents = role_variants(library)
     
     if not agents:
         print("Error: No agents found!")
@@ -294,29 +178,43 @@ Examples:
         print(f"  - {role}: {', '.join(types)}")
     
     # Generate content
-    print("\nGenerating .cursorrules...")
-    content = generate_cursorrules(
-        agents=agents,
-        agents_dir=agents_dir,
-        roles_filter=roles_filter,
-        planning_only=args.planning_only,
-        impl_only=args.impl_only
-    )
+    def render_content(lib=library):
+        return format_cursorrules(
+            role_variants(lib),
+            roles_filter=roles_filter,
+            planning_only=args.planning_only,
+            impl_only=args.impl_only,
+            read=lambda filepath: read_content(lib, filepath)
+        )
     
     if args.dry_run:
+        print("\nGenerating .cursorrules...")
+        content = render_content()
         print("\n--- DRY RUN OUTPUT ---")
         print(content[:2000])
         print(f"\n... ({len(content)} total characters)")
         return
     
-    # Write output
-    output_file = Path(args.output) if args.output else workspace / ".cursorrules"
+    # Write output (skipped when the agent files and options are unchanged)
+    output_file = Path(args.output).resolve() if args.output else workspace / ".cursorrules"
+    
+    def write_content(lib=library, force=False):
+        manifest = build_manifest.load_manifest()
+        key = build_manifest.inputs_key(
+            lib, "cursorrules", roles_filter,
+            workspace=str(workspace), planning_only=args.planning_only, impl_only=args.impl_only
+        )
+        status = build_manifest.write_artifact(str(output_file), key, lambda: render_content(lib), manifest, force)
+        build_manifest.save_manifest(manifest)
+        return status
     
     try:
-        with open(output_file, "w", encoding="utf-8") as f:
-            f.write(content)
-        print(f"\nSuccess! Created: {output_file}")
-        print(f"  - File size: {len(content):,} characters")
+        status = write_content(force=args.force)
+        if status == build_manifest.REUSED:
+            print(f"\nUp to date (reused): {output_file}")
+        else:
+            print(f"\nSuccess! Created (rebuilt): {output_file}")
+        print(f"  - File size: {output_file.stat().st_size:,} bytes")
         print(f"  - Agents included: {len([r for r in agents if not roles_filter or r in roles_filter])}")
         print(f"\nNext steps:")
         print(f"  1. Open workspace in Cursor: cursor {workspace}")
@@ -325,7 +223,10 @@ Examples:
     except Exception as e:
         print(f"Error writing file: {e}")
         sys.exit(1)
-
+    
+    if args.watch:
+        watch_and_rebuild(library, lambda lib: f"{write_content(lib)} {output_file}",
+                          roles_filter, interval=args.watch_interval)
 
 if __name__ == "__main__":
     main()
@@ -13,143 +13,37 @@ import sys
 
 # Path to the capstone-agents repository
 SCRIPT_DIR = os.path.dirname(os.path.abspath(__file__))
-CAPSTONE_AGENTS_DIR = os.path.dirname(os.path.dirname(os.path.dirname(SCRIPT_DIR)))  # ../../..
-# Fix: Adjust path calculation based on depth. 
-# SCRIPT_DIR is d:\capstone-agents\Integration\qwencli
-# CAPSTONE_AGENTS_DIR should be d:\capstone-agents
-CAPSTONE_AGENTS_DIR = os.path.dirname(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+CAPSTONE_AGENTS_DIR = os.path.dirname(os.path.dirname(SCRIPT_DIR))  # Integration/qwencli -> root
 DEFAULT_AGENTS_DIR = os.path.join(CAPSTONE_AGENTS_DIR, "agents")
 
-
-def read_agent_file(filepath: str) -> str | None:
-    """Read and return the content of an agent file."""
-    try:
-        with open(filepath, 'r', encoding='utf-8') as f:
-            return f.read()
-    except Exception as e:
-        print(f"Warning: Could not read {filepath}: {e}")
-        return None
-
-
-def find_agent_files(agents_dir: str, roles: list[str] | None = None) -> list[dict]:
-    """
-    Discover all agent files in the agents directory.
-    Returns a list of dicts with 'role', 'type', and 'filepath'.
-    """
-    agents = []
-    if not os.path.isdir(agents_dir):
-        print(f"Error: Agents directory not found: {agents_dir}")
-        return agents
-
-    for role_name in sorted(os.listdir(agents_dir)):
-        role_path = os.path.join(agents_dir, role_name)
-        if not os.path.isdir(role_path):
-            continue
-
-        # Filter by roles if specified
-        if roles and role_name not in roles:
-            continue
-
-        # Check for unified agent file first
-        unified_file = os.path.join(role_path, f"{role_name}.md")
-        if os.path.exists(unified_file):
-            agents.append({
-                'role': role_name,
-                'type': 'unified',
-                'filepath': unified_file
-            })
-            continue
-
-        # Fall back to legacy files
-        for filename in os.listdir(role_path):
-            if not filename.endswith('.md'):
-                continue
-            if filename == 'legacy':
-                continue
-
-            filepath = os.path.join(role_path, filename)
-            if os.path.isdir(filepath):
-                continue
-            
-            if 'planning' in filename.lower():
-                agent_type = 'planning'
-            elif 'implementation' in filename.lower():
-                agent_type = 'impl'
-            else:
-                agent_type = 'default'
-
-            agents.append({
-                'role': role_name,
-                'type': agent_type,
-                'filepath': filepath
-            })
-    
-    return agents
-
-
-def generate_trigger(role: str, agent_type: str) -> str:
-    """Generate the @-mention trigger for an agent."""
-    if agent_type in ['default', 'unified']:
-        return f"@{role}"
-    else:
-        return f"@{role} {agent_type}"
+# Shared discovery and rendering engine (scripts/agent_library.py, scripts/agent_renderers.py)
+sys.path.insert(0, os.path.join(CAPSTONE_AGENTS_DIR, "scripts"))
+from agent_library import load_library  # noqa: E402
+from agent_renderers import format_system_prompt, render  # noqa: E402
+from agent_watch import DEFAULT_INTERVAL, watch_and_rebuild  # noqa: E402
+from context_layout import LAYOUTS, describe_prefix  # noqa: E402
 
 
 def generate_system_prompt(agents: list[dict], workspace: str) -> str:
     """Generate the consolidated system prompt."""
-    lines = [
-        "# Capstone Agents System Prompt",
-        "",
-        "You are an intelligent development assistant capable of assuming multiple expert roles.",
-        "You can invoke a specific agent persona by using its **trigger handle** (e.g., `@frontend`).",
-        "",
-        "## User Instructions",
-        "When you see a trigger like `@role`, you MUST:",
-        "1. Adopt the persona and instructions of that agent completely.",
-        "2. Ignore previous persona instructions if they conflict.",
-        "3. Execute the user's request using that agent's capabilities.",
-        "",
-        f"**Current Workspace**: `{workspace}`",
-        "",
-        "---",
-        "",
-        "## Available Agents",
-        ""
-    ]
-
-    # Add agent list
-    for agent in agents:
-        trigger = generate_trigger(agent['role'], agent['type'])
-        lines.append(f"- **{trigger}**: {agent['role'].title()} Agent")
-
-    lines.append("")
-    lines.append("---")
-    lines.append("")
-    lines.append("## Agent Definitions")
-    lines.append("")
-
-    # Add full agent definitions
-    for agent in agents:
-        trigger = generate_trigger(agent['role'], agent['type'])
-        content = read_agent_file(agent['filepath'])
-        
-        if content is None:
-            continue
-
-        lines.append(f"### Agent: {agent['role'].title()} ({trigger})")
-        lines.append("```markdown")
-        lines.append(content.strip())
-        lines.append("```")
-        lines.append("")
-        lines.append("---")
-        lines.append("")
-
-    return "\n".join(lines)
+    return format_system_prompt(agents, workspace)
 
 
 def main():
     parser = argparse.ArgumentParser(
-        description="Generate QwenCLI system prompt for Capstone Agents"
+        description="Generate QwenCLI system prompt for Capstone Agents",
+        formatter_class=argparse.RawDescriptionHelpFormatter,
+        epilog="""
+Examples:
+  # Print the system prompt
+  python generate_context.py --workspace /path/to/your/project
+
+  # Write it to a file
+  python generate_context.py --workspace . --output qwen_context.md
+
+  # Rewrite the file whenever an agent file changes
+  python generate_context.py --workspace . --output qwen_context.md --watch
+        """
     )
     parser.add_argument("-w", "--workspace", default=".", 
                         help="Path to the target workspace")
@@ -157,36 +51,52 @@ def main():
                         help="Custom path to agents directory")
     parser.add_argument("-o", "--output", 
                         help="Output filename (optional, prints to stdout if not set)")
+    parser.add_argument("--mode", choices=["planning", "implementation"],
+                        help="Only include this mode of unified agents (default: both modes)")
+    parser.add_argument("--layout", choices=LAYOUTS, default="default",
+                        help="'stable' puts the workspace in a trailing session block so the context prefix "
+                             "is the same for every workspace (default: %(default)s)")
+    parser.add_argument("--watch", action="store_true",
+                        help="Keep running and rewrite --output when agent files change")
+    parser.add_argument("--watch-interval", type=float, default=DEFAULT_INTERVAL,
+                        help="Seconds between polls of the agents tree in watch mode (default: %(default)s)")
     
     args = parser.parse_args()
+    if args.watch and not args.output:
+        parser.error("--watch needs --output")
 
     # Resolve paths
     workspace = os.path.abspath(args.workspace)
-    if args.agents_dir:
-        agents_dir = os.path.abspath(args.agents_dir)
-    else:
-        # Fallback logic to find agents dir relative to this script
-        # Scripts at: Integration/qwencli/generate_context.py
-        # Root at: ../../
-        root_dir = os.path.dirname(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
-        agents_dir = os.path.join(root_dir, "agents")
-
-    # Find agent files
-    agents = find_agent_files(agents_dir)
-    
-    # Generate content
-    content = generate_system_prompt(agents, workspace)
+    agents_dir = os.path.abspath(args.agents_dir) if args.agents_dir else DEFAULT_AGENTS_DIR
+
+    # Find and read agent files in a single pass, then render
+    library = load_library(agents_dir)
+    content = render("qwen", library, workspace, mode=args.mode, layout=args.layout)
+
+    def write_context(text):
+        with open(args.output, 'w', encoding='utf-8') as f:
+            f.write(text)
 
     if args.output:
         try:
-            with open(args.output, 'w', encoding='utf-8') as f:
-                f.write(content)
+            write_context(content)
             print(f"Generated context file: {args.output}")
+            if args.layout == "stable":
+                print(f"Context {describe_prefix(content)}")
         except Exception as e:
             print(f"Error writing file: {e}", file=sys.stderr)
             sys.exit(1)
+
+        if args.watch:
+            def rebuild(lib):
+                write_context(render("qwen", lib, workspace, mode=args.mode, layout=args.layout))
+                return f"rebuilt {args.output}"
+
+            watch_and_rebuild(library, rebuild, interval=args.watch_interval)
     else:
         print(content)
+        if args.layout == "stable":
+            print(f"Context {describe_prefix(content)}", file=sys.stderr)
 
 
 if __name__ == "__main__":
@@ -16,144 +16,18 @@ SCRIPT_DIR = os.path.dirname(os.path.abspath(__file__))
 CAPSTONE_AGENTS_DIR = os.path.dirname(os.path.dirname(SCRIPT_DIR))
 DEFAULT_AGENTS_DIR = os.path.join(CAPSTONE_AGENTS_DIR, "agents")
 
-
-def read_agent_file(filepath: str) -> str | None:
-    """Read and return the content of an agent file."""
-    try:
-        with open(filepath, 'r', encoding='utf-8') as f:
-            return f.read()
-    except Exception as e:
-        print(f"Warning: Could not read {filepath}: {e}")
-        return None
-
-
-def find_agent_files(agents_dir: str, roles: list[str] | None = None) -> list[dict]:
-    """
-    Discover all agent files in the agents directory.
-    Returns a list of dicts with 'role', 'type', and 'filepath'.
-    
-    Prefers unified agent files ({role}.md) over legacy split files.
-    """
-    agents = []
-    if not os.path.isdir(agents_dir):
-        print(f"Error: Agents directory not found: {agents_dir}")
-        return agents
-
-    for role_name in sorted(os.listdir(agents_dir)):
-        role_path = os.path.join(agents_dir, role_name)
-        if not os.path.isdir(role_path):
-            continue
-
-        # Filter by roles if specified
-        if roles and role_name not in roles:
-            continue
-
-        # Check for unified agent file first
-        unified_file = os.path.join(role_path, f"{role_name}.md")
-        if os.path.exists(unified_file):
-            agents.append({
-                'role': role_name,
-                'type': 'unified',
-                'filepath': unified_file,
-                'filename': f"{role_name}.md"
-            })
-            continue  # Skip legacy files if unified exists
-
-        # Fall back to legacy files
-        for filename in os.listdir(role_path):
-            if not filename.endswith('.md'):
-                continue
-            if filename == 'legacy':
-                continue
-
-            filepath = os.path.join(role_path, filename)
-            if os.path.isdir(filepath):
-                continue
-            
-            # Determine agent type (planning or implementation)
-            if 'planning' in filename.lower():
-                agent_type = 'planning'
-            elif 'implementation' in filename.lower():
-                agent_type = 'impl'
-            else:
-                agent_type = 'default'
-
-            agents.append({
-                'role': role_name,
-                'type': agent_type,
-                'filepath': filepath,
-                'filename': filename
-            })
-    
-    return agents
-
-
-def generate_trigger(role: str, agent_type: str) -> str:
-    """Generate the @-mention trigger for an agent."""
-    if agent_type in ['default', 'unified']:
-        return f"@{role}"
-    else:
-        return f"@{role} {agent_type}"
+# Shared discovery and rendering engine (scripts/agent_library.py, scripts/agent_renderers.py)
+sys.path.insert(0, os.path.join(CAPSTONE_AGENTS_DIR, "scripts"))
+import build_manifest  # noqa: E402
+from agent_library import discover_agents, select_agents  # noqa: E402
+from agent_renderers import format_vscode, render_vscode  # noqa: E402
+from agent_watch import DEFAULT_INTERVAL, watch_and_rebuild  # noqa: E402
+from context_layout import LAYOUTS, describe_prefix  # noqa: E402
 
 
 def generate_context_file(agents: list[dict], workspace: str) -> str:
     """Generate the contents of the copilot_agent_context.md file."""
-    lines = [
-        "# VS Code Copilot - Agent Context Definitions",
-        "",
-        "> **SYSTEM INSTRUCTION**:",
-        "> You are an AI assistant in VS Code. The user has explicitly provided this context file",
-        "> to define a set of specialized agent roles. ",
-        ">",
-        "> **YOUR GOAL**: When the user's prompt starts with a specific **trigger** (defined below),",
-        "> you MUST completely adopt the persona and instructions of that agent.",
-        ">",
-        "> **RULES**:",
-        "> 1. Check the user's prompt for a trigger like `@backend impl` or `@coordinator`.",
-        "> 2. If a trigger is found, ignore your default behavior and strictly follow the Agent Definition below.",
-        "> 3. Maintain this persona for the duration of the response.",
-        "> 4. If no trigger is found, act as a helpful coding assistant.",
-        "",
-        f"**Workspace**: `{workspace}`",
-        "",
-        "## Agent Triggers Index",
-        "",
-        "| Trigger | Role | Type |",
-        "|---------|------|------|",
-    ]
-
-    # Add summary table
-    for agent in agents:
-        trigger = generate_trigger(agent['role'], agent['type'])
-        lines.append(f"| `{trigger}` | {agent['role'].replace('-', ' ').title()} | {agent['type'].title()} |")
-
-    lines.append("")
-    lines.append("---")
-    lines.append("")
-
-    # Add full agent definitions
-    for agent in agents:
-        trigger = generate_trigger(agent['role'], agent['type'])
-        content = read_agent_file(agent['filepath'])
-        
-        if content is None:
-            continue
-
-        role_title = agent['role'].replace('-', ' ').title()
-        type_title = agent['type'].title()
-
-        lines.append(f"## Definition: {role_title} ({type_title})")
-        lines.append(f"**Trigger**: `{trigger}`")
-        lines.append("")
-        lines.append("**Agent Instructions**:")
-        lines.append("```markdown")
-        lines.append(content.strip())
-        lines.append("```")
-        lines.append("")
-        lines.append("---")
-        lines.append("")
-
-    return "\n".join(lines)
+    return format_vscode(agents, workspace)
 
 
 def main():
@@ -165,11 +39,20 @@ Examples:
   # Generate context for all agents
   python generate_context.py --workspace /path/to/your/project
 
+  # Planning mode only (unified agents without their IMPLEMENTATION MODE section)
+  python generate_context.py --workspace . --mode planning
+
+  # Workspace path last, so every workspace shares one cacheable prefix
+  python generate_context.py --workspace . --layout stable
+
   # Specific roles only
   python generate_context.py --workspace . --roles coordinator,frontend,backend
 
   # Custom output file
   python generate_context.py --workspace . --output my_context.md
+
+  # Regenerate whenever an agent file changes
+  python generate_context.py --workspace . --watch
         """
     )
     parser.add_argument("-w", "--workspace", default=".",
@@ -178,10 +61,21 @@ Examples:
                         help="Custom path to agents directory")
     parser.add_argument("--roles",
                         help="Comma-separated list of roles to include")
+    parser.add_argument("--mode", choices=["planning", "implementation"],
+                        help="Only include this mode of unified agents (default: both modes)")
+    parser.add_argument("--layout", choices=LAYOUTS, default="default",
+                        help="'stable' puts the workspace in a trailing session block so the context prefix "
+                             "is the same for every workspace (default: %(default)s)")
     parser.add_argument("-o", "--output", default="copilot_agent_context.md",
                         help="Output filename (default: copilot_agent_context.md)")
     parser.add_argument("--dry-run", action="store_true",
                         help="Preview output without writing to file")
+    parser.add_argument("--force", action="store_true",
+                        help="Regenerate the output even if the agent files are unchanged")
+    parser.add_argument("--watch", action="store_true",
+                        help="Keep running and regenerate the output when agent files change")
+    parser.add_argument("--watch-interval", type=float, default=DEFAULT_INTERVAL,
+                        help="Seconds between polls of the agents tree in watch mode (default: %(default)s)")
 
     args = parser.parse_args()
 
@@ -200,10 +94,15 @@ Examples:
     print(f"Output: {output_path}")
     if roles:
         print(f"Roles filter: {', '.join(roles)}")
+    if args.mode:
+        print(f"Mode: {args.mode} only")
+    if args.layout != "default":
+        print(f"Layout: {args.layout}")
     print("-" * 60)
 
-    # Find agent files
-    agents = find_agent_files(agents_dir, roles)
+    # Find agent files (contents are read once, only if the output must be rebuilt)
+    library = discover_agents(agents_dir)
+    agents = select_agents(library, roles)
     if not agents:
         print("Error: No agent files found.")
         sys.exit(1)
@@ -211,18 +110,33 @@ Examples:
     print(f"Found {len(agents)} agent file(s).")
 
     # Generate context
-    context_content = generate_context_file(agents, workspace)
+    def render_context(lib=library):
+        return render_vscode(lib, workspace, roles, args.mode, args.layout)
+
+    def write_context(lib=library, force=False):
+        manifest = build_manifest.load_manifest()
+        key = build_manifest.inputs_key(lib, "vscode", roles, workspace=workspace, mode=args.mode,
+                                        layout=args.layout)
+        status = build_manifest.write_artifact(output_path, key, lambda: render_context(lib), manifest, force)
+        build_manifest.save_manifest(manifest)
+        return status
 
     if args.dry_run:
+        context_content = render_context()
         print("DRY RUN - Preview:")
         print("=" * 60)
         print(context_content[:2000])
         print("=" * 60)
     else:
         try:
-            with open(output_path, 'w', encoding='utf-8') as f:
-                f.write(context_content)
-            print(f"Successfully generated: {output_path}")
+            status = write_context(force=args.force)
+            if status == build_manifest.REUSED:
+                print(f"Up to date (reused): {output_path}")
+            else:
+                print(f"Successfully generated (rebuilt): {output_path}")
+            if args.layout == "stable":
+                with open(output_path, 'r', encoding='utf-8') as f:
+                    print(f"Context {describe_prefix(f.read())}")
             print("")
             print("Usage in VS Code Copilot:")
             print(f"1. Open Copilot Chat")
@@ -232,6 +146,9 @@ Examples:
             print(f"Error writing output file: {e}")
             sys.exit(1)
 
+        if args.watch:
+            watch_and_rebuild(library, lambda lib: f"{write_context(lib)} {output_path}",
+                              roles, interval=args.watch_interval)
 
 if __name__ == "__main__":
     main()
@@ -0,0 +1,192 @@
+#!/usr/bin/env python3
+"""
+agent_library.py
+
+Shared agent discovery for all context generators.
+
+The agents tree is described once, from the registry index (see
+agent_registry.py), as a *library*: a dict describing every role directory
+and the Markdown files it holds. File contents are read at most once per
+library and memoized, so several renderers can work from a single parse of
+the tree.
+
+Library layout:
+    {
+        'agents_dir': '/path/to/agents',
+        'roles': {
+            'backend': {
+                'dir': '/path/to/agents/backend',
+                'unified': '/path/to/agents/backend/backend.md' or None,
+                'files': [top-level *.md paths, sorted],
+                'legacy': [legacy/*.md paths, sorted],
+            },
+            ...
+        },
+        'contents': {filepath: content},
+        'hashes': {filepath: sha256},
+    }
+"""
+
+import os
+import sys
+from concurrent.futures import ThreadPoolExecutor
+
+from agent_registry import load_registry, role_path
+
+SCRIPT_DIR = os.path.dirname(os.path.abspath(__file__))
+CAPSTONE_AGENTS_DIR = os.path.dirname(SCRIPT_DIR)  # scripts/ -> root
+DEFAULT_AGENTS_DIR = os.path.join(CAPSTONE_AGENTS_DIR, "agents")
+
+
+def read_agent_file(filepath: str) -> str | None:
+    """Read and return the content of an agent file."""
+    try:
+        with open(filepath, 'r', encoding='utf-8') as f:
+            return f.read()
+    except Exception as e:
+        print(f"Warning: Could not read {filepath}: {e}", file=sys.stderr)
+        return None
+
+
+def discover_agents(agents_dir: str) -> dict:
+    """
+    Return a library dict for the agents directory.
+    The layout comes from the registry index (agents/index.json), which is
+    rebuilt automatically when stale. File contents are not read here; see
+    read_content() and load_library().
+    """
+    library = {'agents_dir': agents_dir, 'roles': {}, 'contents': {}, 'hashes': {}}
+    if not os.path.isdir(agents_dir):
+        print(f"Error: Agents directory not found: {agents_dir}", file=sys.stderr)
+        return library
+
+    registry = load_registry(agents_dir)
+    for role_name, role in registry['roles'].items():
+        library['roles'][role_name] = {
+            'dir': os.path.join(agents_dir, role_name),
+            'unified': role_path(agents_dir, role['unified']) if role['unified'] else None,
+            'files': [role_path(agents_dir, entry['path']) for entry in role['files']],
+            'legacy': [role_path(agents_dir, entry['path']) for entry in role['legacy']],
+        }
+        for entry in role['files'] + role['legacy']:
+            library['hashes'][role_path(agents_dir, entry['path'])] = entry['sha256']
+    return library
+
+
+def read_content(library: dict, filepath: str) -> str | None:
+    """Return the content of `filepath`, reading it at most once per library."""
+    contents = library['contents']
+    if filepath not in contents:
+        contents[filepath] = read_agent_file(filepath)
+    return contents[filepath]
+
+
+def load_library(agents_dir: str, roles: list[str] | None = None, max_workers: int = 8) -> dict:
+    """Discover the agents tree and read every selected agent file in one pass."""
+    library = discover_agents(agents_dir)
+    paths = [agent['filepath'] for agent in select_agents(library, roles)]
+    for variants in role_variants(library, roles).values():
+        paths.extend(path for path in variants.values() if path)
+    paths = list(dict.fromkeys(paths))
+    with ThreadPoolExecutor(max_workers=max_workers) as executor:
+        for path, content in zip(paths, executor.map(read_agent_file, paths)):
+            library['contents'][path] = content
+    return library
+
+
+def classify_agent_file(filename: str) -> str:
+    """Return the agent type ('planning', 'impl' or 'default') of a split agent file."""
+    lowered = filename.lower()
+    if 'planning' in lowered:
+        return 'planning'
+    if 'implementation' in lowered:
+        return 'impl'
+    return 'default'
+
+
+def select_agents(library: dict, roles: list[str] | None = None) -> list[dict]:
+    """
+    Return the agents to include in a context, as a list of dicts with
+    'role', 'type', 'filepath' and 'filename'.
+
+    Prefers unified agent files ({role}.md) over legacy split files.
+    """
+    agents = []
+    for role_name, role in library['roles'].items():
+        # Filter by roles if specified
+        if roles and role_name not in roles:
+            continue
+
+        if role['unified']:
+            agents.append({
+                'role': role_name,
+                'type': 'unified',
+                'filepath': role['unified'],
+                'filename': f"{role_name}.md"
+            })
+            continue
+
+        # Fall back to split files at the top of the role directory
+        for filepath in role['files']:
+            filename = os.path.basename(filepath)
+            agents.append({
+                'role': role_name,
+                'type': classify_agent_file(filename),
+                'filepath': filepath,
+                'filename': filename
+            })
+    return agents
+
+
+def role_variants(library: dict, roles: list[str] | None = None) -> dict:
+    """
+    Return {role_name: {"planning": path, "implementation": path, "default": path}}
+    for the top-level files of each role (unset variants are None).
+    """
+    variants = {}
+    for role_name, role in library['roles'].items():
+        if roles and role_name not in roles:
+            continue
+        found = {"planning": None, "implementation": None, "default": None}
+        for filepath in role['files']:
+            filename = os.path.basename(filepath).lower()
+            if "-planning" in filename:
+                found["planning"] = filepath
+            elif "-implementation" in filename:
+                found["implementation"] = filepath
+            else:
+                # Single file agent (e.g., coordinator.md)
+                found["default"] = filepath
+        variants[role_name] = found
+    return variants
+
+
+def find_agent_files(agents_dir: str, roles: list[str] | None = None, stack: list[str] | None = None,
+                     prune: str = "drop", keep=()) -> list[dict]:
+    """
+    Discover all agent files in the agents directory.
+    Returns a list of dicts with 'role', 'type', 'filepath' and 'filename'.
+
+    With `stack` (stack tags from workspace_stack.detect_stack()), roles the
+    workspace does not need are dropped, or moved last if `prune` is
+    "demote". Roles named in `roles` or `keep` are never pruned.
+    """
+    agents = select_agents(discover_agents(agents_dir), roles)
+    if stack is not None:
+        from workspace_stack import prune_agents
+
+        agents = prune_agents(agents, stack, prune, set(roles or ()) | set(keep))
+    return agents
+
+
+def generate_trigger(role: str, agent_type: str) -> str:
+    """Generate the @-mention trigger for an agent."""
+    if agent_type in ['default', 'unified']:
+        return f"@{role}"
+    else:
+        return f"@{role} {agent_type}"
+
+
+def format_role_name(role: str) -> str:
+    """Format role name for display (e.g., 'software-architect' -> 'Software Architect')."""
+    return role.replace("-", " ").title()
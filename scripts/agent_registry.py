@@ -0,0 +1,283 @@
+#!/usr/bin/env python3
+"""
+agent_registry.py
+
+Precomputed registry of the agents tree, stored as `agents/index.json`.
+
+The registry lists every role with its unified and legacy files (size,
+mtime, SHA-256), the MCP tools it declares and its @-mention triggers.
+Entry points look agents up in the registry instead of probing and listing
+the tree on every launch. The index is rebuilt automatically when it is
+older than the tree: a recorded file changed size or mtime, or a role
+directory was modified after the index was written.
+
+Usage:
+    python scripts/agent_registry.py            # show registry (rebuild if stale)
+    python scripts/agent_registry.py --rebuild  # force a rebuild
+    python scripts/agent_registry.py --check    # exit 1 if the index is stale
+"""
+
+import json
+import os
+import sys
+
+from agent_sections import section_body
+
+SCRIPT_DIR = os.path.dirname(os.path.abspath(__file__))
+CAPSTONE_AGENTS_DIR = os.path.dirname(SCRIPT_DIR)  # scripts/ -> root
+DEFAULT_AGENTS_DIR = os.path.join(CAPSTONE_AGENTS_DIR, "agents")
+
+INDEX_FILENAME = "index.json"
+REGISTRY_VERSION = 1
+
+# Bullet items such as "- **filesystem** — Read and write files"
+TOOL_PATTERN = r"^\s*[-*]\s+\*\*([^*]+)\*\*"
+
+
+def index_path(agents_dir: str) -> str:
+    """Return the path of the registry file for `agents_dir`."""
+    return os.path.join(agents_dir, INDEX_FILENAME)
+
+
+def extract_mcp_tools(content: str) -> list[str]:
+    """Return the tool names listed under the first 'MCP Tools' heading."""
+    import re
+
+    tools = []
+    for line in section_body(content, 'MCP Tools').split('\n'):
+        match = re.match(TOOL_PATTERN, line)
+        if match:
+            tools.append(match.group(1).strip())
+    return tools
+
+
+def _file_entry(path: str, agents_dir: str) -> tuple[dict, str]:
+    """Stat and hash one agent file. Returns (entry, content)."""
+    import hashlib
+
+    with open(path, 'rb') as f:
+        data = f.read()
+    st = os.stat(path)
+    entry = {
+        'path': os.path.relpath(path, agents_dir).replace(os.sep, '/'),
+        'size': st.st_size,
+        'mtime_ns': st.st_mtime_ns,
+        'sha256': hashlib.sha256(data).hexdigest(),
+    }
+    return entry, data.decode('utf-8', errors='replace')
+
+
+def _markdown_files(directory: str) -> list[str]:
+    try:
+        entries = list(os.scandir(directory))
+    except OSError:
+        return []
+    return sorted(entry.path for entry in entries if entry.name.endswith('.md') and entry.is_file())
+
+
+def _triggers(role_name: str, unified: dict | None, files: list[dict]) -> list[str]:
+    if unified:
+        return [f"@{role_name}", f"@{role_name} planning", f"@{role_name} impl"]
+    triggers = []
+    for entry in files:
+        filename = entry['path'].rsplit('/', 1)[-1].lower()
+        if 'planning' in filename:
+            triggers.append(f"@{role_name} planning")
+        elif 'implementation' in filename:
+            triggers.append(f"@{role_name} impl")
+        else:
+            triggers.append(f"@{role_name}")
+    return list(dict.fromkeys(triggers))
+
+
+def _role_unchanged(previous_role: dict, agents_dir: str, files: list[str], legacy: list[str]) -> bool:
+    """Return True if a role's files match the sizes and mtimes of a previous registry."""
+    recorded = {entry['path']: entry for entry in previous_role['files'] + previous_role['legacy']}
+    if len(recorded) != len(files) + len(legacy):
+        return False
+    for path in files + legacy:
+        entry = recorded.get(os.path.relpath(path, agents_dir).replace(os.sep, '/'))
+        if entry is None:
+            return False
+        st = os.stat(path)
+        if st.st_size != entry['size'] or st.st_mtime_ns != entry['mtime_ns']:
+            return False
+    return True
+
+
+def build_registry(agents_dir: str, previous: dict | None = None) -> dict:
+    """
+    Walk the agents tree once and build the registry dict.
+    Roles whose files are unchanged since `previous` are reused without
+    re-reading their files.
+    """
+    registry = {'version': REGISTRY_VERSION, 'dirs': {}, 'roles': {}}
+    if not os.path.isdir(agents_dir):
+        return registry
+    previous_roles = {}
+    if previous and previous.get('version') == REGISTRY_VERSION:
+        previous_roles = previous.get('roles', {})
+
+    registry['dirs']['.'] = os.stat(agents_dir).st_mtime_ns
+    for role_entry in sorted(os.scandir(agents_dir), key=lambda e: e.name):
+        if not role_entry.is_dir():
+            continue
+        role_name = role_entry.name
+        registry['dirs'][role_name] = role_entry.stat().st_mtime_ns
+        legacy_dir = os.path.join(role_entry.path, "legacy")
+        if os.path.isdir(legacy_dir):
+            registry['dirs'][f"{role_name}/legacy"] = os.stat(legacy_dir).st_mtime_ns
+
+        role_files = _markdown_files(role_entry.path)
+        legacy_files = _markdown_files(legacy_dir)
+        previous_role = previous_roles.get(role_name)
+        try:
+            if previous_role and _role_unchanged(previous_role, agents_dir, role_files, legacy_files):
+                registry['roles'][role_name] = previous_role
+                continue
+        except (OSError, KeyError, TypeError):
+            pass
+
+        files = []
+        legacy = []
+        unified = None
+        tools = []
+        for path in role_files:
+            entry, content = _file_entry(path, agents_dir)
+            files.append(entry)
+            if os.path.basename(path) == f"{role_name}.md":
+                unified = entry
+            if not tools:
+                tools = extract_mcp_tools(content)
+        for path in legacy_files:
+            entry, content = _file_entry(path, agents_dir)
+            legacy.append(entry)
+            if not tools:
+                tools = extract_mcp_tools(content)
+
+        registry['roles'][role_name] = {
+            'unified': unified['path'] if unified else None,
+            'files': files,
+            'legacy': legacy,
+            'mcp_tools': tools,
+            'triggers': _triggers(role_name, unified, files or legacy),
+        }
+    return registry
+
+
+def registry_is_stale(registry: dict, agents_dir: str, index_mtime_ns: int) -> bool:
+    """
+    Return True if the tree changed after the registry was written.
+    Only stats the directories and files recorded in the registry.
+    """
+    if registry.get('version') != REGISTRY_VERSION:
+        return True
+    try:
+        for rel_dir, mtime_ns in registry['dirs'].items():
+            current = os.stat(os.path.join(agents_dir, rel_dir)).st_mtime_ns
+            if current != mtime_ns and current > index_mtime_ns:
+                return True
+        for role in registry['roles'].values():
+            for entry in role['files'] + role['legacy']:
+                st = os.stat(os.path.join(agents_dir, entry['path']))
+                if st.st_size != entry['size'] or st.st_mtime_ns != entry['mtime_ns']:
+                    return True
+    except (OSError, KeyError, TypeError):
+        return True
+    return False
+
+
+def write_registry(registry: dict, agents_dir: str) -> bool:
+    """Atomically write the registry to agents/index.json. Returns False if not writable."""
+    import tempfile
+
+    path = index_path(agents_dir)
+    try:
+        fd, tmp_path = tempfile.mkstemp(dir=agents_dir, prefix=".index-", suffix=".tmp")
+    except OSError:
+        return False
+    try:
+        with os.fdopen(fd, 'w', encoding='utf-8') as f:
+            json.dump(registry, f, indent=2, sort_keys=True)
+            f.write("\n")
+        os.replace(tmp_path, path)
+        # The rename touched agents_dir; make the index at least as new as the tree
+        os.utime(path)
+        return True
+    except OSError:
+        try:
+            os.unlink(tmp_path)
+        except OSError:
+            pass
+        return False
+
+
+def load_registry(agents_dir: str, rebuild: bool = False) -> dict:
+    """
+    Return the registry for `agents_dir`, rebuilding (and rewriting)
+    agents/index.json when it is missing, stale or `rebuild` is set.
+    """
+    path = index_path(agents_dir)
+    previous = None
+    if not rebuild:
+        try:
+            index_mtime_ns = os.stat(path).st_mtime_ns
+            with open(path, 'r', encoding='utf-8') as f:
+                previous = json.load(f)
+            if not registry_is_stale(previous, agents_dir, index_mtime_ns):
+                return previous
+        except (OSError, ValueError):
+            pass
+
+    registry = build_registry(agents_dir, previous)
+    if registry['roles']:
+        write_registry(registry, agents_dir)
+    return registry
+
+
+def role_path(agents_dir: str, rel_path: str) -> str:
+    """Return the absolute path of a registry-relative file path."""
+    return os.path.join(agents_dir, *rel_path.split('/'))
+
+
+def main():
+    import argparse
+
+    parser = argparse.ArgumentParser(
+        description="Build or inspect the agents registry index (agents/index.json)"
+    )
+    parser.add_argument("--agents-dir",
+                        help="Custom path to agents directory")
+    parser.add_argument("--rebuild", action="store_true",
+                        help="Rebuild the index even if it is up to date")
+    parser.add_argument("--check", action="store_true",
+                        help="Exit with status 1 if the index is missing or stale (no rebuild)")
+
+    args = parser.parse_args()
+    agents_dir = os.path.abspath(args.agents_dir) if args.agents_dir else DEFAULT_AGENTS_DIR
+
+    if not os.path.isdir(agents_dir):
+        print(f"Error: Agents directory not found: {agents_dir}", file=sys.stderr)
+        sys.exit(1)
+
+    if args.check:
+        path = index_path(agents_dir)
+        try:
+            with open(path, 'r', encoding='utf-8') as f:
+                registry = json.load(f)
+            stale = registry_is_stale(registry, agents_dir, os.stat(path).st_mtime_ns)
+        except (OSError, ValueError):
+            stale = True
+        print(f"{path}: {'stale' if stale else 'up to date'}")
+        sys.exit(1 if stale else 0)
+
+    registry = load_registry(agents_dir, rebuild=args.rebuild)
+    print(f"Registry: {index_path(agents_dir)}")
+    for role_name, role in registry['roles'].items():
+        kind = "unified" if role['unified'] else "legacy"
+        print(f"  - {role_name} ({kind}, {len(role['files']) + len(role['legacy'])} file(s)): "
+              f"{', '.join(role['triggers'])}")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,489 @@
+#!/usr/bin/env python3
+"""
+agent_renderers.py
+
+Pluggable renderers that turn an agent library (see agent_library.py) into
+the context artifacts used by each integration.
+
+Every renderer has the signature:
+
+    render(library, workspace, roles=None, mode=None, **options) -> str
+
+where `mode` ('planning' or 'implementation') slices unified agent files
+down to that mode, and is registered in RENDERERS together with the
+default output filename of the artifact it produces. New integrations can
+add their own renderer with register_renderer().
+
+Renderers that mention the workspace also take `layout`: "default" puts it
+in the header, "stable" moves it to a trailing session block so the prefix
+is identical across workspaces (see context_layout.py).
+"""
+
+from agent_library import (
+    format_role_name,
+    generate_trigger,
+    read_agent_file,
+    read_content,
+    role_variants,
+    select_agents,
+)
+from agent_sections import body_chunks, has_mode, slice_mode
+from context_layout import with_session
+from context_dedup import ROLE_PLACEHOLDER, SHARED_MARKER, factor_shared, format_shared
+
+# name -> {'render': callable, 'output': default filename, 'description': str}
+RENDERERS = {}
+
+
+def register_renderer(name: str, render, output: str, description: str = "") -> None:
+    """Register a renderer under `name`."""
+    RENDERERS[name] = {'render': render, 'output': output, 'description': description}
+
+
+def render(name: str, library: dict, workspace: str, **options) -> str:
+    """Render the artifact `name` from `library`."""
+    if name not in RENDERERS:
+        raise KeyError(f"Unknown renderer '{name}'. Available: {', '.join(sorted(RENDERERS))}")
+    return RENDERERS[name]['render'](library, workspace, **options)
+
+
+def _reader(library: dict | None, mode: str | None = None):
+    """Return a content reader backed by the library memo, or plain file reads."""
+    if library is None:
+        return mode_reader(read_agent_file, mode)
+    return mode_reader(lambda filepath: read_content(library, filepath), mode)
+
+
+def _workspace_lines(label: str, workspace: str | None) -> list[str]:
+    """Header lines naming the workspace (none when it goes in the session block)."""
+    if workspace is None:
+        return []
+    return [f"**{label}**: `{workspace}`", ""]
+
+
+def apply_layout(format_context, workspace: str, layout: str = "default", label: str = "Current Workspace") -> str:
+    """
+    Call `format_context(workspace)` for the default layout, or render the
+    static prefix with `format_context(None)` and append the session block.
+    """
+    if layout == "stable":
+        return with_session(format_context(None), {label: workspace})
+    return format_context(workspace)
+
+
+def mode_reader(read, mode: str | None):
+    """Wrap a content reader so unified agent files are sliced to `mode` (None: whole files)."""
+    if mode is None:
+        return read
+
+    def read_mode(filepath):
+        content = read(filepath)
+        return None if content is None else slice_mode(content, mode)
+    return read_mode
+
+
+# ---------------------------------------------------------------------------
+# System prompt (run_agents.py multi-agent mode, QwenCLI)
+# ---------------------------------------------------------------------------
+
+def format_system_prompt(agents: list[dict], workspace: str | None, read=read_agent_file, dedupe: bool = True) -> str:
+    """
+    Generate the consolidated system prompt (without the workspace line if
+    `workspace` is None).
+    With `dedupe`, text shared by the agent definitions is emitted once in a
+    shared section and each definition keeps only its own text.
+    """
+    lines = [
+        "# Capstone Agents System Prompt",
+        "",
+        "You are an intelligent development assistant capable of assuming multiple expert roles.",
+        "You can invoke a specific agent persona by using its **trigger handle** (e.g., `@frontend`).",
+        "",
+        "## User Instructions",
+        "When you see a trigger like `@role`, you MUST:",
+        "1. Adopt the persona and instructions of that agent completely.",
+        "2. Ignore previous persona instructions if they conflict.",
+        "3. Execute the user's request using that agent's capabilities.",
+        "",
+        *_workspace_lines("Current Workspace", workspace),
+        "---",
+        "",
+        "## Available Agents",
+        ""
+    ]
+
+    # Add agent list
+    for agent in agents:
+        trigger = generate_trigger(agent['role'], agent['type'])
+        lines.append(f"- **{trigger}**: {agent['role'].title()} Agent")
+
+    lines.append("")
+    lines.append("---")
+    lines.append("")
+
+    contents = {}
+    for agent in agents:
+        content = read(agent['filepath'])
+        if content is not None:
+            contents[agent['filepath']] = content.strip()
+
+    if dedupe and len(contents) > 1:
+        shared, contents = _factor_shared_definitions(agents, contents)
+        if shared:
+            lines.append("## Shared Agent Instructions")
+            lines.append("")
+            lines.append("Every agent definition below also includes these instructions in the section named by each heading;")
+            lines.append(f"`{SHARED_MARKER}` marks where they belong. `{ROLE_PLACEHOLDER}` stands for the agent's role (e.g. `backend`).")
+            lines.append("```markdown")
+            lines.extend(format_shared(shared))
+            lines.append("```")
+            lines.append("")
+            lines.append("---")
+            lines.append("")
+
+    lines.append("## Agent Definitions")
+    lines.append("")
+
+    # Add full agent definitions
+    for agent in agents:
+        trigger = generate_trigger(agent['role'], agent['type'])
+        content = contents.get(agent['filepath'])
+
+        if content is None:
+            continue
+
+        lines.append(f"### Agent: {agent['role'].title()} ({trigger})")
+        lines.append("```markdown")
+        lines.append(content.strip())
+        lines.append("```")
+        lines.append("")
+        lines.append("---")
+        lines.append("")
+
+    return "\n".join(lines)
+
+
+def _factor_shared_definitions(agents: list[dict], contents: dict) -> tuple[list[dict], dict]:
+    """Run factor_shared() on {filepath: content}, keyed by role for name normalization."""
+    roles = {agent['filepath']: agent['role'] for agent in agents if agent['filepath'] in contents}
+    if len(set(roles.values())) < len(roles):
+        # Legacy split files share a role; keep them verbatim
+        return [], contents
+    shared, remainders = factor_shared({roles[path]: content for path, content in contents.items()})
+    return shared, {path: remainders[roles[path]] for path in contents}
+
+
+def render_system_prompt(library: dict, workspace: str, roles: list[str] | None = None,
+                         mode: str | None = None, dedupe: bool = True, layout: str = "default") -> str:
+    """Render the multi-agent system prompt."""
+    agents = select_agents(library, roles)
+    read = _reader(library, mode)
+    return apply_layout(lambda ws: format_system_prompt(agents, ws, read, dedupe), workspace, layout)
+
+
+# ---------------------------------------------------------------------------
+# Antigravity IDE
+# ---------------------------------------------------------------------------
+
+def format_antigravity(agents: list[dict], workspace: str | None, read=read_agent_file) -> str:
+    """Generate the contents of the antigravity_context.md file."""
+    lines = [
+        "# Capstone Agents - Antigravity Context",
+        "",
+        "This file contains the definitions for all Capstone Agents.",
+        "You can invoke an agent by using its **trigger handle** (e.g., `@frontend planning`).",
+        "",
+        "When the user types a trigger, you MUST adopt the persona and follow the instructions",
+        "for that agent role. Continue acting as that agent until the user invokes a different trigger.",
+        "",
+        *_workspace_lines("Current Workspace", workspace),
+        "---",
+        "",
+        "## Available Agents",
+        "",
+        "| Trigger | Role | Type |",
+        "|---------|------|------|",
+    ]
+
+    # Add summary table
+    for agent in agents:
+        trigger = generate_trigger(agent['role'], agent['type'])
+        lines.append(f"| `{trigger}` | {format_role_name(agent['role'])} | {agent['type'].title()} |")
+
+    lines.append("")
+    lines.append("---")
+    lines.append("")
+
+    # Add full agent definitions
+    for agent in agents:
+        trigger = generate_trigger(agent['role'], agent['type'])
+        content = read(agent['filepath'])
+
+        if content is None:
+            continue
+
+        role_title = format_role_name(agent['role'])
+        type_title = agent['type'].title()
+
+        lines.append(f"## Agent: {role_title} ({type_title})")
+        lines.append("")
+        lines.append(f"**Trigger**: `{trigger}`")
+        lines.append("")
+        lines.append("**Instructions**:")
+        lines.append("")
+        lines.append("<details>")
+        lines.append(f"<summary>View full instructions for {trigger}</summary>")
+        lines.append("")
+        lines.append(content.strip())
+        lines.append("")
+        lines.append("</details>")
+        lines.append("")
+        lines.append("---")
+        lines.append("")
+
+    return "\n".join(lines)
+
+
+def render_antigravity(library: dict, workspace: str, roles: list[str] | None = None,
+                       mode: str | None = None, layout: str = "default") -> str:
+    """Render the Antigravity IDE context file."""
+    agents = select_agents(library, roles)
+    read = _reader(library, mode)
+    return apply_layout(lambda ws: format_antigravity(agents, ws, read), workspace, layout)
+
+
+# ---------------------------------------------------------------------------
+# VS Code Copilot Chat
+# ---------------------------------------------------------------------------
+
+def format_vscode(agents: list[dict], workspace: str | None, read=read_agent_file) -> str:
+    """Generate the contents of the copilot_agent_context.md file."""
+    lines = [
+        "# VS Code Copilot - Agent Context Definitions",
+        "",
+        "> **SYSTEM INSTRUCTION**:",
+        "> You are an AI assistant in VS Code. The user has explicitly provided this context file",
+        "> to define a set of specialized agent roles. ",
+        ">",
+        "> **YOUR GOAL**: When the user's prompt starts with a specific **trigger** (defined below),",
+        "> you MUST completely adopt the persona and instructions of that agent.",
+        ">",
+        "> **RULES**:",
+        "> 1. Check the user's prompt for a trigger like `@backend impl` or `@coordinator`.",
+        "> 2. If a trigger is found, ignore your default behavior and strictly follow the Agent Definition below.",
+        "> 3. Maintain this persona for the duration of the response.",
+        "> 4. If no trigger is found, act as a helpful coding assistant.",
+        "",
+        *_workspace_lines("Workspace", workspace),
+        "## Agent Triggers Index",
+        "",
+        "| Trigger | Role | Type |",
+        "|---------|------|------|",
+    ]
+
+    # Add summary table
+    for agent in agents:
+        trigger = generate_trigger(agent['role'], agent['type'])
+        lines.append(f"| `{trigger}` | {format_role_name(agent['role'])} | {agent['type'].title()} |")
+
+    lines.append("")
+    lines.append("---")
+    lines.append("")
+
+    # Add full agent definitions
+    for agent in agents:
+        trigger = generate_trigger(agent['role'], agent['type'])
+        content = read(agent['filepath'])
+
+        if content is None:
+            continue
+
+        role_title = format_role_name(agent['role'])
+        type_title = agent['type'].title()
+
+        lines.append(f"## Definition: {role_title} ({type_title})")
+        lines.append(f"**Trigger**: `{trigger}`")
+        lines.append("")
+        lines.append("**Agent Instructions**:")
+        lines.append("```markdown")
+        lines.append(content.strip())
+        lines.append("```")
+        lines.append("")
+        lines.append("---")
+        lines.append("")
+
+    return "\n".join(lines)
+
+
+def render_vscode(library: dict, workspace: str, roles: list[str] | None = None,
+                  mode: str | None = None, layout: str = "default") -> str:
+    """Render the VS Code Copilot Chat context file."""
+    agents = select_agents(library, roles)
+    read = _reader(library, mode)
+    return apply_layout(lambda ws: format_vscode(agents, ws, read), workspace, layout, label="Workspace")
+
+
+# ---------------------------------------------------------------------------
+# Cursor IDE (.cursorrules)
+# ---------------------------------------------------------------------------
+
+def extract_description(content: str) -> str:
+    """Extract the first meaningful description line from agent content."""
+    for chunk in body_chunks(content):
+        for line in chunk.split("\n"):
+            line = line.strip()
+            # Skip comment-like lines and empty lines
+            if line.startswith("#") or not line:
+                continue
+            # Skip "**Goal**" labels and "You are ..." preambles
+            if line.startswith("**") or line.startswith("You are"):
+                continue
+            # Found a description line
+            if len(line) > 10:
+                # Truncate if too long
+                return line[:150] + "..." if len(line) > 150 else line
+    return "Specialized agent role"
+
+
+def format_cursorrules(
+    agents: dict,
+    roles_filter: list = None,
+    planning_only: bool = False,
+    impl_only: bool = False,
+    read=read_agent_file
+) -> str:
+    """
+    Generate the .cursorrules content with all agents.
+
+    Args:
+        agents: {role_name: {"planning": path, "implementation": path, "default": path}}
+        roles_filter: Optional list of roles to include
+        planning_only: Only include planning agents (unified files are cut to PLANNING MODE)
+        impl_only: Only include implementation agents (unified files are cut to IMPLEMENTATION MODE)
+        read: Callable returning the content of an agent file
+
+    Returns:
+        str: Complete .cursorrules file content
+    """
+
+    def read_stripped(filepath, mode=None):
+        content = read(filepath)
+        return slice_mode(content, mode).strip() if content else ""
+
+    def impl_file(files):
+        # Unified files provide the implementation variant when they have an IMPLEMENTATION MODE section
+        if files["implementation"]:
+            return files["implementation"]
+        default = files["default"]
+        if impl_only and default and has_mode(read(default) or "", 'implementation'):
+            return default
+        return None
+
+    planning_mode = 'planning' if planning_only else None
+    impl_mode = 'implementation' if impl_only else None
+
+    # Header
+    output = []
+    output.append("# Capstone Multi-Agent System")
+    output.append("")
+    output.append("You are a multi-agent AI assistant with access to specialized roles from the Capstone Agents framework.")
+    output.append("Each role has specific expertise, tools, and workflows. Switch between roles when the user requests.")
+    output.append("")
+    output.append("## How to Switch Roles")
+    output.append("- When user says `@RoleName` or `Act as RoleName`, adopt that role's persona and capabilities")
+    output.append("- For roles with planning/impl variants, use `@RoleName planning` or `@RoleName impl`")
+    output.append("- Default role is **Coordinator** if no role is specified")
+    output.append("- You can suggest switching roles when a task better fits another agent")
+    output.append("")
+    output.append("## Available Agents")
+    output.append("")
+
+    # List available roles for quick reference
+    available_roles = []
+    for role_name, files in sorted(agents.items()):
+        if roles_filter and role_name not in roles_filter:
+            continue
+        display_name = format_role_name(role_name)
+        variants = []
+        if files["planning"] or files["default"]:
+            if not impl_only:
+                variants.append("planning")
+        if impl_file(files):
+            if not planning_only:
+                variants.append("impl")
+        if variants:
+            available_roles.append(f"- **{display_name}**: {', '.join(variants)}")
+
+    output.extend(available_roles)
+    output.append("")
+    output.append("---")
+    output.append("")
+
+    # Agent definitions
+    for role_name, files in sorted(agents.items()):
+        if roles_filter and role_name not in roles_filter:
+            continue
+
+        display_name = format_role_name(role_name)
+
+        # Planning agent
+        planning_file = files["planning"] or files["default"]
+        if planning_file and not impl_only:
+            content = read_stripped(planning_file, planning_mode)
+            if content:
+                description = extract_description(content)
+                output.append(f"### [AGENT: {display_name}]")
+                output.append("**Type:** planning")
+                output.append(f"**Description:** {description}")
+                output.append("")
+                output.append(content)
+                output.append("")
+                output.append("---")
+                output.append("")
+
+        # Implementation agent (separate file, or the IMPLEMENTATION MODE of a unified file)
+        if impl_file(files) and not planning_only:
+            content = read_stripped(impl_file(files), impl_mode)
+            if content:
+                description = extract_description(content)
+                output.append(f"### [AGENT: {display_name} (impl)]")
+                output.append("**Type:** implementation")
+                output.append(f"**Description:** {description}")
+                output.append("")
+                output.append(content)
+                output.append("")
+                output.append("---")
+                output.append("")
+
+    # Footer with usage tips
+    output.append("## Multi-Agent Collaboration Tips")
+    output.append("")
+    output.append("1. **Coordinator First**: Start with `@Coordinator` to create a project plan")
+    output.append("2. **Delegate Tasks**: Let Coordinator assign tasks to specialized agents")
+    output.append("3. **File-Based Handoff**: Agents communicate via plan files (e.g., `coordinator-plan.md`)")
+    output.append("4. **Parallel Work**: Open multiple chat tabs, each with a different agent")
+    output.append("5. **Reference Files**: Use `@filename` to share context between agents")
+    output.append("")
+
+    return "\n".join(output)
+
+
+def render_cursorrules(library: dict, workspace: str, roles: list[str] | None = None,
+                       mode: str | None = None, planning_only: bool = False, impl_only: bool = False,
+                       layout: str = "default") -> str:
+    """Render the .cursorrules file for Cursor IDE (it names no workspace, so every layout is stable)."""
+    planning_only = planning_only or mode == 'planning'
+    impl_only = impl_only or mode == 'implementation'
+    return format_cursorrules(role_variants(library), roles, planning_only, impl_only, _reader(library))
+
+
+register_renderer("system-prompt", render_system_prompt, "capstone_context.md",
+                  "Multi-agent system prompt (run_agents.py multi mode)")
+register_renderer("antigravity", render_antigravity, "antigravity_context.md",
+                  "Antigravity IDE context file")
+register_renderer("qwen", render_system_prompt, "qwen_context.md",
+                  "QwenCLI system prompt")
+register_renderer("vscode", render_vscode, "copilot_agent_context.md",
+                  "VS Code Copilot Chat context file")
+register_renderer("cursorrules", render_cursorrules, ".cursorrules",
+                  "Cursor IDE rules file")
@@ -0,0 +1,140 @@
+#!/usr/bin/env python3
+"""
+agent_sections.py
+
+One-pass Markdown section parser for agent files.
+
+`parse_sections()` scans a document once and builds its heading tree: every
+heading with its level, title and character offsets (heading start, body
+start, section end). Lines inside fenced code blocks are never treated as
+headings. Results are memoized per document content, so the migrator, the
+validator and the renderers can look sections up repeatedly without
+re-scanning the text. `slice_mode()` cuts a unified agent definition down
+to its planning or implementation half.
+"""
+
+from functools import lru_cache
+
+# Number of parsed documents kept in memory
+PARSE_CACHE_SIZE = 4096
+
+# Mode -> heading of that mode's section in unified agent files
+MODE_HEADINGS = {
+    'planning': "PLANNING MODE",
+    'implementation': "IMPLEMENTATION MODE",
+}
+
+
+@lru_cache(maxsize=PARSE_CACHE_SIZE)
+def parse_sections(content: str) -> dict:
+    """
+    Parse `content` into a heading tree.
+
+    Returns:
+        dict: {
+            'sections': [node, ...] in document order,
+            'roots': top-level nodes,
+            'index': {lowercase title: first node with that title},
+        }
+        where node = {'title', 'level', 'start', 'body_start', 'end', 'children'}.
+        The returned structure is shared between callers and must not be modified.
+    """
+    sections = []
+    roots = []
+    index = {}
+    stack = []
+    in_fence = False
+    pos = 0
+    for line in content.split('\n'):
+        line_start = pos
+        pos += len(line) + 1
+        if line.lstrip().startswith(('```', '~~~')):
+            in_fence = not in_fence
+            continue
+        if in_fence or not line.startswith('#'):
+            continue
+
+        level = len(line) - len(line.lstrip('#'))
+        node = {
+            'title': line.lstrip('#').strip(),
+            'level': level,
+            'start': line_start,
+            'body_start': min(pos, len(content)),
+            'end': len(content),
+            'children': [],
+        }
+        # Close every open section of the same or a deeper level
+        while stack and stack[-1]['level'] >= level:
+            stack.pop()['end'] = line_start
+        (stack[-1]['children'] if stack else roots).append(node)
+        stack.append(node)
+        sections.append(node)
+        index.setdefault(node['title'].lower(), node)
+
+    return {'sections': sections, 'roots': roots, 'index': index}
+
+
+def find_section(content: str, title: str) -> dict | None:
+    """
+    Return the first section whose heading is `title` (case-insensitive),
+    or else the first whose heading contains it. None if there is none.
+    """
+    tree = parse_sections(content)
+    key = title.lower()
+    node = tree['index'].get(key)
+    if node is not None:
+        return node
+    for node in tree['sections']:
+        if key in node['title'].lower():
+            return node
+    return None
+
+
+def section_body(content: str, title: str) -> str:
+    """Return the stripped text under the `title` heading, or '' if it is missing."""
+    node = find_section(content, title)
+    if node is None:
+        return ""
+    return content[node['body_start']:node['end']].strip()
+
+
+def heading_titles(content: str, min_level: int = 1) -> list[str]:
+    """Return the titles of all headings at `min_level` or deeper, in document order."""
+    return [node['title'] for node in parse_sections(content)['sections'] if node['level'] >= min_level]
+
+
+def body_chunks(content: str) -> list[str]:
+    """Return the text between headings (preamble first), in document order."""
+    sections = parse_sections(content)['sections']
+    if not sections:
+        return [content]
+    chunks = [content[:sections[0]['start']]]
+    for node, following in zip(sections, sections[1:] + [None]):
+        chunks.append(content[node['body_start']:following['start'] if following else len(content)])
+    return chunks
+
+
+def has_mode(content: str, mode: str) -> bool:
+    """Return True if `content` has a section for `mode` ('planning' or 'implementation')."""
+    return MODE_HEADINGS[mode].lower() in parse_sections(content)['index']
+
+
+def slice_mode(content: str, mode: str | None) -> str:
+    """
+    Return a unified agent definition cut down to one mode: the other mode's
+    section and the Mode Switching section are removed; the role description
+    and Shared Capabilities are kept. Content without a section for `mode`
+    (legacy split files, single-mode roles) is returned unchanged.
+    """
+    if mode is None or not has_mode(content, mode):
+        return content
+    drop = {title.lower() for other, title in MODE_HEADINGS.items() if other != mode}
+    drop.add("mode switching")
+    spans = []
+    for node in parse_sections(content)['sections']:
+        # Sections are in document order; skip those inside an already dropped one
+        if node['title'].lower() in drop and not (spans and node['start'] < spans[-1][1]):
+            spans.append((node['start'], node['end']))
+    for start, end in reversed(spans):
+        content = content[:start] + content[end:]
+    return content
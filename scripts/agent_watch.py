@@ -0,0 +1,130 @@
+#!/usr/bin/env python3
+"""
+agent_watch.py
+
+Watch mode for the context generators.
+
+The agents tree is polled with cheap stat calls (no extra dependencies).
+Bursts of edits are debounced into a single change set, and only the
+artifacts whose roles were touched are re-rendered. The agent library is
+refreshed incrementally: contents of unchanged files stay memoized, so
+editing one role file only re-reads that file.
+"""
+
+import os
+import time
+
+from agent_library import discover_agents
+
+# Seconds between polls of the agents tree
+DEFAULT_INTERVAL = 0.05
+# Quiet time after the last detected change before rebuilding
+DEFAULT_DEBOUNCE = 0.03
+
+
+def snapshot(agents_dir: str) -> dict:
+    """Return {path: (size, mtime_ns)} for every agent Markdown file."""
+    state = {}
+
+    def scan(directory, depth):
+        try:
+            entries = list(os.scandir(directory))
+        except OSError:
+            return
+        for entry in entries:
+            try:
+                if entry.is_dir():
+                    if depth < 2:
+                        scan(entry.path, depth + 1)
+                elif entry.name.endswith('.md'):
+                    st = entry.stat()
+                    state[entry.path] = (st.st_size, st.st_mtime_ns)
+            except OSError:
+                continue
+
+    scan(agents_dir, 0)
+    return state
+
+
+def changed_paths(old: dict, new: dict) -> set[str]:
+    """Return paths that were added, removed or modified between two snapshots."""
+    return {path for path in old.keys() | new.keys() if old.get(path) != new.get(path)}
+
+
+def roles_for_paths(agents_dir: str, paths: set[str]) -> set[str]:
+    """Map changed file paths to the role directories they belong to."""
+    roles = set()
+    for path in paths:
+        rel_path = os.path.relpath(path, agents_dir)
+        roles.add(rel_path.split(os.sep, 1)[0])
+    return roles
+
+
+def affects(roles_filter: list[str] | None, changed_roles: set[str]) -> bool:
+    """Return True if an artifact built for `roles_filter` includes any changed role."""
+    return not roles_filter or bool(changed_roles.intersection(roles_filter))
+
+
+def refresh_library(library: dict, paths: set[str]) -> dict:
+    """Rediscover the agents tree, keeping memoized contents of unchanged files."""
+    refreshed = discover_agents(library['agents_dir'])
+    refreshed['contents'] = {
+        path: content for path, content in library['contents'].items() if path not in paths
+    }
+    return refreshed
+
+
+def watch(agents_dir: str, on_change, interval: float = DEFAULT_INTERVAL,
+          debounce: float = DEFAULT_DEBOUNCE) -> None:
+    """
+    Poll `agents_dir` until interrupted and call `on_change(paths, roles)`
+    once per debounced burst of edits.
+    """
+    print(f"Watching {agents_dir} for changes (Ctrl+C to stop)...")
+    state = snapshot(agents_dir)
+    try:
+        while True:
+            time.sleep(interval)
+            current = snapshot(agents_dir)
+            paths = changed_paths(state, current)
+            if not paths:
+                continue
+
+            # Debounce: keep collecting until the tree is quiet
+            quiet_since = time.monotonic()
+            while time.monotonic() - quiet_since < debounce:
+                time.sleep(min(interval, debounce))
+                latest = snapshot(agents_dir)
+                more = changed_paths(current, latest)
+                if more:
+                    paths |= more
+                    current = latest
+                    quiet_since = time.monotonic()
+
+            state = current
+            on_change(paths, roles_for_paths(agents_dir, paths))
+    except KeyboardInterrupt:
+        print("\nStopped watching.")
+
+
+def watch_and_rebuild(library: dict, rebuild, roles_filter: list[str] | None = None,
+                      interval: float = DEFAULT_INTERVAL, debounce: float = DEFAULT_DEBOUNCE) -> None:
+    """
+    Watch the library's agents tree and call `rebuild(library)` with a
+    refreshed library whenever a role included by `roles_filter` changes.
+    `rebuild` returns a short summary line that is printed with the timing.
+    """
+    state = {'library': library}
+
+    def on_change(paths, changed_roles):
+        start = time.perf_counter()
+        state['library'] = refresh_library(state['library'], paths)
+        names = ', '.join(sorted(changed_roles))
+        if not affects(roles_filter, changed_roles):
+            print(f"[watch] {len(paths)} change(s) in {names}: no affected artifacts")
+            return
+        summary = rebuild(state['library'])
+        print(f"[watch] {len(paths)} change(s) in {names}: {summary} "
+              f"({(time.perf_counter() - start) * 1000:.0f} ms)")
+
+    watch(library['agents_dir'], on_change, interval, debounce)
@@ -0,0 +1,201 @@
+#!/usr/bin/env python3
+"""
+async_engine.py
+
+Asyncio execution engine for batch agent runs.
+
+Every CLI process is started with asyncio.create_subprocess_exec and driven
+from one event loop, so concurrent runs cost no thread each:
+
+- stdout and stderr are read line by line as they arrive. A reader only
+  asks for the next line once the previous one has been echoed, and the
+  stream buffer is bounded, so a chatty CLI is throttled by its pipe
+  instead of growing memory.
+- a prompt delivered on stdin is written in chunks with drain(), so a CLI
+  that reads slowly applies backpressure to the writer.
+- each run has its own timeout; on expiry (or cancellation, e.g. Ctrl+C)
+  the process is killed.
+- a semaphore bounds how many processes run at once.
+
+On Linux, child exits are watched through pidfds (Python 3.9+, kernel 5.3+)
+instead of the default blocking waitpid() thread per child.
+
+    specs = [{'agent_name': 'backend', 'cmd': [...], 'cwd': workspace}, ...]
+    results = run_processes(specs, max_parallel=50)
+"""
+
+import asyncio
+import os
+import sys
+import time
+from contextlib import nullcontext
+
+import tracing
+from batch_output import OutputTail, batch_result, emit_line, finish_run, log_path_for
+
+# Stream buffer size; longer lines are read from it in pieces and joined
+STREAM_LIMIT = 1024 * 1024
+# Size of the writes of a stdin prompt
+STDIN_CHUNK = 64 * 1024
+
+
+def _install_pidfd_watcher() -> None:
+    """Watch child exits through pidfds where Python would otherwise start a thread per child."""
+    if sys.platform != "linux" or sys.version_info >= (3, 12) or not hasattr(asyncio, "PidfdChildWatcher"):
+        # 3.12+ picks the pidfd watcher itself
+        return
+    try:
+        os.close(os.pidfd_open(os.getpid()))
+    except (AttributeError, OSError):
+        return
+    asyncio.get_event_loop_policy().set_child_watcher(asyncio.PidfdChildWatcher())
+
+
+async def _read_line(stream) -> bytes:
+    """Return the next line of `stream` (b"" at EOF), however long it is."""
+    pieces = []
+    while True:
+        try:
+            pieces.append(await stream.readuntil(b"\n"))
+            break
+        except asyncio.IncompleteReadError as e:
+            # EOF: the last line has no newline
+            pieces.append(e.partial)
+            break
+        except asyncio.LimitOverrunError as e:
+            # Line longer than STREAM_LIMIT: take the buffered part and keep reading
+            pieces.append(await stream.readexactly(e.consumed))
+    return b"".join(pieces)
+
+
+async def _pump(stream, prefix: str, tail: OutputTail) -> None:
+    """Echo and record every line of `stream` until EOF."""
+    while True:
+        data = await _read_line(stream)
+        if not data:
+            return
+        line = data.decode("utf-8", errors="replace")
+        if not line.endswith("\n"):
+            line += "\n"
+        tail.append(line)
+        emit_line(prefix, line)
+
+
+async def _feed(process, text: str) -> None:
+    """Write `text` to the process's stdin with backpressure, then close it."""
+    data = text.encode("utf-8")
+    try:
+        for offset in range(0, len(data), STDIN_CHUNK):
+            process.stdin.write(data[offset:offset + STDIN_CHUNK])
+            await process.stdin.drain()
+        process.stdin.close()
+        await process.stdin.wait_closed()
+    except (BrokenPipeError, ConnectionResetError):
+        # The CLI exited or closed stdin early; its exit status reports why
+        pass
+
+
+def _kill(process) -> None:
+    try:
+        process.kill()
+    except ProcessLookupError:
+        pass
+
+
+async def run_process(spec: dict, semaphore: asyncio.Semaphore | None = None) -> dict:
+    """
+    Run one batch CLI process and return its result record
+    (see batch_output.batch_result()).
+
+    spec: {
+        'agent_name': label for output and results,
+        'cmd': argv list,
+        'cwd': working directory,
+        'stdin': prompt text for stdin, or None,
+        'timeout': seconds before the process is killed, or None,
+        'log_dir': directory for spilled output logs, or None,
+        'channel': prompt channel, reported in trace spans,
+    }
+    """
+    async with semaphore or nullcontext():
+        return await _run(spec)
+
+
+async def _run(spec: dict) -> dict:
+    agent_name = spec['agent_name']
+    cmd = spec['cmd']
+    stdin_text = spec.get('stdin')
+    start = time.monotonic()
+    tail = OutputTail(log_path_for(agent_name, spec.get('log_dir')))
+    emit_line(f"[{agent_name}]", f"Executing: {cmd[0]} ...")
+    spawn_start = time.perf_counter()
+    try:
+        process = await asyncio.create_subprocess_exec(
+            *cmd,
+            cwd=spec['cwd'],
+            stdin=asyncio.subprocess.PIPE if stdin_text is not None else None,
+            stdout=asyncio.subprocess.PIPE,
+            stderr=asyncio.subprocess.PIPE,
+            limit=STREAM_LIMIT,
+        )
+    except FileNotFoundError:
+        emit_line(f"[{agent_name}]", f"CLI tool '{cmd[0]}' not found. Is it installed and in PATH?")
+        return batch_result(agent_name, "not-found", 127, time.monotonic() - start)
+    except Exception as e:
+        emit_line(f"[{agent_name}]", f"Failed: {e}")
+        return batch_result(agent_name, "error", 1, time.monotonic() - start)
+    tracing.record("cli_spawn", spawn_start, time.perf_counter(),
+                   agent=agent_name, cli=cmd[0], channel=spec.get('channel', "argv"))
+
+    work = [_pump(process.stdout, f"[{agent_name}]", tail),
+            _pump(process.stderr, f"[{agent_name}] (stderr)", tail)]
+    if stdin_text is not None:
+        work.append(_feed(process, stdin_text))
+    running = asyncio.gather(*work, process.wait())
+    # Cancelling the run leaves CancelledError on the gather; mark it as seen
+    running.add_done_callback(lambda future: future.cancelled() or future.exception())
+    timed_out = False
+    try:
+        await asyncio.wait_for(running, spec.get('timeout'))
+    except asyncio.TimeoutError:
+        timed_out = True
+        _kill(process)
+        await process.wait()
+    except asyncio.CancelledError:
+        _kill(process)
+        raise
+    finally:
+        tail.close()
+    elapsed = time.monotonic() - start
+    tracing.record("cli_output", spawn_start, time.perf_counter(), agent=agent_name)
+    if tail.first_output_at is not None:
+        tracing.record("time_to_first_output", spawn_start, tail.first_output_at, agent=agent_name)
+    return finish_run(agent_name, tail, process.returncode, elapsed, timed_out, spec.get('timeout'))
+
+
+async def _run_all(specs: list[dict], max_parallel: int, on_done) -> list[dict]:
+    semaphore = asyncio.Semaphore(max(1, max_parallel))
+
+    async def run_one(index, spec):
+        result = await run_process(spec, semaphore)
+        if on_done:
+            on_done(index, result)
+        return result
+
+    return await asyncio.gather(*(run_one(index, spec) for index, spec in enumerate(specs)))
+
+
+def run(main):
+    """Run coroutine `main` on a new event loop that watches child processes cheaply."""
+    _install_pidfd_watcher()
+    return asyncio.run(main)
+
+
+def run_processes(specs: list[dict], max_parallel: int = 4, on_done=None) -> list[dict]:
+    """
+    Run batch CLI processes from one event loop; returns result records in
+    `specs` order. `on_done(index, result)` is called as each process ends.
+    """
+    if not specs:
+        return []
+    return run(_run_all(specs, max_parallel, on_done))
@@ -0,0 +1,152 @@
+#!/usr/bin/env python3
+"""
+batch_output.py
+
+Line-streaming helpers for batch agent runs.
+
+Output of a CLI process is echoed line by line with an `[agent]` prefix while
+the process runs. Only a bounded tail of recent lines is kept in memory; once
+a run produces more than a size threshold, the full output is spilled to a
+per-run log file instead of being held in memory.
+"""
+
+import os
+import re
+import sys
+import tempfile
+import threading
+import time
+from collections import deque
+
+# Lines kept in memory for the end-of-run summary
+DEFAULT_TAIL_LINES = 200
+# Output size after which the run is written to a log file
+DEFAULT_SPILL_BYTES = 1024 * 1024
+DEFAULT_LOG_DIR = os.path.join(tempfile.gettempdir(), "capstone-agents", "logs")
+
+# Serializes writes from concurrently streaming agents so lines never interleave
+_print_lock = threading.Lock()
+
+
+def emit_line(prefix: str, line: str) -> None:
+    """Write a single prefixed output line to stdout."""
+    with _print_lock:
+        sys.stdout.write(f"{prefix} {line.rstrip(chr(10))}\n")
+        sys.stdout.flush()
+
+
+def log_path_for(agent_name: str, log_dir: str | None = None) -> str:
+    """Return a unique log file path for one agent run."""
+    safe_name = re.sub(r"[^A-Za-z0-9_.-]", "_", agent_name)
+    stamp = time.strftime("%Y%m%d-%H%M%S")
+    return os.path.join(log_dir or DEFAULT_LOG_DIR, f"{safe_name}-{stamp}-{os.getpid()}-{threading.get_ident()}.log")
+
+
+class OutputTail:
+    """Bounded in-memory tail of a process's output with spill-to-file.
+
+    Lines are buffered in memory until `spill_bytes` is exceeded. At that
+    point the buffered lines are flushed to `log_path` and every later line
+    is appended to the file. Only the last `max_lines` lines stay in memory.
+    """
+
+    def __init__(self, log_path: str, max_lines: int = DEFAULT_TAIL_LINES,
+                 spill_bytes: int = DEFAULT_SPILL_BYTES):
+        self.log_path = log_path
+        self.spill_bytes = spill_bytes
+        self.tail = deque(maxlen=max_lines)
+        self.total_bytes = 0
+        self.spilled = False
+        self.first_output_at = None
+        self._pending = []
+        self._log = None
+        self._lock = threading.Lock()
+
+    def append(self, line: str) -> None:
+        """Record one line of output."""
+        with self._lock:
+            if self.first_output_at is None:
+                self.first_output_at = time.perf_counter()
+            self.total_bytes += len(line.encode("utf-8", errors="replace"))
+            self.tail.append(line)
+            if self._log is not None:
+                self._log.write(line)
+                return
+            self._pending.append(line)
+            if self.total_bytes > self.spill_bytes:
+                self._spill()
+
+    def _spill(self) -> None:
+        os.makedirs(os.path.dirname(self.log_path), exist_ok=True)
+        self._log = open(self.log_path, "w", encoding="utf-8", errors="replace")
+        self._log.writelines(self._pending)
+        self._pending = []
+        self.spilled = True
+
+    def close(self) -> None:
+        """Close the spill file, if one was opened."""
+        with self._lock:
+            if self._log is not None:
+                self._log.close()
+
+    def lines(self) -> list[str]:
+        """Return the buffered tail lines."""
+        with self._lock:
+            return list(self.tail)
+
+
+def pump_stream(stream, prefix: str, tail: OutputTail) -> None:
+    """Echo and record every line of `stream` until EOF."""
+    for line in iter(stream.readline, ""):
+        if not line.endswith("\n"):
+            line += "\n"
+        tail.append(line)
+        emit_line(prefix, line)
+    stream.close()
+
+
+def stream_process(process, agent_name: str, tail: OutputTail) -> None:
+    """Stream stdout and stderr of a running process until both reach EOF.
+
+    stdout is read on the calling thread and stderr on a helper thread, so
+    neither pipe can fill up and stall the child.
+    """
+    readers = []
+    if process.stderr is not None:
+        reader = threading.Thread(
+            target=pump_stream,
+            args=(process.stderr, f"[{agent_name}] (stderr)", tail),
+            daemon=True,
+        )
+        reader.start()
+        readers.append(reader)
+    if process.stdout is not None:
+        pump_stream(process.stdout, f"[{agent_name}]", tail)
+    for reader in readers:
+        reader.join()
+
+
+def batch_result(agent_name: str, status: str, exit_code: int | None = None, elapsed: float = 0.0,
+                 output_bytes: int = 0) -> dict:
+    """Build the per-agent result record reported in the batch summary."""
+    return {
+        'agent': agent_name,
+        'status': status,
+        'exit_code': exit_code,
+        'elapsed': elapsed,
+        'output_bytes': output_bytes,
+    }
+
+
+def finish_run(agent_name: str, tail: OutputTail, returncode: int | None, elapsed: float,
+               timed_out: bool = False, timeout: float | None = None) -> dict:
+    """Report how a batch CLI process ended and return its result record."""
+    if tail.spilled:
+        emit_line(f"[{agent_name}]", f"Full output saved to: {tail.log_path}")
+    if timed_out:
+        emit_line(f"[{agent_name}]", f"Timed out after {timeout:g} seconds")
+        return batch_result(agent_name, "timeout", returncode, elapsed, tail.total_bytes)
+    if returncode != 0:
+        emit_line(f"[{agent_name}]", f"Exited with code: {returncode}")
+        return batch_result(agent_name, "failed", returncode, elapsed, tail.total_bytes)
+    return batch_result(agent_name, "ok", 0, elapsed, tail.total_bytes)
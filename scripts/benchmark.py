@@ -0,0 +1,350 @@
+#!/usr/bin/env python3
+"""
+benchmark.py
+
+Benchmarks context generation and launcher overhead on synthetic agent trees.
+
+For each tree size (number of roles) a synthetic agents/ folder is generated
+in a temporary directory, and the following are timed:
+
+    find_agent_files        agent discovery (first run builds agents/index.json)
+    generate_system_prompt  multi-agent system prompt rendering
+    generate_cursorrules    Cursor .cursorrules rendering
+    validate_workspace      agent validation (validation cache disabled)
+    migrate_agent           legacy -> unified migration of every role
+    python_startup          bare interpreter startup (reference for the line below)
+    run_agents_list         `run_agents.py --list` process startup (budget: 30ms over python_startup)
+
+Results are printed as a table and can be saved as JSON and compared with a
+previous run to spot regressions between commits.
+
+Usage:
+    python scripts/benchmark.py
+    python scripts/benchmark.py --sizes 10,100 --repeat 3 --output bench.json
+    python scripts/benchmark.py --compare bench-main.json
+"""
+
+import argparse
+import contextlib
+import importlib.util
+import io
+import json
+import os
+import platform
+import shutil
+import statistics
+import subprocess
+import sys
+import tempfile
+import time
+
+SCRIPT_DIR = os.path.dirname(os.path.abspath(__file__))
+CAPSTONE_AGENTS_DIR = os.path.dirname(SCRIPT_DIR)  # scripts/ -> root
+
+DEFAULT_SIZES = [10, 100, 1000, 10000]
+DEFAULT_REPEAT = 5
+
+# Relative change reported as a regression by --compare
+REGRESSION_THRESHOLD = 0.10
+
+# Median wall-time budgets enforced by --check-budget on trees of up to
+# BUDGET_MAX_ROLES roles: benchmark -> (reference benchmark, seconds over the
+# reference's median). Budgets are relative so a slow or noisy machine (a
+# shared CI runner) does not fail them through interpreter startup alone.
+BUDGETS = {
+    'run_agents_list': ('python_startup', 0.030),
+}
+BUDGET_MAX_ROLES = 100
+
+LEGACY_TEMPLATE = """# {title} - {mode_title} Agent
+
+## Role Description
+You are the **{mode_title} Agent** for the {title} role. Synthetic benchmark role number {index}.
+
+## Workflow
+1. **Analyze**: Read `{role}-plan.md` and the project requirements.
+2. **Design**: Propose a solution for the {title} area.
+3. **Deliver**: Produce the {mode} artifacts for this role.
+
+## MCP Tools
+- **filesystem** — Read and write files in the workspace
+- **git** — Inspect history and create commits
+- **search** — Search the codebase
+
+## Expected Inputs
+- Project requirements and `{role}-plan.json`
+
+## Expected Outputs
+- `{role}-plan.md` and `{role}-plan.json`
+
+## Constraints
+- Use relative paths from the workspace root.
+- Keep changes scoped to the {title} area.
+
+## Communication Protocol
+- Report progress to the Coordinator.
+"""
+
+
+def _import_path(name: str, path: str):
+    """Import a module from a file path (for hyphenated script names)."""
+    spec = importlib.util.spec_from_file_location(name, path)
+    module = importlib.util.module_from_spec(spec)
+    spec.loader.exec_module(module)
+    return module
+
+
+def legacy_content(role: str, index: int, mode: str) -> str:
+    """Return a synthetic legacy agent file for `role` ('planning' or 'implementation')."""
+    return LEGACY_TEMPLATE.format(
+        role=role,
+        title=role.replace('-', ' ').title(),
+        index=index,
+        mode=mode,
+        mode_title=mode.title(),
+    )
+
+
+def make_agents_tree(agents_dir: str, num_roles: int, unified: bool = True) -> None:
+    """
+    Write a synthetic agents tree with `num_roles` roles.
+
+    With `unified`, each role has a unified {role}.md plus legacy/ split files
+    (the current layout). Otherwise only top-level split files are written,
+    which is the input layout of migrate_to_unified.py.
+    """
+    from migrate_to_unified import generate_unified_agent
+
+    width = len(str(num_roles))
+    for index in range(num_roles):
+        role = f"role-{index:0{width}d}"
+        role_dir = os.path.join(agents_dir, role)
+        planning = legacy_content(role, index, "planning")
+        impl = legacy_content(role, index, "implementation")
+        split_dir = os.path.join(role_dir, "legacy") if unified else role_dir
+        os.makedirs(split_dir, exist_ok=True)
+        with open(os.path.join(split_dir, f"{role}-planning.md"), 'w', encoding='utf-8') as f:
+            f.write(planning)
+        with open(os.path.join(split_dir, f"{role}-implementation.md"), 'w', encoding='utf-8') as f:
+            f.write(impl)
+        if unified:
+            with open(os.path.join(role_dir, f"{role}.md"), 'w', encoding='utf-8') as f:
+                f.write(generate_unified_agent(role, planning, impl))
+
+
+def measure(func, repeat: int, setup=None) -> dict:
+    """
+    Call `func` `repeat` times and return timing statistics in seconds.
+    `setup` runs untimed before each call. The first call is also reported
+    on its own, as it includes cold-cache work such as building the registry.
+    """
+    timings = []
+    for _ in range(repeat):
+        if setup:
+            setup()
+        start = time.perf_counter()
+        func()
+        timings.append(time.perf_counter() - start)
+    return {
+        'first': timings[0],
+        'min': min(timings),
+        'median': statistics.median(timings),
+        'mean': statistics.fmean(timings),
+        'repeat': repeat,
+    }
+
+
+def run_process(args: list[str]) -> None:
+    subprocess.run(args, check=True, stdout=subprocess.DEVNULL, stderr=subprocess.DEVNULL)
+
+
+def benchmark_size(num_roles: int, repeat: int, work_dir: str) -> list[dict]:
+    """Run every benchmark against a synthetic tree of `num_roles` roles."""
+    from agent_library import find_agent_files
+    from generate_context import generate_system_prompt
+    from migrate_to_unified import migrate_agent
+
+    cursorrules = _import_path(
+        "generate_cursorrules", os.path.join(CAPSTONE_AGENTS_DIR, "Integration", "cursor-ide", "generate_cursorrules.py")
+    )
+    validator = _import_path("validate_agent", os.path.join(SCRIPT_DIR, "validate-agent.py"))
+
+    workspace = os.path.join(work_dir, f"tree-{num_roles}")
+    agents_dir = os.path.join(workspace, "agents")
+    make_agents_tree(agents_dir, num_roles)
+
+    index_file = os.path.join(agents_dir, "index.json")
+    if os.path.exists(index_file):
+        os.unlink(index_file)
+
+    results = {}
+    results['find_agent_files'] = measure(lambda: find_agent_files(agents_dir), repeat)
+    agents = find_agent_files(agents_dir)
+    results['generate_system_prompt'] = measure(lambda: generate_system_prompt(agents, workspace), repeat)
+
+    def render_cursorrules():
+        variants = cursorrules.discover_agents(agents_dir)
+        cursorrules.generate_cursorrules(variants, agents_dir)
+
+    results['generate_cursorrules'] = measure(render_cursorrules, repeat)
+    results['validate_workspace'] = measure(lambda: validator.validate_workspace(workspace, use_cache=False), repeat)
+
+    # Migration moves files, so every run starts from a fresh legacy tree
+    legacy_dir = os.path.join(work_dir, f"legacy-{num_roles}")
+
+    def reset_legacy_tree():
+        shutil.rmtree(legacy_dir, ignore_errors=True)
+        make_agents_tree(legacy_dir, num_roles, unified=False)
+
+    def migrate_all():
+        with contextlib.redirect_stdout(io.StringIO()):
+            for name in sorted(os.listdir(legacy_dir)):
+                migrate_agent(os.path.join(legacy_dir, name))
+
+    results['migrate_agent'] = measure(migrate_all, repeat, setup=reset_legacy_tree)
+    shutil.rmtree(legacy_dir, ignore_errors=True)
+
+    run_agents = os.path.join(SCRIPT_DIR, "run_agents.py")
+    results['python_startup'] = measure(lambda: run_process([sys.executable, "-c", "pass"]), repeat)
+    results['run_agents_list'] = measure(
+        lambda: run_process([sys.executable, run_agents, "--list", "--agents-dir", agents_dir]), repeat
+    )
+
+    shutil.rmtree(workspace, ignore_errors=True)
+    return [{'benchmark': name, 'roles': num_roles, **stats} for name, stats in results.items()]
+
+
+def git_commit() -> str | None:
+    """Return the current commit hash of the repository, if available."""
+    try:
+        return subprocess.run(
+            ["git", "rev-parse", "HEAD"], cwd=CAPSTONE_AGENTS_DIR,
+            capture_output=True, text=True, check=True
+        ).stdout.strip()
+    except (OSError, subprocess.CalledProcessError):
+        return None
+
+
+def print_results(results: list[dict], baseline: dict | None = None) -> int:
+    """Print a results table. Returns the number of regressions against `baseline`."""
+    previous = {}
+    if baseline:
+        previous = {(r['benchmark'], r['roles']): r for r in baseline.get('results', [])}
+
+    header = f"{'BENCHMARK':<24} {'ROLES':>6} {'FIRST':>10} {'MEDIAN':>10} {'MIN':>10}"
+    if previous:
+        header += f" {'BASELINE':>10} {'CHANGE':>8}"
+    print(header)
+    print("-" * len(header))
+
+    regressions = 0
+    for r in results:
+        line = (f"{r['benchmark']:<24} {r['roles']:>6} {r['first'] * 1000:>8.1f}ms "
+                f"{r['median'] * 1000:>8.1f}ms {r['min'] * 1000:>8.1f}ms")
+        old = previous.get((r['benchmark'], r['roles']))
+        if old and old['median'] > 0:
+            change = r['median'] / old['median'] - 1
+            marker = " !" if change > REGRESSION_THRESHOLD else ""
+            regressions += bool(marker)
+            line += f" {old['median'] * 1000:>8.1f}ms {change:>+7.0%}{marker}"
+        print(line)
+    return regressions
+
+
+def check_budgets(results: list[dict]) -> list[str]:
+    """Return a message for every result whose median exceeds its budget over its reference benchmark."""
+    medians = {(r['benchmark'], r['roles']): r['median'] for r in results}
+    failures = []
+    for r in results:
+        if r['benchmark'] not in BUDGETS or r['roles'] > BUDGET_MAX_ROLES:
+            continue
+        reference, allowance = BUDGETS[r['benchmark']]
+        budget = medians.get((reference, r['roles']), 0.0) + allowance
+        if r['median'] > budget:
+            failures.append(f"{r['benchmark']} ({r['roles']} roles): median {r['median'] * 1000:.1f}ms "
+                            f"exceeds budget of {budget * 1000:.0f}ms ({reference} + {allowance * 1000:.0f}ms)")
+    return failures
+
+
+def main():
+    parser = argparse.ArgumentParser(
+        description="Benchmark Capstone Agents context generation on synthetic agent trees",
+        formatter_class=argparse.RawDescriptionHelpFormatter,
+        epilog="""
+Examples:
+  # Full suite (10, 100, 1,000 and 10,000 roles)
+  python scripts/benchmark.py --output bench.json
+
+  # Quick run on small trees
+  python scripts/benchmark.py --sizes 10,100 --repeat 3
+
+  # Compare against results saved on another commit
+  python scripts/benchmark.py --sizes 10,100 --compare bench-main.json
+
+  # Fail if `run_agents.py --list` startup exceeds its budget
+  python scripts/benchmark.py --sizes 10,100 --check-budget
+        """
+    )
+    parser.add_argument("--sizes", default=",".join(str(size) for size in DEFAULT_SIZES),
+                        help="Comma-separated tree sizes in roles (default: %(default)s)")
+    parser.add_argument("--repeat", type=int, default=DEFAULT_REPEAT,
+                        help="Timed runs per benchmark (default: %(default)s)")
+    parser.add_argument("-o", "--output",
+                        help="Write results as JSON to this file")
+    parser.add_argument("--compare",
+                        help="Previous JSON results to compare medians against")
+    parser.add_argument("--check-budget", action="store_true",
+                        help="Exit with status 1 if a benchmark exceeds its time budget "
+                             f"(e.g. run_agents_list: {BUDGETS['run_agents_list'][1] * 1000:.0f}ms over "
+                             f"{BUDGETS['run_agents_list'][0]})")
+
+    args = parser.parse_args()
+    sizes = [int(size) for size in args.sizes.split(',')]
+
+    baseline = None
+    if args.compare:
+        try:
+            with open(args.compare, 'r', encoding='utf-8') as f:
+                baseline = json.load(f)
+        except (OSError, ValueError) as e:
+            print(f"Error: Could not read baseline {args.compare}: {e}", file=sys.stderr)
+            sys.exit(1)
+
+    with tempfile.TemporaryDirectory(prefix="capstone-bench-") as work_dir:
+        # Keep the caches of the benchmarked scripts out of the user's cache
+        os.environ["CAPSTONE_AGENTS_CACHE_DIR"] = os.path.join(work_dir, "cache")
+
+        results = []
+        for size in sizes:
+            print(f"Benchmarking {size} role(s)...", file=sys.stderr)
+            results.extend(benchmark_size(size, args.repeat, work_dir))
+
+    regressions = print_results(results, baseline)
+    if baseline:
+        print(f"\n{regressions} benchmark(s) more than {REGRESSION_THRESHOLD:.0%} slower than {args.compare}")
+
+    if args.output:
+        report = {
+            'commit': git_commit(),
+            'timestamp': time.strftime("%Y-%m-%dT%H:%M:%S%z"),
+            'python': platform.python_version(),
+            'platform': platform.platform(),
+            'sizes': sizes,
+            'repeat': args.repeat,
+            'results': results,
+        }
+        with open(args.output, 'w', encoding='utf-8') as f:
+            json.dump(report, f, indent=2)
+        print(f"\nResults written to {args.output}")
+
+    if args.check_budget:
+        failures = check_budgets(results)
+        for failure in failures:
+            print(f"Budget exceeded: {failure}", file=sys.stderr)
+        if failures:
+            sys.exit(1)
+        print("All benchmarks within budget.")
+
+
+if __name__ == "__main__":
+    main()
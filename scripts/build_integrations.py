@@ -0,0 +1,194 @@
+#!/usr/bin/env python3
+"""
+build_integrations.py
+
+Builds every integration context artifact (Antigravity, QwenCLI, VS Code
+Copilot, Cursor IDE, ...) from a single scan of the agents tree. The agent
+files are discovered and read at most once, and all renderers run in
+parallel on the shared library. Artifacts whose inputs are unchanged since the last
+build are reused instead of being rewritten (see build_manifest.py).
+
+Usage:
+    python scripts/build_integrations.py build-all --workspace /path/to/project
+    python scripts/build_integrations.py build-all -w . --only antigravity,cursorrules
+    python scripts/build_integrations.py build-all -w . --watch
+    python scripts/build_integrations.py list
+"""
+
+import argparse
+import os
+import sys
+import time
+from concurrent.futures import ThreadPoolExecutor
+
+import build_manifest
+from agent_library import DEFAULT_AGENTS_DIR, discover_agents
+from agent_watch import DEFAULT_INTERVAL, watch_and_rebuild
+from agent_renderers import RENDERERS, render
+from context_layout import LAYOUTS
+
+# Renderers emitted by build-all unless --only is given
+DEFAULT_ARTIFACTS = ["antigravity", "qwen", "vscode", "cursorrules"]
+
+
+def build_artifact(name: str, library: dict, workspace: str, output_dir: str,
+                   roles: list[str] | None = None, dry_run: bool = False,
+                   manifest: dict | None = None, force: bool = False, mode: str | None = None,
+                   layout: str = "default") -> dict:
+    """Render one artifact and write it to `output_dir` if its inputs changed."""
+    start = time.perf_counter()
+    output_path = os.path.join(output_dir, RENDERERS[name]['output'])
+    if dry_run:
+        status = "rendered"
+        render(name, library, workspace, roles=roles, mode=mode, layout=layout)
+    else:
+        key = build_manifest.inputs_key(library, name, roles, workspace=workspace, mode=mode, layout=layout)
+        status = build_manifest.write_artifact(
+            output_path, key, lambda: render(name, library, workspace, roles=roles, mode=mode, layout=layout),
+            manifest if manifest is not None else {}, force
+        )
+    return {
+        'name': name,
+        'output': output_path,
+        'status': status,
+        'elapsed': time.perf_counter() - start,
+    }
+
+
+def build_all(workspace: str, agents_dir: str, names: list[str], output_dir: str | None = None,
+              roles: list[str] | None = None, dry_run: bool = False, max_workers: int | None = None,
+              force: bool = False, mode: str | None = None, layout: str = "default") -> list[dict]:
+    """
+    Discover the agents tree once and build the requested artifacts in parallel.
+    Agent files are read lazily, at most once, and only if some artifact is rebuilt.
+    """
+    library = discover_agents(agents_dir)
+    return build_artifacts(library, workspace, names, output_dir, roles, dry_run, max_workers, force, mode, layout)
+
+
+def build_artifacts(library: dict, workspace: str, names: list[str], output_dir: str | None = None,
+                    roles: list[str] | None = None, dry_run: bool = False, max_workers: int | None = None,
+                    force: bool = False, mode: str | None = None, layout: str = "default") -> list[dict]:
+    """Build the requested artifacts in parallel from an existing library."""
+    output_dir = output_dir or workspace
+    manifest = build_manifest.load_manifest()
+    if not dry_run:
+        os.makedirs(output_dir, exist_ok=True)
+    with ThreadPoolExecutor(max_workers=max_workers or len(names) or 1) as executor:
+        futures = [
+            executor.submit(build_artifact, name, library, workspace, output_dir, roles, dry_run, manifest, force, mode,
+                            layout)
+            for name in names
+        ]
+        results = [future.result() for future in futures]
+    if not dry_run:
+        build_manifest.save_manifest(manifest)
+    return results
+
+
+def summarize(results: list[dict]) -> str:
+    """Return a 'N rebuilt, M reused' summary of build results."""
+    rebuilt = [result['name'] for result in results if result['status'] == build_manifest.REBUILT]
+    reused = sum(1 for result in results if result['status'] == build_manifest.REUSED)
+    summary = f"{len(rebuilt)} rebuilt, {reused} reused"
+    if rebuilt and len(rebuilt) < len(results):
+        summary += f" ({', '.join(rebuilt)})"
+    return summary
+
+
+def main():
+    parser = argparse.ArgumentParser(
+        description="Build all Capstone Agents integration artifacts from one parse of the agents tree",
+        formatter_class=argparse.RawDescriptionHelpFormatter,
+        epilog="""
+Examples:
+  # Build every integration artifact into the workspace
+  python scripts/build_integrations.py build-all -w /path/to/your/project
+
+  # Planning-only contexts (unified agents cut to PLANNING MODE)
+  python scripts/build_integrations.py build-all -w . --mode planning
+
+  # Workspace values last, so every workspace shares one cacheable prefix
+  python scripts/build_integrations.py build-all -w . --layout stable
+
+  # Only some artifacts, written to a separate directory
+  python scripts/build_integrations.py build-all -w . --only antigravity,vscode --output-dir build/
+
+  # Rebuild affected artifacts whenever an agent file changes
+  python scripts/build_integrations.py build-all -w . --watch
+
+  # Show available renderers
+  python scripts/build_integrations.py list
+        """
+    )
+    subparsers = parser.add_subparsers(dest="command", required=True)
+
+    build = subparsers.add_parser("build-all", help="Build integration artifacts")
+    build.add_argument("-w", "--workspace", default=".",
+                       help="Path to the target workspace (default: current directory)")
+    build.add_argument("--agents-dir",
+                       help="Custom path to agents directory")
+    build.add_argument("--roles",
+                       help="Comma-separated list of roles to include")
+    build.add_argument("--mode", choices=["planning", "implementation"],
+                       help="Only include this mode of unified agents (default: both modes)")
+    build.add_argument("--layout", choices=LAYOUTS, default="default",
+                       help="'stable' puts the workspace in a trailing session block so the context prefix "
+                            "is the same for every workspace (default: %(default)s)")
+    build.add_argument("--only",
+                       help=f"Comma-separated renderers to build (default: {','.join(DEFAULT_ARTIFACTS)})")
+    build.add_argument("--output-dir",
+                       help="Directory for the generated files (default: the workspace)")
+    build.add_argument("--dry-run", action="store_true",
+                       help="Render everything but do not write files")
+    build.add_argument("--force", action="store_true",
+                       help="Rebuild every artifact even if its inputs are unchanged")
+    build.add_argument("--watch", action="store_true",
+                       help="Keep running and rebuild affected artifacts when agent files change")
+    build.add_argument("--watch-interval", type=float, default=DEFAULT_INTERVAL,
+                       help="Seconds between polls of the agents tree in watch mode (default: %(default)s)")
+
+    subparsers.add_parser("list", help="List available renderers")
+
+    args = parser.parse_args()
+
+    if args.command == "list":
+        for name, renderer in sorted(RENDERERS.items()):
+            print(f"  - {name:<14} {renderer['output']:<26} {renderer['description']}")
+        return
+
+    workspace = os.path.abspath(args.workspace)
+    agents_dir = os.path.abspath(args.agents_dir) if args.agents_dir else DEFAULT_AGENTS_DIR
+    output_dir = os.path.abspath(args.output_dir) if args.output_dir else workspace
+    roles = [r.strip() for r in args.roles.split(',')] if args.roles else None
+    names = [n.strip() for n in args.only.split(',')] if args.only else DEFAULT_ARTIFACTS
+
+    unknown = [name for name in names if name not in RENDERERS]
+    if unknown:
+        print(f"Error: Unknown renderer(s): {', '.join(unknown)}", file=sys.stderr)
+        print(f"Available: {', '.join(sorted(RENDERERS))}", file=sys.stderr)
+        sys.exit(1)
+
+    print(f"Workspace: {workspace}")
+    print(f"Agents directory: {agents_dir}")
+    print("-" * 60)
+
+    start = time.perf_counter()
+    library = discover_agents(agents_dir)
+    results = build_artifacts(library, workspace, names, output_dir, roles, args.dry_run, force=args.force,
+                              mode=args.mode, layout=args.layout)
+    for result in results:
+        print(f"  {result['status']:<8} {result['name']:<14} -> {result['output']}")
+    print("-" * 60)
+    print(f"{summarize(results)} in {time.perf_counter() - start:.3f}s")
+
+    if args.watch:
+        def rebuild(refreshed):
+            return summarize(build_artifacts(refreshed, workspace, names, output_dir, roles, args.dry_run,
+                                             mode=args.mode, layout=args.layout))
+
+        watch_and_rebuild(library, rebuild, roles, interval=args.watch_interval)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,121 @@
+#!/usr/bin/env python3
+"""
+build_manifest.py
+
+Incremental, skip-if-unchanged writes for generated context artifacts.
+
+A build manifest records, per output file, the hash of everything the
+artifact was rendered from (agent file hashes, renderer name and render
+parameters) together with the size and mtime of the file that was written.
+When an artifact's inputs are unchanged and the file on disk is still the
+one we wrote, rendering and writing are skipped entirely. Otherwise the new
+content is written atomically (temp file + rename), and only if it differs
+from what is already on disk, so IDE file watchers are not triggered
+needlessly.
+"""
+
+import hashlib
+import json
+import os
+import sys
+import threading
+
+from context_cache import CACHE_ROOT, atomic_write
+
+MANIFEST_FILE = os.path.join(CACHE_ROOT, "build-manifest.json")
+
+# Artifact outcomes reported to the user
+REBUILT = "rebuilt"
+REUSED = "reused"
+
+_lock = threading.Lock()
+
+
+def load_manifest(path: str = MANIFEST_FILE) -> dict:
+    """Load the build manifest ({output_path: record})."""
+    try:
+        with open(path, 'r', encoding='utf-8') as f:
+            return json.load(f)
+    except (OSError, ValueError):
+        return {}
+
+
+def save_manifest(manifest: dict, path: str = MANIFEST_FILE) -> None:
+    """Persist the build manifest, merging with entries written by other runs."""
+    with _lock:
+        merged = load_manifest(path)
+        merged.update(manifest)
+        try:
+            atomic_write(path, json.dumps(merged, indent=2, sort_keys=True))
+        except OSError as e:
+            print(f"Warning: Could not write build manifest: {e}", file=sys.stderr)
+
+
+def inputs_key(library: dict, renderer: str, roles: list[str] | None = None, **params) -> str:
+    """Hash the inputs of one artifact: agent file hashes, renderer and parameters."""
+    files = []
+    for role_name, role in library['roles'].items():
+        if roles and role_name not in roles:
+            continue
+        for filepath in role['files']:
+            rel_path = os.path.relpath(filepath, library['agents_dir']).replace(os.sep, '/')
+            files.append([rel_path, library['hashes'].get(filepath)])
+    payload = json.dumps({
+        'renderer': renderer,
+        'roles': sorted(roles) if roles else None,
+        'params': params,
+        'files': files,
+    }, sort_keys=True, default=str)
+    return hashlib.sha256(payload.encode('utf-8')).hexdigest()
+
+
+def _on_disk_matches(record: dict, output_path: str) -> bool:
+    try:
+        st = os.stat(output_path)
+    except OSError:
+        return False
+    return st.st_size == record.get('size') and st.st_mtime_ns == record.get('mtime_ns')
+
+
+def write_artifact(output_path: str, key: str, render, manifest: dict, force: bool = False) -> str:
+    """
+    Render and write one artifact unless its inputs are unchanged.
+
+    Args:
+        output_path: Absolute path of the artifact
+        key: inputs_key() of the artifact
+        render: Zero-argument callable returning the artifact content
+        manifest: Manifest dict from load_manifest(); updated in place
+        force: Always render, even if the inputs are unchanged
+
+    Returns:
+        str: REBUILT if the file was (re)written, REUSED otherwise
+    """
+    with _lock:
+        record = manifest.get(output_path)
+    if not force and record and record.get('inputs') == key and _on_disk_matches(record, output_path):
+        return REUSED
+
+    content = render()
+    encoded = content.encode('utf-8')
+    digest = hashlib.sha256(encoded).hexdigest()
+
+    outcome = REBUILT
+    try:
+        with open(output_path, 'rb') as f:
+            if hashlib.sha256(f.read()).hexdigest() == digest:
+                outcome = REUSED
+    except OSError:
+        pass
+    if outcome == REBUILT:
+        atomic_write(output_path, content)
+
+    st = os.stat(output_path)
+    with _lock:
+        manifest[output_path] = {
+            'inputs': key,
+            'sha256': digest,
+            'size': st.st_size,
+            'mtime_ns': st.st_mtime_ns,
+        }
+    return outcome
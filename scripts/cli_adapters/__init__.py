@@ -0,0 +1,132 @@
+"""
+cli_adapters
+
+Registry of CLI adapters used by run_agents.py.
+
+Each adapter is a module that declares its capabilities as module-level
+constants and builds the commands for its CLI:
+
+    NAME                  CLI name used with `run_agents.py -c NAME`
+    DESCRIPTION           One-line description
+    PROMPT_DELIVERY       How an interactive session gets the agent
+                          context: "cli" (passed to the CLI process),
+                          "clipboard" or "none"
+    PROMPT_CHANNELS       Channels the CLI process accepts a prompt on:
+                          "argv", "stdin" (batch only) and/or "file"; the
+                          runner picks one by prompt size (prompt_delivery)
+    PROMPT_TOKEN_BUDGET   Token budget for agent instructions in a batch
+                          prompt; larger definitions are compacted by
+                          section (prompt_compaction). None: unlimited
+    SUPPORTS_BATCH        Can run one-shot batch jobs
+    SUPPORTS_INTERACTIVE  Can start an interactive session
+    NEEDS_PTY             The interactive session needs a terminal
+    DESTRUCTIVE           Batch runs may modify the workspace, so they
+                          require --auto-approve
+
+    interactive_command(session) -> list[str] | None
+    batch_prompt(job) -> str
+    batch_command(job, prompt_arg) -> list[str] | None
+
+`session['prompt_arg']` and `prompt_arg` hold the command-line text that
+delivers the prompt: the prompt itself, a pointer to a prompt file, or
+None when the prompt is piped on stdin.
+
+`job['layout']` (and `session['layout']`) is "default" or "stable"; in the
+stable layout batch_prompt() should put the workspace and other per-run
+values after the agent instructions (context_layout.with_session), so the
+prompt prefix is the same in every workspace.
+
+Built-in adapters are imported only when used, so launching an agent costs
+just the adapter it runs with. Adapters of other CLIs can be installed as
+separate packages that expose a module (or object with the same attributes)
+under the `capstone_agents.cli_adapters` entry point group.
+"""
+
+import importlib
+import sys
+
+ENTRY_POINT_GROUP = "capstone_agents.cli_adapters"
+
+# CLI name -> module in this package
+BUILTIN_ADAPTERS = {
+    "gemini": "gemini",
+    "cursor": "cursor",
+    "cursor-ide": "cursor_ide",
+    "codex": "codex",
+    "claude": "claude",
+    "copilot-cli": "copilot_cli",
+    "vscode": "vscode",
+    "rovodev": "rovodev",
+    "antigravity": "antigravity",
+    "qwen": "qwen",
+    "test": "dryrun",
+}
+
+# Capabilities assumed when an adapter does not declare them
+DEFAULT_CAPABILITIES = {
+    'DESCRIPTION': "",
+    'PROMPT_DELIVERY': "cli",
+    'PROMPT_CHANNELS': ("argv",),
+    'PROMPT_TOKEN_BUDGET': None,
+    'SUPPORTS_BATCH': False,
+    'SUPPORTS_INTERACTIVE': True,
+    'NEEDS_PTY': False,
+    'DESTRUCTIVE': False,
+}
+
+_loaded = {}
+
+
+def _entry_points() -> dict:
+    """Return {name: entry point} of adapters installed by other packages."""
+    try:
+        from importlib.metadata import entry_points
+    except ImportError:
+        return {}
+    try:
+        return {ep.name: ep for ep in entry_points(group=ENTRY_POINT_GROUP)}
+    except Exception as e:
+        print(f"Warning: Could not read CLI adapter entry points: {e}", file=sys.stderr)
+        return {}
+
+
+def _with_defaults(adapter):
+    for attr, value in DEFAULT_CAPABILITIES.items():
+        if not hasattr(adapter, attr):
+            setattr(adapter, attr, value)
+    return adapter
+
+
+def get_adapter(name: str):
+    """
+    Return the adapter for CLI `name`, importing it on first use.
+    Returns None if no built-in or installed adapter has that name.
+    """
+    if name in _loaded:
+        return _loaded[name]
+    if name in BUILTIN_ADAPTERS:
+        adapter = importlib.import_module(f"{__name__}.{BUILTIN_ADAPTERS[name]}")
+    else:
+        entry_point = _entry_points().get(name)
+        if entry_point is None:
+            return None
+        try:
+            adapter = entry_point.load()
+        except Exception as e:
+            print(f"Warning: Could not load CLI adapter '{name}': {e}", file=sys.stderr)
+            return None
+    _loaded[name] = _with_defaults(adapter)
+    return _loaded[name]
+
+
+def available_adapters(include_installed: bool = True) -> list[str]:
+    """Return the names of all built-in (and installed) adapters."""
+    names = list(BUILTIN_ADAPTERS)
+    if include_installed:
+        names.extend(name for name in _entry_points() if name not in BUILTIN_ADAPTERS)
+    return names
+
+
+def capabilities(adapter) -> dict:
+    """Return the declared capabilities of an adapter as a dict."""
+    return {attr.lower(): getattr(adapter, attr) for attr in DEFAULT_CAPABILITIES}
@@ -0,0 +1,28 @@
+"""Antigravity IDE adapter: prepares the prompt for pasting."""
+
+from cli_adapters.common import copy_to_clipboard
+
+NAME = "antigravity"
+DESCRIPTION = "Antigravity IDE"
+PROMPT_DELIVERY = "clipboard"
+PROMPT_CHANNELS = ()
+SUPPORTS_BATCH = False
+SUPPORTS_INTERACTIVE = True
+NEEDS_PTY = False
+
+
+def interactive_command(session):
+    agent_name = session['agent_name']
+    clipboard_success = copy_to_clipboard(session['context'])
+
+    print(f"[{agent_name}] === Antigravity IDE Instructions ===")
+    if clipboard_success:
+        print(f"[{agent_name}] Agent instructions copied to clipboard!")
+        print(f"[{agent_name}] >>> Paste with Ctrl+V into your Antigravity session.")
+    else:
+        print(f"[{agent_name}] Could not copy to clipboard.")
+        print(f"[{agent_name}] Manually copy instructions from: {session['agent_file']}")
+    print("-" * 60)
+    if not session['is_multi']:
+        print("Tip: Use --context-mode multi for full @-mention support")
+    return None
@@ -0,0 +1,13 @@
+"""Claude CLI adapter."""
+
+NAME = "claude"
+DESCRIPTION = "Claude CLI"
+PROMPT_DELIVERY = "cli"
+PROMPT_CHANNELS = ("argv", "file")
+SUPPORTS_BATCH = False
+SUPPORTS_INTERACTIVE = True
+NEEDS_PTY = True
+
+
+def interactive_command(session):
+    return ["claude", session['prompt_arg']]
@@ -0,0 +1,25 @@
+"""OpenAI Codex CLI adapter."""
+
+NAME = "codex"
+DESCRIPTION = "OpenAI Codex CLI"
+PROMPT_DELIVERY = "cli"
+PROMPT_CHANNELS = ("argv", "file")
+SUPPORTS_BATCH = True
+SUPPORTS_INTERACTIVE = True
+NEEDS_PTY = True
+DESTRUCTIVE = True
+
+
+def interactive_command(session):
+    return ["codex", session['prompt_arg']]
+
+
+def batch_prompt(job):
+    return f"Follow these agent instructions:\n\n{job['agent_content']}"
+
+
+def batch_command(job, prompt_arg):
+    # Only enable full-auto approval when explicitly approved
+    if job['auto_approve']:
+        return ["codex", "--approval-mode", "full-auto", prompt_arg]
+    return ["codex", prompt_arg]
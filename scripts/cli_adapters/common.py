@@ -0,0 +1,85 @@
+"""
+Helpers shared by the CLI adapters: prompt building, clipboard access and
+handing the terminal over to a CLI.
+"""
+
+import os
+import sys
+
+import tracing
+from context_layout import with_session
+
+
+def agent_prompt(agent_content: str, agent_name: str, workspace: str, layout: str = "default") -> str:
+    """Return the prompt that loads a single agent's instructions."""
+    if layout == "stable":
+        return with_session(f"""You are now acting as the following agent. Read and internalize these instructions:
+
+{agent_content}
+
+---
+You are now the {agent_name} agent. Begin your workflow.""", {'Working directory': workspace})
+    return f"""You are now acting as the following agent. Read and internalize these instructions:
+
+{agent_content}
+
+---
+You are now the {agent_name} agent. Working directory: {workspace}
+Begin your workflow."""
+
+
+@tracing.traced
+def copy_to_clipboard(text):
+    """Copy text to system clipboard."""
+    import platform
+    import subprocess
+    system = platform.system()
+
+    # Detect WSL (Windows Subsystem for Linux)
+    is_wsl = False
+    if system == "Linux":
+        try:
+            with open("/proc/version", "r") as f:
+                is_wsl = "microsoft" in f.read().lower()
+        except Exception:
+            pass
+
+    try:
+        if system == "Darwin":  # macOS
+            subprocess.run(["pbcopy"], input=text.encode(), check=True)
+        elif system == "Linux" and is_wsl:
+            # WSL: use Windows clip.exe
+            subprocess.run(["clip.exe"], input=text.encode(), check=True)
+        elif system == "Linux":
+            # Native Linux: try xclip first, then xsel
+            try:
+                subprocess.run(["xclip", "-selection", "clipboard"], input=text.encode(), check=True)
+            except FileNotFoundError:
+                subprocess.run(["xsel", "--clipboard", "--input"], input=text.encode(), check=True)
+        elif system == "Windows":
+            subprocess.run(["clip"], input=text.encode(), check=True, shell=True)
+        return True
+    except Exception:
+        return False
+
+
+def exec_in_workspace(argv: list[str], workspace: str, agent_name: str, install_hint: str, label: str) -> None:
+    """
+    Replace the current process with `argv` running in `workspace`.
+    Only returns (after printing why) if the CLI could not be started.
+    """
+    os.chdir(workspace)
+    tracing.flush()
+    try:
+        os.execvp(argv[0], argv)
+    except FileNotFoundError:
+        print(f"[{agent_name}] {argv[0]} not found. Is it installed and in PATH?")
+        print(f"[{agent_name}] Install with: {install_hint}")
+    except Exception as e:
+        print(f"[{agent_name}] Failed to start {label}: {e}")
+
+
+def windows_notice(agent_name: str) -> None:
+    """Warn that native Windows support of a CLI is experimental."""
+    if sys.platform == "win32":
+        print(f"[{agent_name}] Note: Windows PowerShell support is experimental. WSL recommended.")
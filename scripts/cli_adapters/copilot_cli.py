@@ -0,0 +1,70 @@
+"""GitHub Copilot CLI adapter."""
+
+import sys
+
+import tracing
+from cli_adapters.common import windows_notice
+from context_layout import with_session
+
+NAME = "copilot-cli"
+DESCRIPTION = "GitHub Copilot CLI"
+PROMPT_DELIVERY = "cli"
+PROMPT_CHANNELS = ("argv", "file")
+# Token budget for agent instructions in batch prompts
+PROMPT_TOKEN_BUDGET = 750
+SUPPORTS_BATCH = True
+SUPPORTS_INTERACTIVE = True
+NEEDS_PTY = True
+DESTRUCTIVE = True
+
+
+def interactive_command(session):
+    import subprocess
+
+    agent_name = session['agent_name']
+    print(f"[{agent_name}] Starting GitHub Copilot CLI session...")
+    windows_notice(agent_name)
+
+    # Step 1: Initialize agent context with one-shot prompt
+    print(f"[{agent_name}] Initializing agent context...")
+    try:
+        # Append safety instruction to prevent auto-execution
+        safety_notice = "\n\nIMPORTANT: Do NOT execute any pending tasks immediately. Simply reply 'IAmReady' to acknowledge you have received these instructions. Wait for the user to issue a specific command."
+
+        with tracing.span("cli_init", cli="copilot"):
+            subprocess.run(
+                ["copilot", "-p", session['prompt_arg'] + safety_notice],
+                cwd=session['workspace'],
+                stdin=sys.stdin,
+                stdout=sys.stdout,
+                stderr=sys.stderr,
+                check=True
+            )
+    except subprocess.CalledProcessError as e:
+        print(f"[{agent_name}] Initialization failed with exit code {e.returncode}")
+        return None
+    except Exception as e:
+        print(f"[{agent_name}] Failed to initialize: {e}")
+        return None
+
+    # Step 2: Continue with interactive session
+    print("-" * 60)
+    print(f"[{agent_name}] Continuing interactive session (Ctrl+C to exit)...")
+    print("-" * 60)
+    return ["copilot", "--continue"]
+
+
+def batch_prompt(job):
+    if job.get('layout') == "stable":
+        # Workspace last, so the prompt prefix is the same in every workspace
+        return with_session(f"You are an AI agent.\n\nFollow these instructions:\n{job['agent_content']}",
+                            {'Workspace': job['workspace']})
+    return f"You are an AI agent working in: {job['workspace']}\n\nFollow these instructions:\n{job['agent_content']}"
+
+
+def batch_command(job, prompt_arg):
+    # Programmatic mode. Only grant tool permissions when explicitly approved.
+    cmd = ["copilot", "-p", prompt_arg]
+    if job['auto_approve']:
+        cmd.extend(["--allow-tool", "write", "--allow-tool", "shell(git)"])
+    return cmd
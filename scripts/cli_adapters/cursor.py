@@ -0,0 +1,30 @@
+"""Cursor Agent CLI adapter (cursor-agent command)."""
+
+from cli_adapters.common import copy_to_clipboard, exec_in_workspace
+
+NAME = "cursor"
+DESCRIPTION = "Cursor Agent CLI"
+PROMPT_DELIVERY = "clipboard"
+PROMPT_CHANNELS = ()
+SUPPORTS_BATCH = False
+SUPPORTS_INTERACTIVE = True
+NEEDS_PTY = True
+
+
+def interactive_command(session):
+    # We copy agent instructions to clipboard for easy pasting
+    agent_name = session['agent_name']
+    clipboard_success = copy_to_clipboard(session['context'])
+
+    print(f"[{agent_name}] Starting cursor-agent...")
+    if clipboard_success:
+        print(f"[{agent_name}] Agent instructions copied to clipboard!")
+        print(f"[{agent_name}] >>> Paste with Ctrl+V (or Cmd+V) in the chat")
+    else:
+        print(f"[{agent_name}] Could not copy to clipboard. Manual load:")
+    print(f"[{agent_name}]     @{session['agent_file']} follow these instructions")
+    print("-" * 60)
+
+    exec_in_workspace(["cursor-agent"], session['workspace'], agent_name,
+                      install_hint="npm install -g cursor-agent", label="cursor-agent")
+    return None
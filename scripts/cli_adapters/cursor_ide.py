@@ -0,0 +1,21 @@
+"""Cursor IDE adapter: opens the workspace (not a CLI)."""
+
+from cli_adapters.common import copy_to_clipboard
+
+NAME = "cursor-ide"
+DESCRIPTION = "Cursor IDE (opens the workspace)"
+PROMPT_DELIVERY = "clipboard"
+PROMPT_CHANNELS = ()
+SUPPORTS_BATCH = False
+SUPPORTS_INTERACTIVE = True
+NEEDS_PTY = False
+
+
+def interactive_command(session):
+    # Copy context to clipboard for pasting
+    agent_name = session['agent_name']
+    if copy_to_clipboard(session['context']):
+        print(f"[{agent_name}] Agent instructions copied to clipboard!")
+    print(f"[{agent_name}] Cursor IDE will open. Use Ctrl+I to open Composer.")
+    print(f"[{agent_name}] Paste the agent instructions (already in clipboard).")
+    return ["cursor", session['workspace']]
@@ -0,0 +1,22 @@
+"""Test adapter: shows what a batch run would do without starting a CLI."""
+
+NAME = "test"
+DESCRIPTION = "Test mode: print what would run"
+PROMPT_DELIVERY = "none"
+PROMPT_CHANNELS = ()
+SUPPORTS_BATCH = True
+SUPPORTS_INTERACTIVE = False
+
+
+def batch_prompt(job):
+    return job['agent_content']
+
+
+def batch_command(job, prompt_arg):
+    agent_name = job['agent_name']
+    agent_content = job['agent_content']
+    print(f"[{agent_name}] TEST MODE - Would run agent from: {job['agent_file']}")
+    print(f"[{agent_name}] Workspace: {job['workspace']}")
+    print(f"[{agent_name}] Preview: {agent_content[:300] if agent_content else 'N/A'}...")
+    # No process to run
+    return None
@@ -0,0 +1,36 @@
+"""Gemini CLI adapter."""
+
+from context_layout import with_session
+
+NAME = "gemini"
+DESCRIPTION = "Google Gemini CLI"
+PROMPT_DELIVERY = "cli"
+PROMPT_CHANNELS = ("argv", "stdin", "file")
+# Token budget for agent instructions in batch prompts
+PROMPT_TOKEN_BUDGET = 500
+SUPPORTS_BATCH = True
+SUPPORTS_INTERACTIVE = True
+NEEDS_PTY = True
+DESTRUCTIVE = True
+
+
+def interactive_command(session):
+    # Interactive mode with agent context
+    return ["gemini", "-i", session['prompt_arg']]
+
+
+def batch_prompt(job):
+    if job.get('layout') == "stable":
+        # Workspace last, so the prompt prefix is the same in every workspace
+        return with_session(f"You are an AI agent.\n\nAgent instructions:\n{job['agent_content']}",
+                            {'Workspace': job['workspace']})
+    return f"You are an AI agent. Work in workspace: {job['workspace']}\n\nAgent instructions:\n{job['agent_content']}"
+
+
+def batch_command(job, prompt_arg):
+    # One-shot mode. Only use aggressive/auto flags when explicitly approved.
+    # Without a prompt argument, gemini reads the prompt from stdin.
+    cmd = ["gemini", "--yolo"] if job['auto_approve'] else ["gemini"]
+    if prompt_arg is not None:
+        cmd.append(prompt_arg)
+    return cmd
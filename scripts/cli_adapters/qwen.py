@@ -0,0 +1,25 @@
+"""Qwen CLI adapter."""
+
+NAME = "qwen"
+DESCRIPTION = "Qwen CLI"
+PROMPT_DELIVERY = "cli"
+PROMPT_CHANNELS = ("argv", "stdin", "file")
+SUPPORTS_BATCH = True
+SUPPORTS_INTERACTIVE = True
+NEEDS_PTY = True
+
+
+def interactive_command(session):
+    print(f"[{session['agent_name']}] Starting Qwen CLI session...")
+    # -i/--prompt-interactive: execute the provided prompt and continue in interactive mode
+    return ["qwen", "-i", session['prompt_arg']]
+
+
+def batch_prompt(job):
+    # Agent content combined with the batch instruction
+    return f"{job['agent_content']}\n\nBegin your workflow suitable for a batch execution context."
+
+
+def batch_command(job, prompt_arg):
+    # Usage: qwen [query..]; without a query the prompt is read from stdin
+    return ["qwen"] if prompt_arg is None else ["qwen", prompt_arg]
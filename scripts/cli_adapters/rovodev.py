@@ -0,0 +1,44 @@
+"""Atlassian RovoDev CLI adapter (acli rovodev)."""
+
+from cli_adapters.common import agent_prompt, copy_to_clipboard, exec_in_workspace, windows_notice
+
+NAME = "rovodev"
+DESCRIPTION = "Atlassian RovoDev CLI"
+PROMPT_DELIVERY = "clipboard"
+PROMPT_CHANNELS = ("argv", "file")
+SUPPORTS_BATCH = True
+SUPPORTS_INTERACTIVE = True
+NEEDS_PTY = True
+DESTRUCTIVE = True
+
+
+def interactive_command(session):
+    agent_name = session['agent_name']
+    context = session['context']
+    print(f"[{agent_name}] Starting RovoDev CLI session...")
+    windows_notice(agent_name)
+
+    # Copy to clipboard for easy pasting
+    clipboard_success = copy_to_clipboard(context)
+
+    print(f"[{agent_name}] Starting RovoDev CLI...")
+    if clipboard_success:
+        print(f"[{agent_name}] Agent instructions copied to clipboard!")
+        print(f"[{agent_name}] >>> Paste with Ctrl+V (or Cmd+V) in the RovoDev prompt")
+    else:
+        print(f"[{agent_name}] Could not copy to clipboard. Manual load:")
+        print(f"[{agent_name}]     {context[:200]}...")
+    print("-" * 60)
+
+    exec_in_workspace(["acli", "rovodev", "run"], session['workspace'], agent_name,
+                      install_hint="npm install -g @atlassian/rovo-dev-cli", label="RovoDev")
+    return None
+
+
+def batch_prompt(job):
+    return agent_prompt(job['agent_content'], job['agent_name'], job['workspace'], job.get('layout', "default"))
+
+
+def batch_command(job, prompt_arg):
+    # Batch mode with agent context; the workspace is set as the process cwd
+    return ["acli", "rovodev", "run", prompt_arg]
@@ -0,0 +1,22 @@
+"""VS Code Copilot adapter: opens the workspace and copies the instructions."""
+
+from cli_adapters.common import copy_to_clipboard
+
+NAME = "vscode"
+DESCRIPTION = "VS Code Copilot Chat (opens the workspace)"
+PROMPT_DELIVERY = "clipboard"
+PROMPT_CHANNELS = ()
+SUPPORTS_BATCH = False
+SUPPORTS_INTERACTIVE = True
+NEEDS_PTY = False
+
+
+def interactive_command(session):
+    agent_name = session['agent_name']
+    clipboard_success = copy_to_clipboard(session['context'])
+    print(f"[{agent_name}] === VS Code Copilot Instructions ===")
+    if clipboard_success:
+        print(f"[{agent_name}] Agent instructions copied to clipboard!")
+    print(f"[{agent_name}] 1. Open Copilot Chat (Ctrl+Shift+I)")
+    print(f"[{agent_name}] 2. Paste the agent instructions (Ctrl+V)")
+    return ["code", session['workspace']]
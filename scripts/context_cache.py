@@ -0,0 +1,171 @@
+#!/usr/bin/env python3
+"""
+context_cache.py
+
+On-disk cache for rendered multi-agent contexts.
+
+Entries are keyed by the content hashes of the agent files plus the render
+parameters (format, roles, workspace). Content hashes are remembered per file
+together with its size and mtime, so an unchanged agent library is never
+re-read to compute the key. The cache is trimmed, least recently used first,
+whenever it grows past a configurable size.
+"""
+
+import hashlib
+import json
+import os
+import sys
+import threading
+
+CACHE_ROOT = os.environ.get("CAPSTONE_AGENTS_CACHE_DIR") or os.path.join(
+    os.environ.get("XDG_CACHE_HOME") or os.path.join(os.path.expanduser("~"), ".cache"),
+    "capstone-agents",
+)
+CONTEXT_CACHE_DIR = os.path.join(CACHE_ROOT, "context")
+HASH_INDEX_FILE = os.path.join(CACHE_ROOT, "file-hashes.json")
+
+# Default upper bound for the rendered-context cache (bytes)
+DEFAULT_MAX_BYTES = int(os.environ.get("CAPSTONE_CONTEXT_CACHE_MAX_BYTES", 64 * 1024 * 1024))
+
+ENTRY_SUFFIX = ".md"
+
+
+def sha256_bytes(data: bytes) -> str:
+    """Return the hex SHA-256 digest of `data`."""
+    return hashlib.sha256(data).hexdigest()
+
+
+def _load_json(path: str) -> dict:
+    try:
+        with open(path, 'r', encoding='utf-8') as f:
+            return json.load(f)
+    except (OSError, ValueError):
+        return {}
+
+
+def atomic_write(path: str, content: str) -> None:
+    """Write `content` to `path` via a temp file and rename."""
+    directory = os.path.dirname(path) or "."
+    os.makedirs(directory, exist_ok=True)
+    tmp_path = os.path.join(directory, f".{os.path.basename(path)}.{os.getpid()}.{threading.get_ident()}.tmp")
+    try:
+        with open(tmp_path, 'x', encoding='utf-8', newline='') as f:
+            f.write(content)
+        os.replace(tmp_path, path)
+    except BaseException:
+        try:
+            os.unlink(tmp_path)
+        except OSError:
+            pass
+        raise
+
+
+def file_hashes(filepaths: list[str]) -> dict:
+    """
+    Return {filepath: sha256} for the given files.
+    Files whose size and mtime match the stored hash index are not re-read.
+    """
+    index = _load_json(HASH_INDEX_FILE)
+    hashes = {}
+    dirty = False
+    for filepath in filepaths:
+        try:
+            st = os.stat(filepath)
+        except OSError:
+            continue
+        entry = index.get(filepath)
+        if entry and entry[0] == st.st_size and entry[1] == st.st_mtime_ns:
+            hashes[filepath] = entry[2]
+            continue
+        try:
+            with open(filepath, 'rb') as f:
+                digest = sha256_bytes(f.read())
+        except OSError:
+            continue
+        index[filepath] = [st.st_size, st.st_mtime_ns, digest]
+        hashes[filepath] = digest
+        dirty = True
+    if dirty:
+        try:
+            atomic_write(HASH_INDEX_FILE, json.dumps(index, sort_keys=True))
+        except OSError as e:
+            print(f"Warning: Could not update hash index: {e}", file=sys.stderr)
+    return hashes
+
+
+def cache_key(agents: list[dict], **params) -> str | None:
+    """
+    Build the cache key for a rendered context.
+    Returns None if any agent file could not be hashed.
+    """
+    hashes = file_hashes([agent['filepath'] for agent in agents])
+    entries = []
+    for agent in agents:
+        digest = hashes.get(agent['filepath'])
+        if digest is None:
+            return None
+        entries.append([agent['role'], agent['type'], digest])
+    payload = json.dumps({'agents': entries, 'params': params}, sort_keys=True)
+    return sha256_bytes(payload.encode('utf-8'))
+
+
+def _entry_path(key: str) -> str:
+    return os.path.join(CONTEXT_CACHE_DIR, key + ENTRY_SUFFIX)
+
+
+def get(key: str) -> str | None:
+    """Return the cached context for `key`, or None on a miss."""
+    path = _entry_path(key)
+    try:
+        with open(path, 'r', encoding='utf-8', newline='') as f:
+            content = f.read()
+    except OSError:
+        return None
+    try:
+        # Mark as recently used for eviction
+        os.utime(path)
+    except OSError:
+        pass
+    return content
+
+
+def put(key: str, content: str, max_bytes: int = DEFAULT_MAX_BYTES) -> None:
+    """Store a rendered context and evict old entries past `max_bytes`."""
+    try:
+        atomic_write(_entry_path(key), content)
+        evict(max_bytes)
+    except OSError as e:
+        print(f"Warning: Could not write context cache: {e}", file=sys.stderr)
+
+
+def evict(max_bytes: int = DEFAULT_MAX_BYTES) -> int:
+    """Delete least recently used entries until the cache fits in `max_bytes`.
+    Returns the number of entries removed."""
+    try:
+        names = os.listdir(CONTEXT_CACHE_DIR)
+    except OSError:
+        return 0
+    entries = []
+    total = 0
+    for name in names:
+        if not name.endswith(ENTRY_SUFFIX):
+            continue
+        path = os.path.join(CONTEXT_CACHE_DIR, name)
+        try:
+            st = os.stat(path)
+        except OSError:
+            continue
+        entries.append((st.st_mtime_ns, st.st_size, path))
+        total += st.st_size
+
+    removed = 0
+    for _, size, path in sorted(entries):
+        if total <= max_bytes:
+            break
+        try:
+            os.unlink(path)
+        except OSError:
+            continue
+        total -= size
+        removed += 1
+    return removed
@@ -0,0 +1,203 @@
+#!/usr/bin/env python3
+"""
+context_dedup.py
+
+Factor boilerplate shared by several agent definitions out of a
+multi-agent context.
+
+Unified agent files are generated from one template, so large parts of
+them (Mode Switching, the plan.json example, Workspace Agnostic
+constraints, the shared workflow steps) are identical apart from the role
+name. Each definition is split into units (paragraphs, list items, code
+blocks) keyed by the headings they sit under, with the role name replaced
+by `<role>`. A unit that appears in every agent having that heading is
+emitted once in a shared preamble; the per-agent blocks keep only what
+differs and mark where shared text was removed.
+
+    shared, remainders = factor_shared(contents)
+"""
+
+import re
+
+from agent_library import format_role_name
+from agent_sections import parse_sections
+
+# Placeholder for the role name in shared units
+ROLE_PLACEHOLDER = "<role>"
+# Left in a per-agent section where shared units were removed
+SHARED_MARKER = "_(+ shared instructions)_"
+# A unit must be shared by at least this many agents to be factored out
+MIN_SHARED_AGENTS = 2
+
+_LIST_ITEM = re.compile(r"^\s{0,3}(?:[-*+]|\d+\.)\s")
+
+
+def _units(content: str, start: int, end: int) -> list[tuple[int, int]]:
+    """Split content[start:end] into (start, end) spans of paragraphs, list items and code blocks."""
+    units = []
+    unit_start = None
+    in_fence = False
+    pos = start
+    for line in content[start:end].split('\n'):
+        line_start = pos
+        pos += len(line) + 1
+        stripped = line.strip()
+        if in_fence:
+            if stripped.startswith(('```', '~~~')):
+                in_fence = False
+            continue
+        if stripped.startswith(('```', '~~~')):
+            # A code block continues the paragraph or list item it belongs to
+            if unit_start is None:
+                unit_start = line_start
+            in_fence = True
+            continue
+        if not stripped or stripped == '---':
+            if unit_start is not None:
+                units.append((unit_start, line_start))
+                unit_start = None
+            continue
+        if _LIST_ITEM.match(line) and unit_start is not None:
+            units.append((unit_start, line_start))
+            unit_start = None
+        if unit_start is None:
+            unit_start = line_start
+    if unit_start is not None:
+        units.append((unit_start, min(pos, end)))
+    return [(s, e) for s, e in units if content[s:e].strip()]
+
+
+def split_units(content: str) -> list[dict]:
+    """
+    Return the units of an agent definition in document order.
+    Each unit is {'path': heading titles above it (H1 excluded), 'start', 'end'}.
+    """
+    sections = parse_sections(content)['sections']
+    units = []
+    first = sections[0]['start'] if sections else len(content)
+    for start, end in _units(content, 0, first):
+        units.append({'path': (), 'start': start, 'end': end})
+
+    def walk(node, path):
+        own_path = path + (node['title'],) if node['level'] > 1 else path
+        own_end = node['children'][0]['start'] if node['children'] else node['end']
+        for start, end in _units(content, node['body_start'], own_end):
+            units.append({'path': own_path, 'start': start, 'end': end})
+        for child in node['children']:
+            walk(child, own_path)
+
+    for root in parse_sections(content)['roots']:
+        walk(root, ())
+    return units
+
+
+def _replace_name(text: str, name: str) -> str:
+    """Replace whole-word occurrences of `name` (not part of a longer word or slug)."""
+    pieces = []
+    pos = 0
+    while True:
+        found = text.find(name, pos)
+        if found < 0:
+            break
+        end = found + len(name)
+        before = text[found - 1] if found else ""
+        after = text[end] if end < len(text) else ""
+        if (before.isalnum() or before in "_-") or (after.isalnum() or after == "_"):
+            pieces.append(text[pos:end])
+        else:
+            pieces.append(text[pos:found] + ROLE_PLACEHOLDER)
+        pos = end
+    pieces.append(text[pos:])
+    return "".join(pieces)
+
+
+def normalize(text: str, role: str) -> str:
+    """Replace the role's name in `text` with ROLE_PLACEHOLDER."""
+    text = text.strip()
+    names = {role, role.title(), format_role_name(role), format_role_name(role).lower()}
+    for name in sorted(names, key=len, reverse=True):
+        if name in text:
+            text = _replace_name(text, name)
+    return text
+
+
+def factor_shared(contents: dict[str, str], min_agents: int = MIN_SHARED_AGENTS) -> tuple[list[dict], dict[str, str]]:
+    """
+    Split agent definitions into shared units and per-agent remainders.
+
+    Args:
+        contents: {role: agent definition}, in output order
+        min_agents: Fewest agents a unit must appear in to be shared
+
+    Returns:
+        tuple: (shared, remainders) where shared is a list of
+        {'path': heading titles, 'text': normalized unit} in first-seen order
+        and remainders is {role: definition without the shared units}.
+    """
+    units = {role: split_units(content) for role, content in contents.items()}
+    path_roles = {}
+    unit_roles = {}
+    for role, role_units in units.items():
+        for unit in role_units:
+            unit['key'] = (unit['path'], normalize(contents[role][unit['start']:unit['end']], role))
+            path_roles.setdefault(unit['path'], set()).add(role)
+            unit_roles.setdefault(unit['key'], set()).add(role)
+
+    # Shared: present in every agent that has the section, and in enough agents
+    shared_keys = {key for key, roles in unit_roles.items()
+                   if len(roles) >= min_agents and roles == path_roles[key[0]]}
+
+    shared = []
+    seen = set()
+    remainders = {}
+    for role, content in contents.items():
+        pieces = []
+        pos = 0
+        marked = None
+        for unit in units[role]:
+            if unit['key'] not in shared_keys:
+                continue
+            if unit['key'] not in seen:
+                seen.add(unit['key'])
+                shared.append({'path': unit['path'], 'text': unit['key'][1]})
+            pieces.append(content[pos:unit['start']])
+            if marked != unit['path']:
+                pieces.append(SHARED_MARKER + "\n")
+                marked = unit['path']
+            pos = unit['end']
+        pieces.append(content[pos:])
+        remainder = ''.join(pieces)
+        # Consecutive removed units leave a marker per section only
+        remainder = re.sub(rf"({re.escape(SHARED_MARKER)}\n)(\s*{re.escape(SHARED_MARKER)}\n)+", r"\1", remainder)
+        remainders[role] = re.sub(r"\n{3,}", "\n\n", remainder)
+    return _group_by_path(shared), remainders
+
+
+def _group_by_path(shared: list[dict]) -> list[dict]:
+    """Order shared units by section (first-seen), keeping unit order within a section."""
+    order = {}
+    for unit in shared:
+        order.setdefault(unit['path'], len(order))
+    return sorted(shared, key=lambda unit: order[unit['path']])
+
+
+def format_shared(shared: list[dict]) -> list[str]:
+    """Return Markdown lines listing the shared units under their section paths."""
+    lines = []
+    current = None
+    previous = None
+    for unit in shared:
+        if unit['path'] != current:
+            current = unit['path']
+            previous = None
+            lines.append(f"#### {' › '.join(current) if current else 'Preamble'}")
+            lines.append("")
+        elif previous is not None and _LIST_ITEM.match(previous) and _LIST_ITEM.match(unit['text']):
+            # Keep list items of one list together
+            lines.pop()
+        lines.append(unit['text'])
+        lines.append("")
+        previous = unit['text']
+    if lines:
+        lines.pop()
+    return lines
@@ -0,0 +1,75 @@
+#!/usr/bin/env python3
+"""
+context_layout.py
+
+Stable-prefix layout for rendered contexts and prompts.
+
+Provider-side prompt caches match on a byte-identical prefix. The default
+layout puts `**Current Workspace**` near the top, so every workspace gets a
+different prefix and nothing is reused. In the "stable" layout the static
+agent material (which depends only on the agent files and render options)
+comes first, and the per-workspace and per-run values follow in a trailing
+session block that also records the hash of everything before it:
+
+    content = with_session(prefix, {'Current Workspace': workspace})
+    prefix_hash_of(content)  # same value for every workspace
+"""
+
+import hashlib
+import re
+
+LAYOUTS = ("default", "stable")
+
+SESSION_HEADING = "## Session"
+
+# Hex digits of the SHA-256 prefix hash that are reported
+PREFIX_HASH_LENGTH = 16
+
+_PREFIX_COMMENT = re.compile(r"<!-- context-prefix sha256:([0-9a-f]+) \(([\d,]+) bytes\) -->\s*$")
+
+
+def prefix_hash(prefix: str) -> str:
+    """Return the (shortened) SHA-256 of a context prefix."""
+    return hashlib.sha256(prefix.encode('utf-8')).hexdigest()[:PREFIX_HASH_LENGTH]
+
+
+def session_block(prefix: str, values: dict) -> str:
+    """Return the volatile tail that follows `prefix`: the session values and the prefix hash."""
+    lines = [SESSION_HEADING, ""]
+    for label, value in values.items():
+        lines.append(f"**{label}**: `{value}`")
+    lines.append("")
+    lines.append(f"<!-- context-prefix sha256:{prefix_hash(prefix)} ({len(prefix.encode('utf-8')):,} bytes) -->")
+    return "\n".join(lines)
+
+
+def with_session(prefix: str, values: dict) -> str:
+    """Append the session block to a static prefix."""
+    if prefix and not prefix.endswith("\n"):
+        prefix += "\n"
+    return prefix + "\n" + session_block(prefix, values)
+
+
+def split_session(content: str) -> tuple[str, str]:
+    """
+    Split stable-layout content into (prefix, session block).
+    Content without a session block is all prefix.
+    """
+    if not _PREFIX_COMMENT.search(content):
+        return content, ""
+    cut = content.rfind("\n" + SESSION_HEADING + "\n")
+    if cut < 0:
+        return content, ""
+    # The blank line between the two belongs to neither
+    return content[:cut], content[cut + 1:]
+
+
+def prefix_hash_of(content: str) -> str:
+    """Return the prefix hash of rendered content (the hash of all of it if it has no session block)."""
+    return prefix_hash(split_session(content)[0])
+
+
+def describe_prefix(content: str) -> str:
+    """Return a one-line summary of the cacheable prefix of `content`."""
+    prefix = split_session(content)[0]
+    return f"prefix sha256:{prefix_hash(prefix)} ({len(prefix.encode('utf-8')):,} of {len(content.encode('utf-8')):,} bytes)"
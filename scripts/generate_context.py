@@ -6,153 +6,115 @@ Generates a consolidated Markdown file containing all Capstone Agent definitions
 This allows users to invoke agents with @-mention syntax within a single chat session.
 
 This is a shared utility used by run_agents.py for multi-agent context mode.
+Discovery and rendering live in agent_library.py and agent_renderers.py.
 """
 
 import argparse
 import os
 import sys
 
+import context_cache
+from agent_library import find_agent_files, generate_trigger, read_agent_file
+from agent_renderers import apply_layout, format_system_prompt, mode_reader
+from context_layout import LAYOUTS, describe_prefix, with_session
+
 # Path to the capstone-agents repository
 SCRIPT_DIR = os.path.dirname(os.path.abspath(__file__))
 CAPSTONE_AGENTS_DIR = os.path.dirname(SCRIPT_DIR)  # scripts/ -> root
 DEFAULT_AGENTS_DIR = os.path.join(CAPSTONE_AGENTS_DIR, "agents")
 
 
-def read_agent_file(filepath: str) -> str | None:
-    """Read and return the content of an agent file."""
-    try:
-        with open(filepath, 'r', encoding='utf-8') as f:
-            return f.read()
-    except Exception as e:
-        print(f"Warning: Could not read {filepath}: {e}", file=sys.stderr)
-        return None
+def generate_system_prompt(agents: list[dict], workspace: str | None, dedupe: bool = True,
+                           mode: str | None = None, layout: str = "default") -> str:
+    """Generate the consolidated system prompt (unified agents sliced to `mode` if set)."""
+    read = mode_reader(read_agent_file, mode)
+    return apply_layout(lambda ws: format_system_prompt(agents, ws, read, dedupe), workspace, layout)
+
 
+def size_report(agents: list[dict], workspace: str, mode: str | None = None) -> str:
+    """Return a summary of how much factoring out shared instructions saves."""
+    verbatim = len(generate_system_prompt(agents, workspace, dedupe=False, mode=mode).encode('utf-8'))
+    deduped = len(generate_system_prompt(agents, workspace, mode=mode).encode('utf-8'))
+    saved = verbatim - deduped
+    percent = 100 * saved / verbatim if verbatim else 0
+    return (f"Context size: {verbatim:,} bytes verbatim, {deduped:,} bytes with shared instructions "
+            f"factored out ({saved:,} bytes, {percent:.0f}% smaller)")
 
-def find_agent_files(agents_dir: str, roles: list[str] | None = None) -> list[dict]:
+
+def render_cached(agents: list[dict], workspace: str, roles: list[str] | None = None,
+                  use_cache: bool = True, cache_max_bytes: int = context_cache.DEFAULT_MAX_BYTES,
+                  dedupe: bool = True, mode: str | None = None, layout: str = "default") -> str:
     """
-    Discover all agent files in the agents directory.
-    Returns a list of dicts with 'role', 'type', and 'filepath'.
+    Render the system prompt, reusing a cached copy when the agent files and
+    render parameters are unchanged. In the stable layout only the static
+    prefix is cached, so one entry serves every workspace.
     """
-    agents = []
-    if not os.path.isdir(agents_dir):
-        print(f"Error: Agents directory not found: {agents_dir}", file=sys.stderr)
-        return agents
-
-    for role_name in sorted(os.listdir(agents_dir)):
-        role_path = os.path.join(agents_dir, role_name)
-        if not os.path.isdir(role_path):
-            continue
-
-        # Filter by roles if specified
-        if roles and role_name not in roles:
-            continue
-
-        # Check for unified agent file first
-        unified_file = os.path.join(role_path, f"{role_name}.md")
-        if os.path.exists(unified_file):
-            agents.append({
-                'role': role_name,
-                'type': 'unified',
-                'filepath': unified_file
-            })
-            continue
-
-        # Fall back to legacy files
-        for filename in os.listdir(role_path):
-            if not filename.endswith('.md'):
-                continue
-            if filename == 'legacy':
-                continue
-
-            filepath = os.path.join(role_path, filename)
-            if os.path.isdir(filepath):
-                continue
-            
-            if 'planning' in filename.lower():
-                agent_type = 'planning'
-            elif 'implementation' in filename.lower():
-                agent_type = 'impl'
-            else:
-                agent_type = 'default'
-
-            agents.append({
-                'role': role_name,
-                'type': agent_type,
-                'filepath': filepath
-            })
-    
+    stable = layout == "stable"
+    # The prefix of the stable layout does not depend on the workspace
+    render_workspace = None if stable else workspace
+
+    def finish(content):
+        return with_session(content, {'Current Workspace': workspace}) if stable else content
+
+    key = None
+    if use_cache:
+        key = context_cache.cache_key(
+            agents,
+            format='system-prompt-prefix' if stable else 'system-prompt',
+            roles=sorted(roles) if roles else None,
+            workspace=render_workspace,
+            dedupe=dedupe,
+            mode=mode,
+        )
+        if key:
+            cached = context_cache.get(key)
+            if cached is not None:
+                return finish(cached)
+
+    content = generate_system_prompt(agents, render_workspace, dedupe, mode)
+    if key:
+        context_cache.put(key, content, cache_max_bytes)
+    return finish(content)
+
+
+def workspace_agents(agents_dir: str, workspace: str, roles: list[str] | None = None,
+                     stack_filter: str | None = None, keep=(), stack_depth: int | None = None) -> list[dict]:
+    """
+    Find the agent files for a context. With `stack_filter` ("drop" or
+    "demote"), roles the workspace's detected stack does not need are
+    dropped or listed last (see workspace_stack.py). The stack is detected
+    `stack_depth` directories deep (default: workspace_stack.DEFAULT_DEPTH).
+    """
+    if not stack_filter:
+        return find_agent_files(agents_dir, roles)
+
+    from agent_registry import load_registry
+    from workspace_stack import DEFAULT_DEPTH, detect_stack, format_stack, irrelevant_roles
+
+    result = detect_stack(workspace, DEFAULT_DEPTH if stack_depth is None else stack_depth)
+    agents = find_agent_files(agents_dir, roles, result['stack'], stack_filter, keep)
+    print(format_stack(result), file=sys.stderr)
+    # Roles named explicitly are never pruned
+    candidates = () if roles else sorted(load_registry(agents_dir)['roles'])
+    pruned = [role for role in irrelevant_roles(candidates, result['stack']) if role not in keep]
+    if pruned:
+        action = "listed last" if stack_filter == "demote" else "dropped"
+        print(f"Not needed by this workspace, {action}: {', '.join(pruned)}", file=sys.stderr)
     return agents
 
 
-def generate_trigger(role: str, agent_type: str) -> str:
-    """Generate the @-mention trigger for an agent."""
-    if agent_type in ['default', 'unified']:
-        return f"@{role}"
-    else:
-        return f"@{role} {agent_type}"
-
-
-def generate_system_prompt(agents: list[dict], workspace: str) -> str:
-    """Generate the consolidated system prompt."""
-    lines = [
-        "# Capstone Agents System Prompt",
-        "",
-        "You are an intelligent development assistant capable of assuming multiple expert roles.",
-        "You can invoke a specific agent persona by using its **trigger handle** (e.g., `@frontend`).",
-        "",
-        "## User Instructions",
-        "When you see a trigger like `@role`, you MUST:",
-        "1. Adopt the persona and instructions of that agent completely.",
-        "2. Ignore previous persona instructions if they conflict.",
-        "3. Execute the user's request using that agent's capabilities.",
-        "",
-        f"**Current Workspace**: `{workspace}`",
-        "",
-        "---",
-        "",
-        "## Available Agents",
-        ""
-    ]
-
-    # Add agent list
-    for agent in agents:
-        trigger = generate_trigger(agent['role'], agent['type'])
-        lines.append(f"- **{trigger}**: {agent['role'].title()} Agent")
-
-    lines.append("")
-    lines.append("---")
-    lines.append("")
-    lines.append("## Agent Definitions")
-    lines.append("")
-
-    # Add full agent definitions
-    for agent in agents:
-        trigger = generate_trigger(agent['role'], agent['type'])
-        content = read_agent_file(agent['filepath'])
-        
-        if content is None:
-            continue
-
-        lines.append(f"### Agent: {agent['role'].title()} ({trigger})")
-        lines.append("```markdown")
-        lines.append(content.strip())
-        lines.append("```")
-        lines.append("")
-        lines.append("---")
-        lines.append("")
-
-    return "\n".join(lines)
-
-
-def get_multi_agent_context(workspace: str, agents_dir: str | None = None) -> str:
+def get_multi_agent_context(workspace: str, agents_dir: str | None = None,
+                            roles: list[str] | None = None, use_cache: bool = True,
+                            mode: str | None = None, layout: str = "default",
+                            stack_filter: str | None = None, keep=(), stack_depth: int | None = None) -> str:
     """
     Generate and return the multi-agent context string.
     This function is meant to be imported by run_agents.py.
     """
     if agents_dir is None:
         agents_dir = DEFAULT_AGENTS_DIR
-    agents = find_agent_files(agents_dir)
-    return generate_system_prompt(agents, workspace)
+    agents = workspace_agents(agents_dir, workspace, roles, stack_filter, keep, stack_depth)
+    return render_cached(agents, workspace, roles, use_cache, mode=mode, layout=layout)
 
 
 def main():
@@ -167,8 +129,30 @@ def main():
                         help="Output filename (optional, prints to stdout if not set)")
     parser.add_argument("--roles",
                         help="Comma-separated list of roles to include")
+    parser.add_argument("--mode", choices=["planning", "implementation"],
+                        help="Only include this mode of unified agents (default: both modes)")
+    parser.add_argument("--layout", choices=LAYOUTS, default="default",
+                        help="'stable' puts the workspace in a trailing session block so the context prefix "
+                             "is the same for every workspace and reports its hash (default: %(default)s)")
+    parser.add_argument("--stack-filter", choices=["drop", "demote"],
+                        help="Detect the workspace stack from marker files and drop (or list last) roles it does not "
+                             "need, e.g. blockchain without hardhat.config.* or *.sol (default: keep all roles)")
+    parser.add_argument("--stack-depth", type=int, metavar="N",
+                        help="Directories below the workspace root that --stack-filter scans for markers "
+                             "(default: 3, or $CAPSTONE_AGENTS_STACK_DEPTH)")
+    parser.add_argument("--no-dedup", action="store_true",
+                        help="Include every agent definition verbatim instead of factoring out shared instructions")
+    parser.add_argument("--report", action="store_true",
+                        help="Print the context size with and without shared instructions factored out (to stderr)")
+    parser.add_argument("--no-cache", action="store_true",
+                        help="Always re-render instead of using the context cache")
+    parser.add_argument("--cache-max-mb", type=float,
+                        default=context_cache.DEFAULT_MAX_BYTES / (1024 * 1024),
+                        help="Evict old cache entries once the cache exceeds this size in MB (default: %(default)g)")
     
     args = parser.parse_args()
+    if args.stack_depth is not None and args.stack_depth < 0:
+        parser.error("--stack-depth must be 0 or more")
 
     # Resolve paths
     workspace = os.path.abspath(args.workspace)
@@ -180,14 +164,19 @@ def main():
         roles = [r.strip() for r in args.roles.split(',')]
 
     # Find agent files
-    agents = find_agent_files(agents_dir, roles)
+    agents = workspace_agents(agents_dir, workspace, roles, args.stack_filter, stack_depth=args.stack_depth)
     
     if not agents:
         print("Error: No agent files found.", file=sys.stderr)
         sys.exit(1)
     
     # Generate content
-    content = generate_system_prompt(agents, workspace)
+    content = render_cached(agents, workspace, roles, not args.no_cache,
+                            int(args.cache_max_mb * 1024 * 1024), not args.no_dedup, args.mode, args.layout)
+    if args.report:
+        print(size_report(agents, workspace, args.mode), file=sys.stderr)
+    if args.layout == "stable":
+        print(f"Context {describe_prefix(content)}", file=sys.stderr)
 
     if args.output:
         try:
@@ -16,6 +16,8 @@ import os
 import shutil
 import sys
 
+from agent_sections import section_body
+
 SCRIPT_DIR = os.path.dirname(os.path.abspath(__file__))
 CAPSTONE_AGENTS_DIR = os.path.dirname(SCRIPT_DIR)
 DEFAULT_AGENTS_DIR = os.path.join(CAPSTONE_AGENTS_DIR, "agents")
@@ -74,26 +76,7 @@ def read_file(filepath: str) -> str | None:
 
 def extract_section(content: str, header: str) -> str:
     """Extract content under a specific markdown header."""
-    lines = content.split('\n')
-    result = []
-    in_section = False
-    section_level = 0
-    
-    for line in lines:
-        if line.startswith('#'):
-            # Count header level
-            level = len(line) - len(line.lstrip('#'))
-            if header.lower() in line.lower():
-                in_section = True
-                section_level = level
-                continue
-            elif in_section and level <= section_level:
-                # Hit another header of same or higher level, stop
-                break
-        if in_section:
-            result.append(line)
-    
-    return '\n'.join(result).strip()
+    return section_body(content, header)
 
 
 def generate_unified_agent(role_name: str, planning_content: str, impl_content: str) -> str:
@@ -112,15 +95,6 @@ def generate_unified_agent(role_name: str, planning_content: str, impl_content:
     if not tools:
         tools = "- **filesystem** — Read and write files in the workspace"
     
-    # Clean up planning content (remove redundant headers we're handling)
-    planning_cleaned = planning_content
-    for header in ["# ", "## Role Description", "## MCP Tools"]:
-        if header in planning_cleaned:
-            planning_cleaned = planning_cleaned.replace(
-                extract_section(planning_content, header.replace("## ", "").replace("# ", "")), 
-                ""
-            )
-    
     # Use the workflow and constraints sections
     planning_workflow = extract_section(planning_content, "Workflow")
     planning_constraints = extract_section(planning_content, "Constraints")
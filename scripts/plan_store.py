@@ -0,0 +1,371 @@
+#!/usr/bin/env python3
+"""
+plan_store.py
+
+Indexed, concurrency-safe store of the plan files of a workspace.
+
+Agents write `{role}-plan.json` files; with parallel runs, read-modify-write
+updates of those files race, and finding e.g. the pending tasks of all roles
+means parsing every file. The plan store mirrors the plan files in an SQLite
+database (CACHE_ROOT/plan-store/, one per workspace) with tasks indexed by
+role, status and dependency:
+
+- sync() re-imports only the plan files whose size or mtime changed.
+- set_status() updates a task in an IMMEDIATE transaction, so concurrent
+  runners (threads or processes) are serialized, and writes the plan file
+  back atomically in the format the agents expect. Edits an agent made to
+  the file in the meantime are imported first, not overwritten.
+- Queries (tasks by role/status, ready tasks, dependents) run on the
+  indexes and take milliseconds for thousands of tasks.
+
+    store = open_store(workspace)
+    sync(store, find_plan_files(workspace))
+    for task in ready_tasks(store):
+        ...
+    set_status(store, "backend:task-2", "completed")
+"""
+
+import argparse
+import hashlib
+import json
+import os
+import sqlite3
+import sys
+import time
+from contextlib import contextmanager
+
+from context_cache import CACHE_ROOT, atomic_write
+from plan_tasks import (TASK_STATUSES, apply_status, count_statuses, dependency_resolver, find_plan_files,
+                        format_plan, plan_task, read_plan)
+
+STORE_DIR = os.path.join(CACHE_ROOT, "plan-store")
+
+# Seconds a writer waits for another writer's transaction to finish
+BUSY_TIMEOUT = 30.0
+
+SCHEMA = """
+CREATE TABLE IF NOT EXISTS plans (
+    path TEXT PRIMARY KEY,
+    role TEXT NOT NULL,
+    mtime_ns INTEGER NOT NULL,
+    size INTEGER NOT NULL,
+    document TEXT NOT NULL
+);
+CREATE TABLE IF NOT EXISTS tasks (
+    key TEXT PRIMARY KEY,
+    plan TEXT NOT NULL REFERENCES plans(path) ON DELETE CASCADE,
+    position INTEGER NOT NULL,
+    id TEXT NOT NULL,
+    role TEXT NOT NULL,
+    status TEXT NOT NULL,
+    description TEXT NOT NULL,
+    data TEXT NOT NULL
+);
+CREATE TABLE IF NOT EXISTS dependencies (
+    task TEXT NOT NULL REFERENCES tasks(key) ON DELETE CASCADE,
+    depends TEXT NOT NULL,
+    depends_on TEXT,
+    problem TEXT,
+    PRIMARY KEY (task, depends)
+);
+CREATE INDEX IF NOT EXISTS tasks_plan ON tasks(plan, position);
+CREATE INDEX IF NOT EXISTS tasks_role_status ON tasks(role, status);
+CREATE INDEX IF NOT EXISTS tasks_status ON tasks(status);
+CREATE INDEX IF NOT EXISTS dependencies_on ON dependencies(depends_on);
+"""
+
+_TASK_COLUMNS = "key, id, role, plan, status, description"
+
+
+def store_path(workspace: str) -> str:
+    """Return the database path of the plan store of `workspace`."""
+    digest = hashlib.sha256(os.path.abspath(workspace).encode('utf-8')).hexdigest()[:16]
+    return os.path.join(STORE_DIR, f"{digest}.sqlite3")
+
+
+def open_store(workspace: str, path: str | None = None) -> sqlite3.Connection:
+    """Open (creating if needed) the plan store of `workspace`, or the database at `path`."""
+    path = path or store_path(workspace)
+    os.makedirs(os.path.dirname(path) or ".", exist_ok=True)
+    conn = sqlite3.connect(path, timeout=BUSY_TIMEOUT, isolation_level=None)
+    conn.row_factory = sqlite3.Row
+    # Readers do not block the writer (and the other way round)
+    conn.execute("PRAGMA journal_mode=WAL")
+    conn.execute("PRAGMA foreign_keys=ON")
+    conn.executescript(SCHEMA)
+    return conn
+
+
+@contextmanager
+def transaction(conn: sqlite3.Connection):
+    """Run the block in a write transaction, taken up front so concurrent writers queue."""
+    conn.execute("BEGIN IMMEDIATE")
+    try:
+        yield conn
+    except BaseException:
+        conn.execute("ROLLBACK")
+        raise
+    conn.execute("COMMIT")
+
+
+def _import_plan(conn: sqlite3.Connection, path: str, stat: os.stat_result) -> None:
+    """Replace the mirrored copy of one plan file (inside a transaction)."""
+    role, data = read_plan(path)
+    # The plan without its tasks; export_plan() puts them back in place
+    document = json.dumps({key: None if key == 'tasks' else value for key, value in data.items()},
+                          ensure_ascii=False)
+    conn.execute("DELETE FROM tasks WHERE plan = ?", (path,))
+    conn.execute("INSERT INTO plans (path, role, mtime_ns, size, document) VALUES (?, ?, ?, ?, ?) "
+                 "ON CONFLICT(path) DO UPDATE SET role = excluded.role, mtime_ns = excluded.mtime_ns, "
+                 "size = excluded.size, document = excluded.document",
+                 (path, role, stat.st_mtime_ns, stat.st_size, document))
+    for position, task in enumerate(data['tasks']):
+        record = plan_task(role, path, task)
+        try:
+            conn.execute(f"INSERT INTO tasks ({_TASK_COLUMNS}, position, data) VALUES (?, ?, ?, ?, ?, ?, ?, ?)",
+                         (record['key'], record['id'], record['role'], path, record['status'],
+                          record['description'], position, json.dumps(task, ensure_ascii=False)))
+        except sqlite3.IntegrityError:
+            raise ValueError(f"duplicate task '{record['key']}'") from None
+        conn.executemany("INSERT INTO dependencies (task, depends) VALUES (?, ?)",
+                         [(record['key'], depends) for depends in dict.fromkeys(record['depends'])])
+
+
+def _resolve_dependencies(conn: sqlite3.Connection) -> None:
+    """Resolve every dependency to a task key (inside a transaction); unresolvable ones get a 'problem'."""
+    resolve = dependency_resolver(row[0] for row in conn.execute("SELECT key FROM tasks"))
+    updates = []
+    for row in conn.execute("SELECT task, depends FROM dependencies").fetchall():
+        try:
+            updates.append((resolve(row['task'], row['depends']), None, row['task'], row['depends']))
+        except ValueError as e:
+            updates.append((None, str(e), row['task'], row['depends']))
+    conn.executemany("UPDATE dependencies SET depends_on = ?, problem = ? WHERE task = ? AND depends = ?", updates)
+
+
+def _changed(stat: os.stat_result, row) -> bool:
+    return row is None or (row['mtime_ns'], row['size']) != (stat.st_mtime_ns, stat.st_size)
+
+
+def sync(conn: sqlite3.Connection, paths: list[str]) -> list[str]:
+    """
+    Make the store mirror exactly the plan files `paths`: re-import files
+    that changed since they were mirrored and drop the others.
+    Returns the paths that were (re-)imported.
+
+    Raises:
+        OSError, ValueError: if a changed file cannot be read or is not a plan.
+    """
+    paths = [os.path.abspath(path) for path in paths]
+    imported = []
+    with transaction(conn):
+        stored = {row['path']: row for row in conn.execute("SELECT path, mtime_ns, size FROM plans")}
+        for path in paths:
+            # Stat before reading: a write racing the read shows up as a change next time
+            stat = os.stat(path)
+            if _changed(stat, stored.get(path)):
+                _import_plan(conn, path, stat)
+                imported.append(path)
+        removed = [path for path in stored if path not in paths]
+        conn.executemany("DELETE FROM plans WHERE path = ?", [(path,) for path in removed])
+        if imported or removed:
+            _resolve_dependencies(conn)
+    return imported
+
+
+def load_tasks(conn: sqlite3.Connection) -> dict:
+    """
+    Return the stored plans in the form of plan_tasks.load_plans().
+
+    Raises:
+        ValueError: if a dependency is unknown or ambiguous.
+    """
+    problem = conn.execute("SELECT problem FROM dependencies WHERE problem IS NOT NULL LIMIT 1").fetchone()
+    if problem:
+        raise ValueError(problem[0])
+    dependencies = {}
+    for row in conn.execute("SELECT task, depends, depends_on FROM dependencies"):
+        dependencies.setdefault(row['task'], []).append(row)
+    tasks = {}
+    for row in conn.execute(f"SELECT {_TASK_COLUMNS} FROM tasks ORDER BY plan, position"):
+        task = dict(row)
+        task['depends'] = [dependency['depends'] for dependency in dependencies.get(row['key'], [])]
+        task['dependencies'] = list(dict.fromkeys(dependency['depends_on']
+                                                  for dependency in dependencies.get(row['key'], [])))
+        tasks[row['key']] = task
+    files = [row[0] for row in conn.execute("SELECT path FROM plans ORDER BY path")]
+    return {'files': files, 'tasks': tasks}
+
+
+def query_tasks(conn: sqlite3.Connection, role: str | None = None, status: str | None = None) -> list[dict]:
+    """Return the tasks with the given role and/or status, in plan order."""
+    where, params = [], []
+    if role:
+        where.append("role = ?")
+        params.append(role)
+    if status:
+        where.append("status = ?")
+        params.append(status)
+    clause = f"WHERE {' AND '.join(where)}" if where else ""
+    return [dict(row) for row in conn.execute(f"SELECT {_TASK_COLUMNS} FROM tasks {clause} ORDER BY plan, position",
+                                              params)]
+
+
+def status_counts(conn: sqlite3.Connection) -> dict[str, dict[str, int]]:
+    """Return {role: {status: number of tasks}}."""
+    counts = {}
+    for row in conn.execute("SELECT role, status, COUNT(*) FROM tasks GROUP BY role, status ORDER BY role"):
+        counts.setdefault(row[0], {})[row[1]] = row[2]
+    return counts
+
+
+def ready_tasks(conn: sqlite3.Connection, role: str | None = None) -> list[dict]:
+    """Return the tasks that are not completed and whose dependencies all are."""
+    clause = "AND t.role = ?" if role else ""
+    return [dict(row) for row in conn.execute(f"""
+        SELECT t.key, t.id, t.role, t.plan, t.status, t.description FROM tasks t
+        WHERE t.status != 'completed' {clause}
+          AND NOT EXISTS (
+              SELECT 1 FROM dependencies d LEFT JOIN tasks u ON u.key = d.depends_on
+              WHERE d.task = t.key AND (u.key IS NULL OR u.status != 'completed'))
+        ORDER BY t.plan, t.position""", [role] if role else [])]
+
+
+def dependents(conn: sqlite3.Connection, key: str) -> list[str]:
+    """Return the keys of the tasks that depend on task `key`."""
+    return [row[0] for row in conn.execute("SELECT task FROM dependencies WHERE depends_on = ? ORDER BY task",
+                                           (key,))]
+
+
+def export_plan(conn: sqlite3.Connection, path: str) -> dict:
+    """Return the plan file data of a stored plan, with its tasks as currently stored."""
+    row = conn.execute("SELECT document FROM plans WHERE path = ?", (path,)).fetchone()
+    if row is None:
+        raise KeyError(path)
+    data = json.loads(row['document'])
+    data['tasks'] = [json.loads(task[0]) for task in
+                     conn.execute("SELECT data FROM tasks WHERE plan = ? ORDER BY position", (path,))]
+    return data
+
+
+def set_status(conn: sqlite3.Connection, key: str, status: str) -> bool:
+    """
+    Set the status of task `key` and write its plan file back atomically,
+    in one transaction. Returns False (after a warning) if the task or its
+    plan file cannot be updated.
+    """
+    try:
+        with transaction(conn):
+            row = conn.execute("SELECT t.plan, t.id, p.mtime_ns, p.size FROM tasks t JOIN plans p ON p.path = t.plan "
+                               "WHERE t.key = ?", (key,)).fetchone()
+            if row is None:
+                raise KeyError("no such task")
+            path = row['plan']
+            stat = os.stat(path)
+            if _changed(stat, row):
+                # An agent edited the plan since it was mirrored: keep its edits
+                _import_plan(conn, path, stat)
+                _resolve_dependencies(conn)
+            task_row = conn.execute("SELECT data FROM tasks WHERE key = ?", (key,)).fetchone()
+            if task_row is None:
+                raise KeyError("task was removed from its plan")
+            task = json.loads(task_row['data'])
+            apply_status(task, status)
+            conn.execute("UPDATE tasks SET status = ?, data = ? WHERE key = ?",
+                         (status, json.dumps(task, ensure_ascii=False), key))
+            atomic_write(path, format_plan(export_plan(conn, path)))
+            stat = os.stat(path)
+            conn.execute("UPDATE plans SET mtime_ns = ?, size = ? WHERE path = ?",
+                         (stat.st_mtime_ns, stat.st_size, path))
+    except (OSError, ValueError, KeyError, sqlite3.Error) as e:
+        print(f"Warning: Could not update task '{key}': {e}", file=sys.stderr)
+        return False
+    return True
+
+
+def export_plans(conn: sqlite3.Connection, out_dir: str | None = None) -> list[str]:
+    """Write every stored plan as a plan file (to its own path, or into `out_dir`); returns the paths written."""
+    written = []
+    for (path,) in conn.execute("SELECT path FROM plans ORDER BY path").fetchall():
+        target = os.path.join(out_dir, os.path.basename(path)) if out_dir else path
+        atomic_write(target, format_plan(export_plan(conn, path)))
+        written.append(target)
+    return written
+
+
+def main():
+    parser = argparse.ArgumentParser(
+        description="Query and update the plan files of a workspace through the indexed plan store",
+        formatter_class=argparse.RawDescriptionHelpFormatter,
+        epilog="""
+Examples:
+  # Task counts per role
+  python plan_store.py -w /path/to/project summary
+
+  # Pending tasks of all roles
+  python plan_store.py -w /path/to/project list --status pending
+
+  # Tasks whose dependencies are all completed
+  python plan_store.py -w /path/to/project ready --role backend
+
+  # Mark a task completed (also rewrites backend-plan.json)
+  python plan_store.py -w /path/to/project set backend:task-2 completed
+
+  # Recreate the plan files from the store
+  python plan_store.py -w /path/to/project export --out restored/
+        """
+    )
+    parser.add_argument("-w", "--workspace", default=".",
+                        help="Workspace whose *-plan.json files are mirrored")
+    parser.add_argument("--store",
+                        help="Database file (default: one per workspace in the capstone-agents cache)")
+    parser.add_argument("--timing", action="store_true",
+                        help="Print how long the sync and the query took (to stderr)")
+    commands = parser.add_subparsers(dest="command", required=True)
+    commands.add_parser("summary", help="Task counts per role")
+    list_parser = commands.add_parser("list", help="List tasks")
+    list_parser.add_argument("--role")
+    list_parser.add_argument("--status", choices=TASK_STATUSES)
+    ready_parser = commands.add_parser("ready", help="List tasks that can start now")
+    ready_parser.add_argument("--role")
+    set_parser = commands.add_parser("set", help="Set a task's status and write its plan file")
+    set_parser.add_argument("key", help="Task key, role:task-id")
+    set_parser.add_argument("status", choices=TASK_STATUSES)
+    export_parser = commands.add_parser("export", help="Write the stored plans back as plan files (no sync)")
+    export_parser.add_argument("--out", help="Directory to write to (default: the original paths)")
+
+    args = parser.parse_args()
+    workspace = os.path.abspath(args.workspace)
+    conn = open_store(workspace, args.store)
+
+    start = time.perf_counter()
+    if args.command != "export":
+        try:
+            imported = sync(conn, find_plan_files(workspace))
+        except (OSError, ValueError) as e:
+            print(f"Error: Could not read plans: {e}", file=sys.stderr)
+            sys.exit(1)
+        if args.timing:
+            print(f"Sync: {(time.perf_counter() - start) * 1000:.1f} ms ({len(imported)} file(s) imported)",
+                  file=sys.stderr)
+    start = time.perf_counter()
+
+    if args.command == "summary":
+        for role, counts in status_counts(conn).items():
+            print(f"{role:<22} {count_statuses(counts)}")
+    elif args.command in ("list", "ready"):
+        tasks = query_tasks(conn, args.role, args.status) if args.command == "list" else ready_tasks(conn, args.role)
+        for task in tasks:
+            print(f"{task['key']:<32} {task['status']:<12} {task['description']}")
+    elif args.command == "set":
+        if not set_status(conn, args.key, args.status):
+            sys.exit(1)
+    else:
+        for path in export_plans(conn, os.path.abspath(args.out) if args.out else None):
+            print(f"Wrote: {path}")
+    if args.timing:
+        print(f"{args.command.capitalize()}: {(time.perf_counter() - start) * 1000:.1f} ms", file=sys.stderr)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,228 @@
+#!/usr/bin/env python3
+"""
+plan_tasks.py
+
+Run the tasks of `{role}-plan.json` files.
+
+PLANNING MODE of every unified agent writes a plan file with `tasks[]`,
+each carrying an `id`, `dependencies` and a `status`. This module reads one
+or more plan files, resolves the dependencies between their tasks (also
+across files) and turns every task that is not completed into a workflow
+stage (workflow.py) for the task's role in IMPLEMENTATION MODE. Ready tasks
+then run in parallel; run_agents.py records each task's status in the plan
+store (plan_store.py), which writes it back to the plan file.
+
+A dependency names a task id of the same plan file, the id of a task in
+another plan file (if only one has it), or `role:id`.
+
+    plans = load_plans(find_plan_files(workspace))
+    workflow = task_workflow(plans, workspace)
+"""
+
+import glob
+import json
+import os
+import time
+
+from workflow import topological_order
+
+PLAN_SUFFIX = "-plan.json"
+
+# Task statuses of docs/usage-guide.md ("Status Values")
+TASK_STATUSES = ("pending", "in-progress", "completed", "blocked", "failed")
+
+# Batch result status -> task status written to the plan file. Results not
+# listed (the CLI was not found, the run was skipped, ...) restore the
+# task's previous status.
+RESULT_STATUSES = {
+    'ok': "completed",
+    'failed': "failed",
+    'timeout': "failed",
+    'blocked': "blocked",
+    'resumed': "completed",
+}
+
+
+def find_plan_files(workspace: str) -> list[str]:
+    """Return the `*-plan.json` files at the root of `workspace`."""
+    return sorted(glob.glob(os.path.join(glob.escape(workspace), "*" + PLAN_SUFFIX)))
+
+
+def plan_role(path: str, data: dict) -> str:
+    """Return the role a plan file belongs to: its 'role', or the file name without -plan.json."""
+    name = os.path.basename(path)
+    return data.get('role') or (name[:-len(PLAN_SUFFIX)] if name.endswith(PLAN_SUFFIX) else os.path.splitext(name)[0])
+
+
+def read_plan(path: str) -> tuple[str, dict]:
+    """
+    Read a plan file; returns (plan role, data).
+
+    Raises:
+        ValueError: if the file is not JSON with a 'tasks' list of tasks with ids.
+    """
+    with open(path, 'r', encoding='utf-8') as f:
+        data = json.load(f)
+    if not isinstance(data, dict) or not isinstance(data.get('tasks'), list):
+        raise ValueError(f"{path} has no 'tasks' list")
+    for index, task in enumerate(data['tasks']):
+        if not isinstance(task, dict) or not task.get('id'):
+            raise ValueError(f"task {index + 1} of {path} has no 'id'")
+    return plan_role(path, data), data
+
+
+def plan_task(role: str, path: str, task: dict) -> dict:
+    """
+    Return the task record of a task of plan `path`: {'key', 'id', 'role',
+    'plan', 'description', 'status', 'depends'}, where 'depends' holds the
+    dependencies as written.
+    """
+    # docs/multi-agent-workflows.md also writes them as 'depends'
+    dependencies = task.get('dependencies', task.get('depends')) or []
+    return {
+        'key': f"{role}:{task['id']}",
+        'id': str(task['id']),
+        'role': task.get('assignee') or role,
+        'plan': path,
+        'description': task.get('description') or task.get('task') or "",
+        'status': task.get('status') or "pending",
+        'depends': [str(dependencies)] if isinstance(dependencies, str) else [str(item) for item in dependencies],
+    }
+
+
+def dependency_resolver(keys):
+    """
+    Return `resolve(task_key, dependency) -> key` for tasks with the given
+    keys. resolve() raises ValueError if the dependency is unknown or ambiguous.
+    """
+    keys = set(keys)
+    by_id = {}
+    for key in keys:
+        by_id.setdefault(key.split(":", 1)[1], []).append(key)
+
+    def resolve(task_key, dependency):
+        local = f"{task_key.split(':', 1)[0]}:{dependency}"
+        if local in keys:
+            return local
+        if dependency in keys:
+            return dependency
+        if len(by_id.get(dependency, [])) == 1:
+            return by_id[dependency][0]
+        if dependency in by_id:
+            raise ValueError(f"task '{task_key}' depends on '{dependency}', which several plans define "
+                             f"(use one of: {', '.join(sorted(by_id[dependency]))})")
+        raise ValueError(f"task '{task_key}' depends on unknown task '{dependency}'")
+
+    return resolve
+
+
+def load_plans(paths: list[str]) -> dict:
+    """
+    Read plan files and resolve the dependencies of their tasks.
+
+    Returns:
+        dict: {
+            'files': absolute plan file paths,
+            'tasks': {key: plan_task() record plus 'dependencies' (keys)} in file order,
+        }
+        where a task's key is `plan role:task id` and 'role' is the agent
+        that runs it (the task's 'assignee', else the plan's role).
+
+    Raises:
+        ValueError: if a file is not a plan, or a dependency is unknown or ambiguous.
+    """
+    files = []
+    tasks = {}
+    for path in paths:
+        path = os.path.abspath(path)
+        role, data = read_plan(path)
+        files.append(path)
+        for task in data['tasks']:
+            record = plan_task(role, path, task)
+            if record['key'] in tasks:
+                raise ValueError(f"duplicate task '{record['key']}'")
+            tasks[record['key']] = record
+    resolve = dependency_resolver(tasks)
+    for key, task in tasks.items():
+        task['dependencies'] = list(dict.fromkeys(resolve(key, dependency) for dependency in task['depends']))
+    return {'files': files, 'tasks': tasks}
+
+
+def task_instructions(task: dict, workspace: str) -> str:
+    """Return the assignment appended to the agent's instructions for one task."""
+    plan = os.path.relpath(task['plan'], workspace)
+    lines = [f"Task `{task['id']}` of `{plan}`: {task['description']}".rstrip(": ")]
+    dependencies = task['dependencies']
+    if dependencies:
+        lines += ["", f"Completed before this task: {', '.join(f'`{key}`' for key in dependencies)}."]
+    lines += ["", "Work on this task only. The runner records its status in the plan file when you finish; "
+                  "do not edit the task's status yourself."]
+    return "\n".join(lines)
+
+
+def task_workflow(plans: dict, workspace: str, files: list[str] | None = None) -> dict:
+    """
+    Return a workflow (see workflow.load_workflow()) with a stage per task
+    of `files` (default: all plan files) that is not completed, run by its
+    role in IMPLEMENTATION MODE. Completed dependencies are satisfied.
+    Tasks that depend on unfinished tasks outside `files` cannot run; they
+    are listed in the extra 'waiting' key.
+
+    Raises:
+        ValueError: on a dependency cycle.
+    """
+    tasks = plans['tasks']
+    selected = {os.path.abspath(path) for path in files or plans['files']}
+    stages = {}
+    waiting = []
+    for key in topological_order({key: {'needs': task['dependencies']} for key, task in tasks.items()}):
+        task = tasks[key]
+        if task['status'] == "completed" or task['plan'] not in selected:
+            continue
+        needs = [dependency for dependency in task['dependencies'] if tasks[dependency]['status'] != "completed"]
+        if any(dependency not in stages for dependency in needs):
+            waiting.append(key)
+            continue
+        stages[key] = {
+            'id': key,
+            'agent': task['role'],
+            'needs': needs,
+            'type': "implementation",
+            'task': task_instructions(task, workspace),
+            'outputs': [],
+        }
+    return {
+        'name': ", ".join(os.path.relpath(path, workspace) for path in plans['files'] if path in selected),
+        'path': None,
+        'stages': stages,
+        'order': list(stages),
+        'waiting': waiting,
+    }
+
+
+def apply_status(task: dict, status: str) -> None:
+    """Set the status of a plan task (as written in a plan file); completed tasks also get `completedAt`."""
+    task['status'] = status
+    if status == "completed":
+        task['completedAt'] = time.strftime("%Y-%m-%dT%H:%M:%SZ", time.gmtime())
+
+
+def format_plan(data: dict) -> str:
+    """Return plan file content for plan data."""
+    return json.dumps(data, indent=2, ensure_ascii=False) + "\n"
+
+
+def count_statuses(tasks) -> str:
+    """
+    Return a summary such as "3 pending, 1 completed" of the statuses of
+    `tasks` (task records, or a {status: count} dict).
+    """
+    if isinstance(tasks, dict):
+        counts = tasks
+    else:
+        counts = {}
+        for task in tasks:
+            counts[task['status']] = counts.get(task['status'], 0) + 1
+    order = {status: index for index, status in enumerate(TASK_STATUSES)}
+    return ", ".join(f"{count} {status}" for status, count in
+                     sorted(counts.items(), key=lambda item: (order.get(item[0], len(order)), item[0])))
@@ -0,0 +1,231 @@
+#!/usr/bin/env python3
+"""
+prompt_compaction.py
+
+Shrink an agent definition to a token budget using its section structure.
+
+Instead of cutting the text at a fixed character count (which tends to keep
+the boilerplate at the top and lose IMPLEMENTATION MODE at the bottom),
+compaction applies progressively lossier steps until the prompt fits:
+
+1. collapse example JSON blocks onto a single line,
+2. drop bullets repeated word for word, bullets of the Shared Capabilities
+   block whose key a mode section already has (the shared Constraints
+   mostly restate the per-mode ones) and `---` rules,
+3. drop whole sections, least important first (Mode Switching, MCP Tools,
+   Expected Outputs, ...), never the System Role or the mode headings,
+4. as a last resort, cut at a line boundary.
+
+Token counts are estimated from the character count.
+"""
+
+import json
+import re
+
+from agent_sections import parse_sections
+
+# Rough characters per token for English Markdown
+CHARS_PER_TOKEN = 4
+
+# Heading keyword -> priority; lower priorities are dropped first
+SECTION_PRIORITIES = [
+    ("system role", 100),
+    ("planning mode", 90),
+    ("implementation mode", 90),
+    ("workflow", 80),
+    ("constraints", 60),
+    ("expected outputs", 50),
+    ("mcp tools", 40),
+    ("shared capabilities", 30),
+    ("mode switching", 10),
+]
+DEFAULT_PRIORITY = 50
+# Sections at or above this priority are never dropped
+KEEP_PRIORITY = 90
+
+_JSON_FENCE = re.compile(r"```json[ \t]*\n(.*?)\n([ \t]*)```", re.DOTALL)
+_BULLET_KEY = re.compile(r"^\s*[-*]\s+\*\*(.+?)\*\*")
+_HEADING = re.compile(r"^(#{1,6})\s+(.*)")
+
+
+def estimate_tokens(text: str) -> int:
+    """Return an estimate of the number of tokens in `text`."""
+    return -(-len(text) // CHARS_PER_TOKEN)
+
+
+def section_priority(title: str) -> int:
+    """Return the keep priority of a section heading."""
+    title = title.lower()
+    for keyword, priority in SECTION_PRIORITIES:
+        if keyword in title:
+            return priority
+    return DEFAULT_PRIORITY
+
+
+def collapse_json_examples(content: str) -> tuple[str, int]:
+    """Rewrite fenced JSON examples as single-line JSON. Returns (content, number of blocks collapsed)."""
+    collapsed = []
+
+    def collapse(match):
+        try:
+            compact = json.dumps(json.loads(match.group(1)), separators=(',', ':'))
+        except ValueError:
+            return match.group(0)
+        indent = match.group(2)
+        block = f"```json\n{indent}{compact}\n{indent}```"
+        if block != match.group(0):
+            collapsed.append(block)
+        return block
+    return _JSON_FENCE.sub(collapse, content), len(collapsed)
+
+
+def _size(text: str) -> int:
+    return len(text.encode('utf-8'))
+
+
+def drop_repeated_bullets(content: str) -> tuple[str, list[str]]:
+    """
+    Remove `- **Key**: ...` bullets that repeat an earlier bullet word for
+    word, bullets of the Shared Capabilities block whose key an earlier
+    bullet has, and `---` separator lines. Returns (content, removed keys).
+    """
+    seen_keys = set()
+    seen_lines = set()
+    shared_level = None
+    removed = []
+    lines = []
+    for line in content.split('\n'):
+        if line.strip() == '---':
+            continue
+        heading = _HEADING.match(line)
+        if heading:
+            level = len(heading.group(1))
+            if shared_level is not None and level <= shared_level:
+                shared_level = None
+            if shared_level is None and "shared capabilities" in heading.group(2).lower():
+                shared_level = level
+        match = _BULLET_KEY.match(line)
+        if match:
+            key = match.group(1).strip().lower()
+            normalized = " ".join(line.split()).lower()
+            if normalized in seen_lines or (shared_level is not None and key in seen_keys):
+                removed.append(match.group(1).strip())
+                continue
+            seen_keys.add(key)
+            seen_lines.add(normalized)
+        lines.append(line)
+    return re.sub(r"\n{3,}", "\n\n", '\n'.join(lines)), removed
+
+
+def drop_empty_sections(content: str) -> str:
+    """Remove headings left without any body text or subsections."""
+    while True:
+        empty = [node for node in parse_sections(content)['sections']
+                 if not node['children'] and node['level'] > 1
+                 and not content[node['body_start']:node['end']].strip()]
+        if not empty:
+            return content
+        for node in reversed(empty):
+            content = content[:node['start']] + content[node['end']:]
+
+
+def _drop_candidate(content: str) -> dict | None:
+    """Return the droppable leaf section with the lowest priority (the last one on ties)."""
+    candidates = [node for node in parse_sections(content)['sections']
+                  if node['level'] > 1 and not node['children']
+                  and section_priority(node['title']) < KEEP_PRIORITY]
+    if not candidates:
+        return None
+    return min(reversed(candidates), key=lambda node: section_priority(node['title']))
+
+
+def compact_prompt(content: str, budget_tokens: int | None) -> dict:
+    """
+    Fit an agent definition into `budget_tokens` (None: no limit).
+
+    Returns:
+        dict: {
+            'text': compacted content,
+            'tokens': estimated tokens of 'text',
+            'original_tokens': estimated tokens of `content`,
+            'budget': budget_tokens,
+            'dropped': titles of the removed sections,
+            'collapsed': number of JSON examples collapsed,
+            'repeated': keys of the removed repeated bullets,
+            'saved_bytes': {'collapsed': bytes, 'repeated': bytes} saved by those two steps,
+            'steps': names of the applied steps,
+        }
+    """
+    report = {
+        'text': content,
+        'tokens': estimate_tokens(content),
+        'original_tokens': estimate_tokens(content),
+        'budget': budget_tokens,
+        'dropped': [],
+        'collapsed': 0,
+        'repeated': [],
+        'saved_bytes': {'collapsed': 0, 'repeated': 0},
+        'steps': [],
+    }
+
+    def fits(text):
+        return budget_tokens is None or estimate_tokens(text) <= budget_tokens
+
+    def done(text):
+        report['text'] = text
+        report['tokens'] = estimate_tokens(text)
+        return report
+
+    text = content
+    if fits(text):
+        return done(text)
+
+    collapsed, report['collapsed'] = collapse_json_examples(text)
+    if collapsed != text:
+        report['saved_bytes']['collapsed'] = _size(text) - _size(collapsed)
+        text = collapsed
+        report['steps'].append("collapsed JSON examples")
+        if fits(text):
+            return done(text)
+
+    deduped, repeated = drop_repeated_bullets(text)
+    deduped = drop_empty_sections(deduped)
+    if deduped != text:
+        report['repeated'] = repeated
+        report['saved_bytes']['repeated'] = _size(text) - _size(deduped)
+        text = deduped
+        report['steps'].append(f"removed {len(repeated)} repeated bullet(s)")
+        if fits(text):
+            return done(text)
+
+    while not fits(text):
+        node = _drop_candidate(text)
+        if node is None:
+            break
+        report['dropped'].append(node['title'])
+        text = drop_empty_sections(text[:node['start']] + text[node['end']:])
+    if report['dropped']:
+        report['steps'].append(f"dropped {len(report['dropped'])} section(s)")
+
+    if not fits(text):
+        limit = budget_tokens * CHARS_PER_TOKEN
+        cut = text.rfind('\n', 0, limit)
+        text = text[:cut if cut > 0 else limit]
+        report['steps'].append("truncated")
+    return done(text)
+
+
+def format_report(report: dict) -> str:
+    """Return a one-line summary of a compact_prompt() report."""
+    summary = f"compacted prompt {report['original_tokens']:,} -> {report['tokens']:,} tokens (budget {report['budget']:,})"
+    if report['collapsed']:
+        summary += (f"; collapsed {report['collapsed']} JSON example(s) "
+                    f"(-{report['saved_bytes']['collapsed']:,} B)")
+    if report['saved_bytes']['repeated']:
+        summary += (f"; removed {len(report['repeated'])} repeated bullet(s) and separators "
+                    f"(-{report['saved_bytes']['repeated']:,} B)")
+    if report['dropped']:
+        summary += f"; dropped: {', '.join(report['dropped'])}"
+    if "truncated" in report['steps']:
+        summary += "; truncated"
+    return summary
@@ -0,0 +1,126 @@
+#!/usr/bin/env python3
+"""
+prompt_delivery.py
+
+Choose how an agent prompt is handed to a CLI process.
+
+Passing the whole context as a command-line argument copies it through
+exec, shows it in /proc/*/cmdline and fails with E2BIG once a single
+argument exceeds the kernel limit (128 KiB on Linux). Small prompts still
+go on argv; larger ones are piped on stdin or written to a prompt file
+whose path is passed instead, depending on what the CLI supports. The
+prompt file is written inside the workspace (PROMPT_DIR), because CLIs
+scope their file tools to the workspace: gemini's read_file refuses paths
+outside it and claude asks for permission first.
+
+    channel = choose_channel(prompt, adapter.PROMPT_CHANNELS)
+    with open_prompt(prompt, channel, workspace) as delivery:
+        cmd = adapter.batch_command(job, delivery['arg'])
+"""
+
+import os
+import sys
+from contextlib import contextmanager
+
+# Channels in order of preference for prompts too large for argv
+CHANNELS = ("argv", "stdin", "file")
+
+# Prompts up to this many bytes are passed on argv
+ARGV_PROMPT_LIMIT = int(os.environ.get("CAPSTONE_AGENTS_ARGV_LIMIT", 32 * 1024))
+
+# Largest single argument the Linux kernel accepts (MAX_ARG_STRLEN)
+MAX_ARG_BYTES = 128 * 1024
+
+# Argument passed instead of the prompt when it is delivered as a file
+FILE_PROMPT = "Read the file {path} and follow the instructions in it as your complete prompt."
+
+# Workspace directory for prompt files; removed again once empty
+PROMPT_DIR = ".capstone-agents"
+
+
+def choose_channel(prompt: str, supported, interactive: bool = False,
+                   limit: int | None = None, preferred: str = "auto") -> str:
+    """
+    Return the channel ("argv", "stdin" or "file") to deliver `prompt` over.
+
+    Args:
+        prompt: Prompt text
+        supported: Channels the CLI accepts (adapter.PROMPT_CHANNELS)
+        interactive: stdin belongs to the user's terminal, so it is never chosen
+        limit: Largest prompt in bytes kept on argv (default: ARGV_PROMPT_LIMIT)
+        preferred: A channel to use when supported, or "auto"
+    """
+    usable = [channel for channel in CHANNELS
+              if channel in supported and not (interactive and channel == "stdin")]
+    if preferred != "auto":
+        if preferred in usable:
+            return preferred
+        print(f"Warning: prompt channel '{preferred}' is not supported here; choosing automatically.",
+              file=sys.stderr)
+    if limit is None:
+        limit = ARGV_PROMPT_LIMIT
+    size = len(prompt.encode('utf-8'))
+    if "argv" in usable and size <= limit:
+        return "argv"
+    for channel in ("stdin", "file"):
+        if channel in usable:
+            return channel
+    if size > MAX_ARG_BYTES:
+        print(f"Warning: {size:,} byte prompt exceeds the argument limit and the CLI accepts no other channel.",
+              file=sys.stderr)
+    return "argv"
+
+
+def _write_all(fd: int, data: bytes) -> None:
+    view = memoryview(data)
+    while view:
+        view = view[os.write(fd, view):]
+
+
+@contextmanager
+def prompt_file(prompt: str, workspace: str):
+    """
+    Yield the absolute path of a private file in `workspace`/PROMPT_DIR
+    holding `prompt`. The file is removed on exit, and the directory too
+    once no other run is using it.
+    """
+    directory = os.path.join(os.path.abspath(workspace), PROMPT_DIR)
+    os.makedirs(directory, exist_ok=True)
+    path = os.path.join(directory, f"prompt-{os.getpid()}-{os.urandom(4).hex()}.md")
+    fd = os.open(path, os.O_WRONLY | os.O_CREAT | os.O_EXCL, 0o600)
+    try:
+        _write_all(fd, prompt.encode('utf-8'))
+        os.close(fd)
+        yield path
+    finally:
+        for remove, target in ((os.unlink, path), (os.rmdir, directory)):
+            try:
+                remove(target)
+            except OSError:
+                # Already gone, or the directory still holds another run's prompt
+                pass
+
+
+@contextmanager
+def open_prompt(prompt: str, channel: str, workspace: str = "."):
+    """
+    Prepare `prompt` for delivery over `channel`; a prompt file is written in `workspace`.
+
+    Yields a dict: {
+        'channel': the channel,
+        'arg': text to put on the command line, or None for stdin,
+        'stdin': text to write to the process's stdin, or None,
+        'bytes': size of the prompt,
+    }
+    """
+    delivery = {'channel': channel, 'arg': None, 'stdin': None, 'bytes': len(prompt.encode('utf-8'))}
+    if channel == "stdin":
+        delivery['stdin'] = prompt
+        yield delivery
+    elif channel == "file":
+        with prompt_file(prompt, workspace) as path:
+            delivery['arg'] = FILE_PROMPT.format(path=path)
+            yield delivery
+    else:
+        delivery['arg'] = prompt
+        yield delivery
@@ -0,0 +1,265 @@
+#!/usr/bin/env python3
+"""
+role_ranking.py
+
+Rank agent roles by how relevant they are to a task description, so a
+multi-agent context can ship only the roles a task needs.
+
+Each role is one document, the System Role (or Role Description) section
+of its agent definition(s), scored against the task with Okapi BM25. The
+rest of a definition is left out: MCP tool lists and template boilerplate
+("fetch: API endpoint testing" in qa) would otherwise outweigh the one
+line that says what the role is responsible for. Sentences every role
+shares get a low inverse document frequency and barely affect the ranking.
+The role name is scored as a separate, boosted field, so a task
+mentioning "design" finds the designer even though every definition talks
+about design. Task terms are expanded with SYNONYMS, so "REST endpoint"
+finds the role responsible for "API development".
+
+    ranked = rank_roles(library, "add a REST endpoint for invoices")
+    roles = top_roles(ranked, 3)
+
+`python scripts/role_ranking.py --check` verifies the EXAMPLES against the
+agents tree.
+"""
+
+import argparse
+import math
+import os
+import re
+import sys
+from collections import Counter
+
+from agent_library import load_library, read_content, select_agents
+from agent_sections import section_body
+
+# BM25 parameters (term frequency saturation, length normalization)
+K1 = 1.2
+B = 0.75
+
+# Weight of a query term matching the role name, relative to the definition
+NAME_BOOST = 2.0
+
+STOPWORDS = frozenset("""
+a an and are as at be by can do for from has have how i in is it its of on or our should so that the
+their them then there these this to use using was we were what when which will with you your
+""".split())
+
+# Sections describing what a role does (unified agents, then legacy/coordinator files)
+DESCRIPTION_SECTIONS = ("system role", "role description")
+
+# Task term -> words of the role descriptions it stands for
+SYNONYMS = {
+    "endpoint": "api server",
+    "rest": "api",
+    "graphql": "api",
+    "route": "api server",
+    "backend": "server",
+    "page": "interface",
+    "layout": "interface",
+    "button": "interface",
+    "component": "interface",
+    "css": "interface",
+    "ui": "interface",
+    "ux": "experience",
+    "mockup": "wireframing prototyping",
+    "sql": "database",
+    "migration": "database schema",
+    "query": "database optimization",
+    "deploy": "deployment",
+    "docker": "containerization",
+    "kubernetes": "containerization infrastructure",
+    "ci": "pipelines",
+    "readme": "documentation",
+    "docs": "documentation",
+    "tests": "testing",
+    "test": "testing",
+    "solidity": "smart contract blockchain",
+    "deadline": "timelines",
+    "milestone": "timelines progress",
+    "architecture": "architectural",
+}
+
+# Tasks and the role rank_roles() must put first for the shipped agents (--check)
+EXAMPLES = [
+    ("add invoice endpoints to the REST API", "backend"),
+    ("add a REST endpoint for invoices", "backend"),
+    ("fix the login page layout", "frontend"),
+    ("write a migration for the orders table", "database-engineer"),
+    ("deploy the service with docker", "devops"),
+    ("write tests for the checkout flow", "qa"),
+    ("update the README", "documentation"),
+]
+
+# Suffixes stripped from terms (longest first), so "designer", "designs" and "design" match
+SUFFIXES = ("ations", "ation", "ments", "ment", "ings", "ing", "ers", "er", "ed", "es", "s")
+MIN_STEM = 4
+
+_WORD = re.compile(r"[a-z0-9]+")
+
+
+def stem(word: str) -> str:
+    """Strip a common English suffix from `word`, keeping at least MIN_STEM characters."""
+    for suffix in SUFFIXES:
+        if word.endswith(suffix) and len(word) - len(suffix) >= MIN_STEM and not word.endswith("ss"):
+            return word[:-len(suffix)]
+    return word
+
+
+def tokenize(text: str) -> list[str]:
+    """Return the stemmed, lowercased terms of `text` without stopwords."""
+    return [stem(word) for word in _WORD.findall(text.lower()) if word not in STOPWORDS]
+
+
+def expand_query(task: str) -> list[str]:
+    """Return the terms of `task` plus the terms of their SYNONYMS."""
+    words = _WORD.findall(task.lower())
+    return tokenize(" ".join(words + [SYNONYMS[word] for word in words if word in SYNONYMS]))
+
+
+def role_description(content: str) -> str:
+    """Return the section of an agent definition that describes the role (the whole text if there is none)."""
+    for title in DESCRIPTION_SECTIONS:
+        body = section_body(content, title)
+        if body:
+            return body
+    return content
+
+
+def role_documents(library: dict, roles: list[str] | None = None) -> dict[str, str]:
+    """Return {role: text} with the role descriptions of each role's context files."""
+    documents = {}
+    for agent in select_agents(library, roles):
+        content = read_content(library, agent['filepath']) or ""
+        documents[agent['role']] = documents.get(agent['role'], "") + "\n" + role_description(content)
+    return documents
+
+
+def build_index(documents: dict[str, str]) -> dict:
+    """
+    Build a BM25 index of {name: text}.
+
+    Returns:
+        dict: {
+            'terms': {name: Counter of term frequencies},
+            'lengths': {name: number of terms},
+            'avg_length': mean document length,
+            'df': Counter of the number of documents containing each term,
+            'names': {name: set of the terms of the name},
+            'name_df': Counter of the number of names containing each term,
+        }
+    """
+    terms = {name: Counter(tokenize(text)) for name, text in documents.items()}
+    names = {name: set(tokenize(name.replace("-", " "))) for name in documents}
+    lengths = {name: sum(counts.values()) for name, counts in terms.items()}
+    df = Counter()
+    for counts in terms.values():
+        df.update(counts.keys())
+    name_df = Counter()
+    for name_terms in names.values():
+        name_df.update(name_terms)
+    return {
+        'terms': terms,
+        'lengths': lengths,
+        'avg_length': sum(lengths.values()) / len(lengths) if lengths else 0.0,
+        'df': df,
+        'names': names,
+        'name_df': name_df,
+    }
+
+
+def _idf(total: int, df: int) -> float:
+    return math.log(1 + (total - df + 0.5) / (df + 0.5))
+
+
+def bm25_scores(index: dict, query: str) -> dict[str, float]:
+    """Return {name: BM25 score of `query`} for every document in the index."""
+    total = len(index['terms'])
+    query_terms = set(expand_query(query))
+    scores = {}
+    for name, counts in index['terms'].items():
+        norm = K1 * (1 - B + B * index['lengths'][name] / (index['avg_length'] or 1))
+        score = 0.0
+        for term in query_terms:
+            tf = counts.get(term, 0)
+            if tf:
+                score += _idf(total, index['df'][term]) * tf * (K1 + 1) / (tf + norm)
+            if term in index['names'][name]:
+                score += NAME_BOOST * _idf(total, index['name_df'][term])
+        scores[name] = score
+    return scores
+
+
+def rank_roles(library: dict, task: str, roles: list[str] | None = None) -> list[tuple[str, float]]:
+    """Return (role, score) pairs for `task`, most relevant first (ties by role name)."""
+    scores = bm25_scores(build_index(role_documents(library, roles)), task)
+    return sorted(scores.items(), key=lambda item: (-item[1], item[0]))
+
+
+def top_roles(ranked: list[tuple[str, float]], count: int, always: list[str] | None = None) -> list[str]:
+    """
+    Return the `count` best-ranked roles that match the task at all, plus
+    the roles in `always`. Returns [] if no role matches.
+    """
+    selected = [role for role, score in ranked if score > 0][:count]
+    if not selected:
+        return []
+    for role in always or []:
+        if role not in selected:
+            selected.append(role)
+    return selected
+
+
+def check_examples(library: dict) -> list[str]:
+    """Return a message for every EXAMPLES task whose best-ranked role is not the expected one."""
+    failures = []
+    for task, expected in EXAMPLES:
+        if expected not in library['roles']:
+            continue
+        ranked = rank_roles(library, task)
+        if ranked[0][0] != expected or ranked[0][1] <= 0 or (len(ranked) > 1 and ranked[1][1] == ranked[0][1]):
+            found = ", ".join(f"{role} {score:.2f}" for role, score in ranked[:3])
+            failures.append(f"'{task}': expected {expected} first, got {found}")
+    return failures
+
+
+def main():
+    parser = argparse.ArgumentParser(
+        description="Rank agent roles by relevance to a task description",
+        formatter_class=argparse.RawDescriptionHelpFormatter,
+        epilog="""
+Examples:
+  # Show the ranking for a task
+  python scripts/role_ranking.py "add invoice endpoints to the REST API"
+
+  # Verify the documented example tasks rank the expected role first
+  python scripts/role_ranking.py --check
+        """
+    )
+    parser.add_argument("task", nargs="?",
+                        help="Task description to rank the roles against")
+    parser.add_argument("--agents-dir",
+                        help="Custom path to agents directory")
+    parser.add_argument("--check", action="store_true",
+                        help="Exit with status 1 if an example task does not rank its expected role first")
+
+    args = parser.parse_args()
+    if not args.task and not args.check:
+        parser.error("give a task description or --check")
+    agents_dir = args.agents_dir or os.path.join(os.path.dirname(os.path.dirname(os.path.abspath(__file__))), "agents")
+    library = load_library(agents_dir)
+
+    if args.task:
+        for role, score in rank_roles(library, args.task):
+            print(f"  {role:<22} {score:.2f}")
+    if args.check:
+        failures = check_examples(library)
+        for failure in failures:
+            print(f"Ranking check failed: {failure}", file=sys.stderr)
+        if failures:
+            sys.exit(1)
+        print(f"All {len(EXAMPLES)} ranking examples rank the expected role first.")
+
+
+if __name__ == "__main__":
+    main()
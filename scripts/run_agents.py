@@ -1,42 +1,43 @@
-import argparse
 import os
-import re
-import signal
-import subprocess
 import sys
-import threading
 import time
-from concurrent.futures import ThreadPoolExecutor
-
-# PTY support for TUI-based CLIs (Unix/Mac/WSL)
-HAS_PTY = False
-try:
-    import pty
-    HAS_PTY = True
-except ImportError:
-    pass  # Windows native doesn't have pty module
-
-# Select support for non-blocking stdin (Unix/WSL)
-HAS_SELECT = False
-try:
-    import select
-    HAS_SELECT = True
-except ImportError:
-    pass  # Windows native doesn't have select module
+
+# Start of the project-module imports, reported as a span by --trace
+_IMPORT_START = time.perf_counter()
+
+# Only what --list needs is imported at startup. argparse, subprocess,
+# threading, the batch output helpers and the multi-agent context
+# generator are imported by the code paths that use them.
 
 # Path to the capstone-agents repository (where agent definitions live)
 CAPSTONE_AGENTS_DIR = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
 
-# Import multi-agent context generator
-try:
-    from generate_context import get_multi_agent_context
-except ImportError:
-    # Fallback if not run from scripts dir
-    def get_multi_agent_context(workspace, agents_dir=None):
+# Default maximum wall time of a single batch run, in seconds (--timeout)
+BATCH_TIMEOUT = 600
+
+# Timing spans for --trace
+import tracing  # noqa: E402
+
+# Registry index of the agents tree (agents/index.json)
+from agent_registry import load_registry, role_path  # noqa: E402
+
+_IMPORT_END = time.perf_counter()
+
+
+def get_multi_agent_context(workspace, agents_dir=None, mode=None, layout="default", roles=None, stack_filter=None,
+                            keep=(), stack_depth=None):
+    """Build the multi-agent context; generate_context.py is imported on first use."""
+    try:
+        from generate_context import get_multi_agent_context as build_context
+    except ImportError:
+        # Fallback if not run from scripts dir
         print("Warning: generate_context.py not found, multi-agent mode unavailable.")
         return None
+    return build_context(workspace, agents_dir, roles, mode=mode, layout=layout, stack_filter=stack_filter, keep=keep,
+                         stack_depth=stack_depth)
 
 
+@tracing.traced
 def read_agent_file(agent_file):
     """Read and return the content of an agent file."""
     try:
@@ -49,6 +50,7 @@ def read_agent_file(agent_file):
 
 def cleanup_process(p):
     """Cleanly terminate subprocess"""
+    import subprocess
     if p and p.poll() is None:
         try:
             p.terminate()
@@ -63,40 +65,9 @@ def cleanup_process(p):
             pass
 
 
-def copy_to_clipboard(text):
-    """Copy text to system clipboard."""
-    import platform
-    system = platform.system()
-    
-    # Detect WSL (Windows Subsystem for Linux)
-    is_wsl = False
-    if system == "Linux":
-        try:
-            with open("/proc/version", "r") as f:
-                is_wsl = "microsoft" in f.read().lower()
-        except Exception:
-            pass
-    
-    try:
-        if system == "Darwin":  # macOS
-            subprocess.run(["pbcopy"], input=text.encode(), check=True)
-        elif system == "Linux" and is_wsl:
-            # WSL: use Windows clip.exe
-            subprocess.run(["clip.exe"], input=text.encode(), check=True)
-        elif system == "Linux":
-            # Native Linux: try xclip first, then xsel
-            try:
-                subprocess.run(["xclip", "-selection", "clipboard"], input=text.encode(), check=True)
-            except FileNotFoundError:
-                subprocess.run(["xsel", "--clipboard", "--input"], input=text.encode(), check=True)
-        elif system == "Windows":
-            subprocess.run(["clip"], input=text.encode(), check=True, shell=True)
-        return True
-    except Exception:
-        return False
-
-
-def get_agent_context(context_mode, agent_name, agent_file, workspace, agents_dir):
+@tracing.traced
+def get_agent_context(context_mode, agent_name, agent_file, workspace, agents_dir, mode=None, layout="default",
+                      roles=None, stack_filter=None, stack_depth=None):
     """
     Get the agent context based on the context mode.
     
@@ -106,12 +77,19 @@ def get_agent_context(context_mode, agent_name, agent_file, workspace, agents_di
         agent_file: Path to the specific agent file
         workspace: Path to the workspace
         agents_dir: Path to agents directory
+        mode: 'planning' or 'implementation' to load only that mode of unified agents
+        layout: 'stable' to put the workspace after the agent material (see context_layout.py)
+        roles: Roles to include in the multi-agent context (default: all)
+        stack_filter: 'drop' or 'demote' roles the workspace stack does not need (multi-agent context)
+        stack_depth: Directories deep the workspace stack is detected (default: workspace_stack.DEFAULT_DEPTH)
     
     Returns:
         tuple: (context_string, is_multi_agent)
     """
     if context_mode == 'multi':
-        multi_context = get_multi_agent_context(workspace, agents_dir)
+        with tracing.span("get_multi_agent_context"):
+            multi_context = get_multi_agent_context(workspace, agents_dir, mode, layout, roles, stack_filter,
+                                                    [agent_name], stack_depth)
         if multi_context:
             return multi_context, True
         else:
@@ -120,18 +98,18 @@ def get_agent_context(context_mode, agent_name, agent_file, workspace, agents_di
     # Single agent mode (or fallback)
     agent_content = read_agent_file(agent_file)
     if agent_content:
-        prompt = f"""You are now acting as the following agent. Read and internalize these instructions:
-
-{agent_content}
+        from agent_sections import slice_mode
+        from cli_adapters.common import agent_prompt
 
----
-You are now the {agent_name} agent. Working directory: {workspace}
-Begin your workflow."""
-        return prompt, False
+        agent_content = slice_mode(agent_content, mode)
+        return agent_prompt(agent_content, agent_name, workspace, layout), False
     return None, False
 
 
-def run_agent_interactive(agent_name, agent_file, cli_tool, workspace, context_mode, agents_dir, auto_approve=False):
+@tracing.traced
+def run_agent_interactive(agent_name, agent_file, cli_tool, workspace, context_mode, agents_dir, auto_approve=False,
+                          prompt_via="auto", mode=None, layout="default", roles=None, stack_filter=None,
+                          stack_depth=None):
     """Run an agent in interactive mode - gives you full control of the CLI.
     
     Args:
@@ -142,7 +120,24 @@ def run_agent_interactive(agent_name, agent_file, cli_tool, workspace, context_m
         context_mode: 'single' or 'multi'
         agents_dir: Path to agents directory
         auto_approve: Whether to auto-approve actions
+        prompt_via: Channel for the context ('argv', 'file') or 'auto' to choose by size
+        mode: 'planning' or 'implementation' to load only that mode of unified agents
+        layout: Context layout ('default' or 'stable')
+        roles: Roles to include in the multi-agent context (default: all)
+        stack_filter: 'drop' or 'demote' roles the workspace stack does not need
+        stack_depth: Directories deep the workspace stack is detected
     """
+    import subprocess
+
+    from prompt_delivery import choose_channel, open_prompt
+
+    from cli_adapters import get_adapter
+
+    adapter = get_adapter(cli_tool)
+    if adapter is None or not adapter.SUPPORTS_INTERACTIVE:
+        print(f"[{agent_name}] CLI '{cli_tool}' not supported for interactive mode.")
+        return
+
     print(f"[{agent_name}] Launching interactive session...")
     print(f"[{agent_name}] Workspace: {workspace}")
     print(f"[{agent_name}] Agent: {agent_file}")
@@ -155,275 +150,514 @@ def run_agent_interactive(agent_name, agent_file, cli_tool, workspace, context_m
         return
     
     # Get agent context based on mode
-    context, is_multi = get_agent_context(context_mode, agent_name, agent_file, workspace, agents_dir)
+    context, is_multi = get_agent_context(context_mode, agent_name, agent_file, workspace, agents_dir, mode, layout,
+                                          roles, stack_filter, stack_depth)
     if not context:
         print(f"[{agent_name}] Failed to load agent context.")
         return
     
     if is_multi:
-        print(f"[{agent_name}] Loaded multi-agent context (use @triggers to switch agents)")
+        print(f"[{agent_name}] Loaded multi-agent context, {len(context):,} chars (use @triggers to switch agents)")
     else:
         print(f"[{agent_name}] Loaded single agent context")
+    if layout == "stable":
+        from context_layout import describe_prefix
+
+        print(f"[{agent_name}] Context {describe_prefix(context)}")
     
-    cmd = []
-    
-    if cli_tool == "gemini":
-        # Gemini CLI: interactive mode with agent context
-        cmd = ["gemini", "-i", context]
-        
-    elif cli_tool == "cursor":
-        # Cursor Agent CLI (cursor-agent command)
-        # We copy agent instructions to clipboard for easy pasting
-        clipboard_success = copy_to_clipboard(context)
-        
-        print(f"[{agent_name}] Starting cursor-agent...")
-        if clipboard_success:
-            print(f"[{agent_name}] Agent instructions copied to clipboard!")
-            print(f"[{agent_name}] >>> Paste with Ctrl+V (or Cmd+V) in the chat")
-        else:
-            print(f"[{agent_name}] Could not copy to clipboard. Manual load:")
-        print(f"[{agent_name}]     @{agent_file} follow these instructions")
-        print("-" * 60)
-        
-        os.chdir(workspace)
-        try:
-            os.execvp("cursor-agent", ["cursor-agent"])
-        except FileNotFoundError:
-            print(f"[{agent_name}] cursor-agent not found. Is it installed and in PATH?")
-            print(f"[{agent_name}] Install with: npm install -g cursor-agent")
-        except Exception as e:
-            print(f"[{agent_name}] Failed to start cursor-agent: {e}")
-        return
-        
-    elif cli_tool == "cursor-ide":
-        # Cursor IDE: open the workspace (not CLI)
-        # Copy context to clipboard for pasting
-        clipboard_success = copy_to_clipboard(context)
-        if clipboard_success:
-            print(f"[{agent_name}] Agent instructions copied to clipboard!")
-        cmd = ["cursor", workspace]
-        print(f"[{agent_name}] Cursor IDE will open. Use Ctrl+I to open Composer.")
-        print(f"[{agent_name}] Paste the agent instructions (already in clipboard).")
-        
-    elif cli_tool == "codex":
-        # OpenAI Codex CLI
-        cmd = ["codex", context]
-        
-    elif cli_tool == "claude":
-        # Claude CLI
-        cmd = ["claude", context]
-        
-    elif cli_tool == "copilot-cli":
-        # GitHub Copilot CLI
-        print(f"[{agent_name}] Starting GitHub Copilot CLI session...")
-        if sys.platform == "win32":
-            print(f"[{agent_name}] Note: Windows PowerShell support is experimental. WSL recommended.")
-        
-        # Step 1: Initialize agent context with one-shot prompt
-        print(f"[{agent_name}] Initializing agent context...")
-        try:
-            # Append safety instruction to prevent auto-execution
-            safety_notice = "\n\nIMPORTANT: Do NOT execute any pending tasks immediately. Simply reply 'IAmReady' to acknowledge you have received these instructions. Wait for the user to issue a specific command."
-            
-            subprocess.run(
-                ["copilot", "-p", context + safety_notice],
-                cwd=workspace,
-                stdin=sys.stdin,
-                stdout=sys.stdout,
-                stderr=sys.stderr,
-                check=True
-            )
-        except subprocess.CalledProcessError as e:
-            print(f"[{agent_name}] Initialization failed with exit code {e.returncode}")
+    channel = "argv"
+    if adapter.PROMPT_DELIVERY == "cli":
+        channel = choose_channel(context, adapter.PROMPT_CHANNELS, interactive=True, preferred=prompt_via)
+    with open_prompt(context, channel, workspace) as delivery:
+        if channel != "argv":
+            print(f"[{agent_name}] Context is {delivery['bytes']:,} bytes; passing it via {channel}")
+        cmd = adapter.interactive_command({
+            'agent_name': agent_name,
+            'agent_file': agent_file,
+            'workspace': workspace,
+            'context': context,
+            'prompt_arg': delivery['arg'],
+            'is_multi': is_multi,
+            'auto_approve': auto_approve,
+            'layout': layout,
+        })
+        if not cmd:
+            # The adapter handed over (or failed to hand over) the session itself
             return
-        except Exception as e:
-            print(f"[{agent_name}] Failed to initialize: {e}")
-            return
-        
-        # Step 2: Continue with interactive session
-        print("-" * 60)
-        print(f"[{agent_name}] Continuing interactive session (Ctrl+C to exit)...")
-        print("-" * 60)
-        cmd = ["copilot", "--continue"]
-        
-    elif cli_tool == "rovodev":
-        # RovoDev CLI: interactive mode
-        print(f"[{agent_name}] Starting RovoDev CLI session...")
-        if sys.platform == "win32":
-            print(f"[{agent_name}] Note: Windows PowerShell support is experimental. WSL recommended.")
-        
-        # Copy to clipboard for easy pasting
-        clipboard_success = copy_to_clipboard(context)
-        
-        print(f"[{agent_name}] Starting RovoDev CLI...")
-        if clipboard_success:
-            print(f"[{agent_name}] Agent instructions copied to clipboard!")
-            print(f"[{agent_name}] >>> Paste with Ctrl+V (or Cmd+V) in the RovoDev prompt")
-        else:
-            print(f"[{agent_name}] Could not copy to clipboard. Manual load:")
-            print(f"[{agent_name}]     {context[:200]}...")
-        print("-" * 60)
-        
-        os.chdir(workspace)
+        if adapter.NEEDS_PTY and not sys.stdin.isatty():
+            print(f"[{agent_name}] Warning: '{cli_tool}' expects an interactive terminal but stdin is not a TTY.", file=sys.stderr)
+
         try:
-            os.execvp("acli", ["acli", "rovodev", "run"])
+            # Run interactively - explicit stdin/stdout/stderr for proper TTY handling
+            with tracing.span("cli_session", cli=cmd[0], channel=channel):
+                subprocess.run(cmd, cwd=workspace, stdin=sys.stdin, stdout=sys.stdout, stderr=sys.stderr)
         except FileNotFoundError:
-            print(f"[{agent_name}] acli not found. Is it installed and in PATH?")
-            print(f"[{agent_name}] Install with: npm install -g @atlassian/rovo-dev-cli")
+            print(f"[{agent_name}] CLI tool '{cmd[0]}' not found. Is it installed and in PATH?")
+        except KeyboardInterrupt:
+            print(f"\n[{agent_name}] Session ended.")
         except Exception as e:
-            print(f"[{agent_name}] Failed to start RovoDev: {e}")
-        return
-        
-    elif cli_tool == "vscode":
-        # VS Code: open workspace and copy to clipboard
-        clipboard_success = copy_to_clipboard(context)
-        print(f"[{agent_name}] === VS Code Copilot Instructions ===")
-        if clipboard_success:
-            print(f"[{agent_name}] Agent instructions copied to clipboard!")
-        print(f"[{agent_name}] 1. Open Copilot Chat (Ctrl+Shift+I)")
-        print(f"[{agent_name}] 2. Paste the agent instructions (Ctrl+V)")
-        cmd = ["code", workspace]
-        
-    elif cli_tool == "antigravity":
-        # Antigravity IDE: Prepare prompt for user to paste
-        clipboard_success = copy_to_clipboard(context)
-        
-        print(f"[{agent_name}] === Antigravity IDE Instructions ===")
-        if clipboard_success:
-            print(f"[{agent_name}] Agent instructions copied to clipboard!")
-            print(f"[{agent_name}] >>> Paste with Ctrl+V into your Antigravity session.")
-        else:
-            print(f"[{agent_name}] Could not copy to clipboard.")
-            print(f"[{agent_name}] Manually copy instructions from: {agent_file}")
-        print("-" * 60)
-        if not is_multi:
-            print("Tip: Use --context-mode multi for full @-mention support")
-        return
+            print(f"[{agent_name}] Failed to start: {e}")
 
-    elif cli_tool == "qwen":
-        # Qwen CLI: interactive mode
-        print(f"[{agent_name}] Starting Qwen CLI session...")
-        # Qwen CLI chat mode
-        # Based on help: -i/--prompt-interactive Execute the provided prompt and continue in interactive mode
-        cmd = ["qwen", "-i", context]
-        
-    else:
-        print(f"[{agent_name}] CLI '{cli_tool}' not supported for interactive mode.")
-        return
 
-    try:
-        # Run interactively - explicit stdin/stdout/stderr for proper TTY handling
-        subprocess.run(cmd, cwd=workspace, stdin=sys.stdin, stdout=sys.stdout, stderr=sys.stderr)
-    except FileNotFoundError:
-        print(f"[{agent_name}] CLI tool '{cmd[0]}' not found. Is it installed and in PATH?")
-    except KeyboardInterrupt:
-        print(f"\n[{agent_name}] Session ended.")
-    except Exception as e:
-        print(f"[{agent_name}] Failed to start: {e}")
+def _batch_result(agent_name, status, exit_code=None, elapsed=0.0, output_bytes=0):
+    """Build the per-agent result record reported in the batch summary."""
+    from batch_output import batch_result
 
+    return batch_result(agent_name, status, exit_code, elapsed, output_bytes)
+
+
+@tracing.traced
+def run_agent_batch(agent_name, agent_file, cli_tool, workspace, auto_approve=False, log_dir=None,
+                    prompt_via="auto", mode=None, layout="default", timeout=BATCH_TIMEOUT, journal=None):
+    """Run an agent in batch mode - auto-executes and exits.
+
+    Output is streamed line by line with an `[agent]` prefix while the CLI
+    runs. Large outputs are spilled to a per-run log file in `log_dir`.
+    The prompt goes over argv, stdin or a prompt file: `prompt_via`, or
+    chosen by size when 'auto'. With `mode`, unified agent files are cut
+    down to that mode. The 'stable' `layout` asks the adapter to put the
+    workspace after the agent instructions and reports the prompt's prefix hash.
+    The CLI is killed after `timeout` seconds (None: no limit). With a run
+    `journal` (run_journal.py), a run that already succeeded with the same
+    inputs is skipped, and the run is recorded when it ends.
+
+    Returns:
+        dict: Result record with 'agent', 'status', 'exit_code', 'elapsed' and 'output_bytes'.
+    """
+    with prepare_batch(agent_name, agent_file, cli_tool, workspace, auto_approve, prompt_via, mode,
+                       layout) as prepared:
+        if 'result' in prepared:
+            return prepared['result']
+        inputs, resumed = _check_journal(journal, agent_name, cli_tool, auto_approve, prepared['prompt'], workspace)
+        if resumed:
+            return resumed
+        result = _execute_batch(prepared['cmd'], agent_name, workspace, log_dir, prepared['delivery'], timeout)
+    _record_journal(journal, agent_name, inputs, result, _handoff_files(agent_name, workspace), workspace)
+    return result
 
-def run_agent_batch(agent_name, agent_file, cli_tool, workspace, auto_approve=False):
-    """Run an agent in batch mode - auto-executes and exits."""
-    print(f"[{agent_name}] Launching batch mode using {cli_tool}...")
+
+def _check_journal(journal, label, cli_tool, auto_approve, prompt, workspace, input_files=()):
+    """Return (inputs hash, 'resumed' record if the journaled run already did this); (None, None) without a journal."""
+    if journal is None:
+        return None, None
+    from run_journal import inputs_hash, resumed_result
+
+    inputs = inputs_hash(cli_tool, auto_approve, prompt, list(input_files), workspace)
+    return inputs, resumed_result(journal, label, inputs)
+
+
+def _record_journal(journal, label, inputs, result, artifacts, workspace):
+    """Append an ended run to the run journal, if there is one."""
+    if journal is not None:
+        from run_journal import record_run
+
+        record_run(journal, label, inputs, result, artifacts, workspace)
+
+
+def _handoff_files(agent_name, workspace):
+    """Return the plan handoff files of an agent that exist in the workspace."""
+    from workflow import DEFAULT_OUTPUTS, collect_outputs
+
+    return collect_outputs(workspace, [pattern.format(agent=agent_name) for pattern in DEFAULT_OUTPUTS])
+
+
+def prepare_batch(agent_name, agent_file, cli_tool, workspace, auto_approve=False, prompt_via="auto", mode=None,
+                  layout="default", instructions=None):
+    """Context manager building the command of a batch run (see run_agent_batch() for the arguments).
+
+    `instructions` (e.g. a workflow stage's task and input files) are
+    appended to the agent instructions after any compaction.
+
+    Yields {'result': record} if the run ends without starting a CLI
+    (unreadable agent, unsupported CLI, missing --auto-approve, test mode),
+    otherwise {'cmd': argv, 'delivery': prompt delivery, 'prompt': prompt text}. A prompt file
+    stays readable until the context exits.
+    """
+    from contextlib import contextmanager
+
+    return contextmanager(_prepare_batch)(agent_name, agent_file, cli_tool, workspace, auto_approve, prompt_via,
+                                          mode, layout, instructions)
+
+
+def _prepare_batch(agent_name, agent_file, cli_tool, workspace, auto_approve, prompt_via, mode, layout, instructions):
+    from batch_output import emit_line
+    from cli_adapters import get_adapter
+    from prompt_delivery import choose_channel, open_prompt
+
+    emit_line(f"[{agent_name}]", f"Launching batch mode using {cli_tool}...")
     
     agent_content = read_agent_file(agent_file)
     if agent_content is None:
-        print(f"[{agent_name}] Failed to read agent file.")
+        emit_line(f"[{agent_name}]", "Failed to read agent file.")
+        yield {'result': _batch_result(agent_name, "error", exit_code=1)}
         return
-    # Safety: require explicit approval before performing destructive or auto-approved actions
-    destructive_clis = ["gemini", "codex", "copilot-cli", "rovodev"]
-    if not auto_approve and cli_tool in destructive_clis:
-        print(f"[{agent_name}] Batch mode for '{cli_tool}' is potentially destructive and requires --auto-approve.")
-        print(f"[{agent_name}] Agent instructions are available at: {agent_file}")
-        print(f"[{agent_name}] To run in batch mode, re-run with --auto-approve or use interactive mode (-i) to manually confirm actions.")
-        return
-    
-    cmd = []
-    
-    if cli_tool == "gemini":
-        # Gemini CLI: one-shot mode. Only use aggressive/auto flags when explicitly approved.
-        prompt = f"You are an AI agent. Work in workspace: {workspace}\n\nAgent instructions:\n{agent_content[:2000]}"
-        if auto_approve:
-            cmd = ["gemini", "--yolo", prompt]
-        else:
-            cmd = ["gemini", prompt]
-        
-    elif cli_tool == "codex":
-        # OpenAI Codex CLI: only enable full-auto approval when explicitly approved
-        prompt = f"Follow these agent instructions:\n\n{agent_content}"
-        if auto_approve:
-            cmd = ["codex", "--approval-mode", "full-auto", prompt]
-        else:
-            cmd = ["codex", prompt]
-        
-    elif cli_tool == "copilot-cli":
-        # GitHub Copilot CLI - programmatic mode. Only grant tool permissions when explicitly approved.
-        prompt = f"You are an AI agent working in: {workspace}\n\nFollow these instructions:\n{agent_content[:3000]}"
-        base_cmd = ["copilot", "-p", prompt]
-        if auto_approve:
-            base_cmd.extend(["--allow-tool", "write", "--allow-tool", "shell(git)"])
-        cmd = base_cmd
-        
-    elif cli_tool == "rovodev":
-        # RovoDev CLI: batch mode with agent context. Only run when explicitly approved.
-        initial_prompt = f"""You are now acting as the following agent. Read and internalize these instructions:
-
-{agent_content}
-
----
-You are now the {agent_name} agent. Working directory: {workspace}
-Begin your workflow."""
-        cmd = ["acli", "rovodev", "run", initial_prompt]
-        cmd = ["acli", "rovodev", "run", initial_prompt]
-        # Workspace is set via cwd parameter in subprocess.Popen()
-
-    elif cli_tool == "qwen":
-        # Qwen CLI: batch mode
-        # Usage: qwen [query..]
-        # We combine agent content and instruction
-        full_query = f"{agent_content}\n\nBegin your workflow suitable for a batch execution context."
-        cmd = ["qwen", full_query]
-        
-    elif cli_tool == "test":
-        # Test mode: just echo what would run
-        print(f"[{agent_name}] TEST MODE - Would run agent from: {agent_file}")
-        print(f"[{agent_name}] Workspace: {workspace}")
-        print(f"[{agent_name}] Preview: {agent_content[:300] if agent_content else 'N/A'}...")
+    if mode:
+        from agent_sections import slice_mode
+
+        agent_content = slice_mode(agent_content, mode)
+    adapter = get_adapter(cli_tool)
+    if adapter is None or not adapter.SUPPORTS_BATCH:
+        emit_line(f"[{agent_name}]", f"CLI '{cli_tool}' not supported for batch mode. Use -i for interactive.")
+        yield {'result': _batch_result(agent_name, "unsupported")}
         return
-        
-    else:
-        print(f"[{agent_name}] CLI '{cli_tool}' not supported for batch mode. Use -i for interactive.")
+    # Safety: require explicit approval before performing destructive or auto-approved actions
+    if not auto_approve and adapter.DESTRUCTIVE:
+        emit_line(f"[{agent_name}]", f"Batch mode for '{cli_tool}' is potentially destructive and requires --auto-approve.")
+        emit_line(f"[{agent_name}]", f"Agent instructions are available at: {agent_file}")
+        emit_line(f"[{agent_name}]", "To run in batch mode, re-run with --auto-approve or use interactive mode (-i) "
+                                     "to manually confirm actions.")
+        yield {'result': _batch_result(agent_name, "skipped")}
         return
 
+    if adapter.PROMPT_TOKEN_BUDGET is not None:
+        from prompt_compaction import compact_prompt, format_report
+
+        compacted = compact_prompt(agent_content, adapter.PROMPT_TOKEN_BUDGET)
+        if compacted['steps']:
+            emit_line(f"[{agent_name}]", format_report(compacted))
+        agent_content = compacted['text']
+    if instructions:
+        agent_content = f"{agent_content.rstrip()}\n\n{instructions}"
+    job = {
+        'agent_name': agent_name,
+        'agent_file': agent_file,
+        'agent_content': agent_content,
+        'workspace': workspace,
+        'auto_approve': auto_approve,
+        'layout': layout,
+    }
+    prompt = adapter.batch_prompt(job)
+    if layout == "stable":
+        from context_layout import describe_prefix
+
+        emit_line(f"[{agent_name}]", f"Prompt {describe_prefix(prompt)}")
+    channel = "argv"
+    if adapter.PROMPT_CHANNELS:
+        channel = choose_channel(prompt, adapter.PROMPT_CHANNELS, preferred=prompt_via)
+    with open_prompt(prompt, channel, workspace) as delivery:
+        cmd = adapter.batch_command(job, delivery['arg'])
+        if not cmd:
+            # Test mode: the adapter only reported what would run
+            yield {'result': _batch_result(agent_name, "test", exit_code=0)}
+            return
+        if channel != "argv":
+            emit_line(f"[{agent_name}]", f"Prompt is {delivery['bytes']:,} bytes; passing it via {channel}")
+        yield {'cmd': cmd, 'delivery': delivery, 'prompt': prompt}
+
+
+def _feed_stdin(process, text):
+    """Write `text` to the process's stdin and close it."""
     try:
-        print(f"[{agent_name}] Executing: {cmd[0]} ...")
-        process = subprocess.Popen(
-            cmd, 
-            cwd=workspace, 
-            stdout=subprocess.PIPE, 
-            stderr=subprocess.PIPE, 
-            text=True
-        )
-        stdout, stderr = process.communicate(timeout=600)
-        
-        if stdout:
-            print(f"[{agent_name}] OUTPUT:\n{stdout}")
-        if stderr:
-            print(f"[{agent_name}] ERROR:\n{stderr}")
-        
-        if process.returncode != 0:
-            print(f"[{agent_name}] Exited with code: {process.returncode}")
-            
-    except subprocess.TimeoutExpired:
-        print(f"[{agent_name}] Timed out after 10 minutes")
-        process.kill()
+        process.stdin.write(text)
+        process.stdin.close()
+    except (BrokenPipeError, OSError, ValueError):
+        # The CLI exited or closed stdin early; its exit status reports why
+        pass
+
+
+def _execute_batch(cmd, agent_name, workspace, log_dir, delivery, timeout=BATCH_TIMEOUT):
+    """Run a batch CLI command, streaming its output; returns the result record."""
+    import subprocess
+    import threading
+
+    from batch_output import OutputTail, emit_line, finish_run, log_path_for, stream_process
+
+    start = time.monotonic()
+    tail = OutputTail(log_path_for(agent_name, log_dir))
+    timed_out = threading.Event()
+    try:
+        emit_line(f"[{agent_name}]", f"Executing: {cmd[0]} ...")
+        spawn_start = time.perf_counter()
+        with tracing.span("cli_spawn", agent=agent_name, cli=cmd[0], channel=delivery['channel']):
+            process = subprocess.Popen(
+                cmd, 
+                cwd=workspace, 
+                stdin=subprocess.PIPE if delivery['stdin'] is not None else None,
+                stdout=subprocess.PIPE, 
+                stderr=subprocess.PIPE, 
+                text=True,
+                errors="replace",
+                bufsize=1
+            )
     except FileNotFoundError:
-        print(f"[{agent_name}] CLI tool '{cmd[0]}' not found. Is it installed and in PATH?")
+        emit_line(f"[{agent_name}]", f"CLI tool '{cmd[0]}' not found. Is it installed and in PATH?")
+        return _batch_result(agent_name, "not-found", 127, time.monotonic() - start)
     except Exception as e:
-        print(f"[{agent_name}] Failed: {e}")
+        emit_line(f"[{agent_name}]", f"Failed: {e}")
+        return _batch_result(agent_name, "error", 1, time.monotonic() - start)
+
+    def on_timeout():
+        timed_out.set()
+        process.kill()
+
+    if delivery['stdin'] is not None:
+        # Fed from a thread so a CLI that writes before reading all its input cannot deadlock
+        threading.Thread(target=_feed_stdin, args=(process, delivery['stdin']), daemon=True).start()
+
+    watchdog = threading.Timer(timeout, on_timeout) if timeout else None
+    if watchdog:
+        watchdog.daemon = True
+        watchdog.start()
+    try:
+        with tracing.span("cli_output", agent=agent_name):
+            stream_process(process, agent_name, tail)
+            process.wait()
+    except KeyboardInterrupt:
+        cleanup_process(process)
+        raise
+    finally:
+        if watchdog:
+            watchdog.cancel()
+        tail.close()
+    elapsed = time.monotonic() - start
+    if tail.first_output_at is not None:
+        tracing.record("time_to_first_output", spawn_start, tail.first_output_at, agent=agent_name)
+
+    return finish_run(agent_name, tail, process.returncode, elapsed, timed_out.is_set(), timeout)
+
+
+def run_agents_parallel(jobs, cli_tool, workspace, auto_approve=False, max_parallel=4, log_dir=None,
+                        prompt_via="auto", mode=None, layout="default", engine="asyncio", timeout=BATCH_TIMEOUT,
+                        journal=None):
+    """Run several agents in batch mode concurrently.
+
+    Args:
+        jobs: List of (agent_name, agent_file) tuples
+        cli_tool: CLI tool to use
+        workspace: Path to workspace
+        auto_approve: Whether to auto-approve actions
+        max_parallel: Maximum number of CLI processes running at once
+        log_dir: Directory for per-run log files of large outputs
+        prompt_via: Prompt channel passed to run_agent_batch
+        mode: Agent mode passed to run_agent_batch
+        layout: Prompt layout passed to run_agent_batch
+        engine: 'asyncio' drives every CLI process from one event loop
+                (async_engine.py); 'threads' runs run_agent_batch on a thread pool
+        timeout: Seconds before a CLI process is killed (None: no limit)
+        journal: Run journal passed to run_agent_batch
 
+    Returns:
+        list: Result records in the same order as jobs
+    """
+    if engine == "asyncio":
+        return _run_parallel_async(jobs, cli_tool, workspace, auto_approve, max_parallel, log_dir, prompt_via, mode,
+                                   layout, timeout, journal)
+
+    from concurrent.futures import ThreadPoolExecutor
+
+    max_parallel = max(1, min(max_parallel, len(jobs)))
+    with ThreadPoolExecutor(max_workers=max_parallel) as executor:
+        futures = [
+            executor.submit(run_agent_batch, agent_name, agent_file, cli_tool, workspace, auto_approve, log_dir,
+                            prompt_via, mode, layout, timeout, journal)
+            for agent_name, agent_file in jobs
+        ]
+        return [future.result() for future in futures]
+
+
+def _run_parallel_async(jobs, cli_tool, workspace, auto_approve, max_parallel, log_dir, prompt_via, mode, layout,
+                        timeout, journal):
+    """Prepare every job, then run their CLI processes on the asyncio engine."""
+    from contextlib import ExitStack
+
+    from async_engine import run_processes
+
+    results = [None] * len(jobs)
+    specs = []
+    indexes = []
+    inputs = {}
+    with ExitStack() as stack:
+        for index, (agent_name, agent_file) in enumerate(jobs):
+            prepared = stack.enter_context(prepare_batch(agent_name, agent_file, cli_tool, workspace, auto_approve,
+                                                         prompt_via, mode, layout))
+            if 'result' in prepared:
+                results[index] = prepared['result']
+                continue
+            inputs[index], results[index] = _check_journal(journal, agent_name, cli_tool, auto_approve,
+                                                           prepared['prompt'], workspace)
+            if results[index]:
+                continue
+            indexes.append(index)
+            specs.append({
+                'agent_name': agent_name,
+                'cmd': prepared['cmd'],
+                'cwd': workspace,
+                'stdin': prepared['delivery']['stdin'],
+                'timeout': timeout,
+                'log_dir': log_dir,
+                'channel': prepared['delivery']['channel'],
+            })
+
+        def on_done(position, result):
+            # Journaled as each run ends, so an interrupted batch keeps what already succeeded
+            index = indexes[position]
+            agent_name = jobs[index][0]
+            _record_journal(journal, agent_name, inputs[index], result, _handoff_files(agent_name, workspace),
+                            workspace)
+
+        for index, result in zip(indexes, run_processes(specs, max_parallel, on_done)):
+            results[index] = result
+    return results
+
+
+def run_workflow_file(path, cli_tool, workspace, agents_dir, registry, auto_approve=False, max_parallel=4,
+                      log_dir=None, prompt_via="auto", mode=None, layout="default", legacy=False,
+                      timeout=BATCH_TIMEOUT, journal=None):
+    """Run a workflow file (see workflow.py): each stage starts once the stages it needs succeeded.
+
+    Stages without a 'type' use `mode`. Prints the batch summary and the
+    critical path; returns the result records in dependency order.
+    """
+    from workflow import load_workflow
+
+    try:
+        workflow = load_workflow(path)
+    except (OSError, ValueError) as e:
+        print(f"Error: Could not load workflow {path}: {e}")
+        sys.exit(1)
+    agent_files = _stage_agent_files(workflow, agents_dir, registry, mode, legacy)
+    print(f"Workflow: {workflow['name']} ({len(workflow['stages'])} stages, up to {max(1, max_parallel)} at once)")
+    return _run_stages(workflow, agent_files, cli_tool, workspace, auto_approve, max_parallel, log_dir, prompt_via,
+                       mode, layout, legacy, timeout=timeout, journal=journal)
+
+
+def run_plan_tasks(paths, cli_tool, workspace, agents_dir, registry, auto_approve=False, max_parallel=4,
+                   log_dir=None, prompt_via="auto", layout="default", legacy=False, timeout=BATCH_TIMEOUT,
+                   journal=None):
+    """Run the tasks of plan files (see plan_tasks.py) that are not completed yet.
+
+    Each task runs as soon as its dependencies are completed, by its role
+    in IMPLEMENTATION MODE; its status in the plan file is set to
+    in-progress when its CLI starts and to completed, failed or blocked
+    when it ends, through the plan store (plan_store.py). Without `paths`, the tasks of every *-plan.json in the
+    workspace run; the other plan files are read to resolve dependencies.
+    """
+    import sqlite3
+
+    from plan_store import load_tasks, open_store, set_status, sync
+    from plan_tasks import RESULT_STATUSES, count_statuses, find_plan_files, task_workflow
+
+    paths = [os.path.abspath(path) for path in paths]
+    all_paths = list(dict.fromkeys(find_plan_files(workspace) + paths))
+    if not all_paths:
+        print(f"Error: No *-plan.json files in {workspace}")
+        sys.exit(1)
+    try:
+        store = open_store(workspace)
+        sync(store, all_paths)
+        plans = load_tasks(store)
+        workflow = task_workflow(plans, workspace, paths)
+    except (OSError, ValueError, sqlite3.Error) as e:
+        print(f"Error: Could not load plans: {e}")
+        sys.exit(1)
+    tasks = plans['tasks']
+    selected = [task for task in tasks.values() if not paths or task['plan'] in paths]
+    print(f"Plans: {workflow['name']} ({len(selected)} tasks: {count_statuses(selected)})")
+    if workflow['waiting']:
+        print(f"Waiting on tasks of other plans: {', '.join(workflow['waiting'])}")
+    if not workflow['stages']:
+        print("Nothing to run.")
+        return []
+    agent_files = _stage_agent_files(workflow, agents_dir, registry, "implementation", legacy)
+    print(f"Running {len(workflow['stages'])} task(s), up to {max(1, max_parallel)} at once")
 
-def find_agent_file(agent_name, agents_dir, agent_type="planning", legacy=False):
+    started = set()
+
+    def on_start(stage):
+        started.add(stage['id'])
+        set_status(store, stage['id'], "in-progress")
+
+    def on_done(stage, record):
+        if record['status'] in RESULT_STATUSES or stage['id'] in started:
+            set_status(store, stage['id'], RESULT_STATUSES.get(record['status'], tasks[stage['id']]['status']))
+
+    return _run_stages(workflow, agent_files, cli_tool, workspace, auto_approve, max_parallel, log_dir, prompt_via,
+                       "implementation", layout, legacy, on_start, on_done, timeout, journal)
+
+
+def _stage_agent_files(workflow, agents_dir, registry, mode, legacy):
+    """Return {stage id: agent file}; exits if a stage's agent does not exist."""
+    agent_files = {}
+    for stage in workflow['stages'].values():
+        agent_file = find_agent_file(stage['agent'], agents_dir, stage['type'] or mode or "planning", legacy=legacy,
+                                     registry=registry)
+        if not agent_file:
+            print(f"Error: Agent '{stage['agent']}' of '{stage['id']}' not found.")
+            print("Use -l to list available agents.")
+            sys.exit(1)
+        agent_files[stage['id']] = agent_file
+    return agent_files
+
+
+def _run_stages(workflow, agent_files, cli_tool, workspace, auto_approve, max_parallel, log_dir, prompt_via, mode,
+                layout, legacy, on_start=None, on_done=None, timeout=BATCH_TIMEOUT, journal=None):
+    """Run the stages of a workflow on the asyncio engine, then print the summary and critical path.
+
+    `on_start(stage)` is called when a stage's CLI is about to start,
+    `on_done(stage, record)` when a stage finished or was blocked. With a
+    run `journal`, a stage whose prompt and input files are unchanged since
+    it succeeded in the journaled run is not run again.
+    """
+    from async_engine import run_process
+    from workflow import critical_path, format_waves, run_workflow
+
+    for line in format_waves(workflow):
+        print(line)
+    print("=" * 60)
+
+    async def run_stage(stage, instructions, inputs):
+        stage_mode = None if legacy else stage['type'] or mode
+        with prepare_batch(stage['agent'], agent_files[stage['id']], cli_tool, workspace, auto_approve, prompt_via,
+                           stage_mode, layout, instructions) as prepared:
+            if 'result' in prepared:
+                return prepared['result']
+            input_files = [path for files in inputs.values() for path in files]
+            inputs_hash, resumed = _check_journal(journal, stage['id'], cli_tool, auto_approve, prepared['prompt'],
+                                                  workspace, input_files)
+            if resumed:
+                return resumed
+            if on_start:
+                on_start(stage)
+            record = await run_process({
+                'agent_name': stage['id'],
+                'cmd': prepared['cmd'],
+                'cwd': workspace,
+                'stdin': prepared['delivery']['stdin'],
+                'timeout': timeout,
+                'log_dir': log_dir,
+                'channel': prepared['delivery']['channel'],
+            })
+            return dict(record, inputs_hash=inputs_hash)
+
+    def stage_done(stage, record):
+        _record_journal(journal, stage['id'], record.get('inputs_hash'), record, record['outputs'], workspace)
+        if on_done:
+            on_done(stage, record)
+
+    start = time.monotonic()
+    results = run_workflow(workflow, workspace, run_stage, max_parallel, stage_done)
+    total_elapsed = time.monotonic() - start
+    print_batch_summary(list(results.values()), total_elapsed)
+    chain, chain_elapsed = critical_path(workflow, results)
+    serial = sum(result['elapsed'] for result in results.values())
+    print(f"  Critical path: {' -> '.join(chain)} ({chain_elapsed:.1f}s; all stages back to back: {serial:.1f}s)")
+    return list(results.values())
+
+
+def print_batch_summary(results, total_elapsed):
+    """Print an aggregated per-agent summary for a batch run."""
+    print("=" * 60)
+    print("Batch summary:")
+    print(f"  {'AGENT':<22} {'STATUS':<12} {'EXIT':>5} {'TIME':>9} {'OUTPUT':>12}")
+    for result in results:
+        exit_code = "-" if result['exit_code'] is None else str(result['exit_code'])
+        print(f"  {result['agent']:<22} {result['status']:<12} {exit_code:>5} "
+              f"{result['elapsed']:>8.1f}s {result['output_bytes']:>10,} B")
+    print(f"  Wall time: {total_elapsed:.1f}s")
+
+
+@tracing.traced
+def find_agent_file(agent_name, agents_dir, agent_type="planning", legacy=False, registry=None):
     """Find the agent file based on type (planning or implementation).
     
     Args:
@@ -431,81 +665,279 @@ def find_agent_file(agent_name, agents_dir, agent_type="planning", legacy=False)
         agents_dir: Path to agents directory
         agent_type: 'planning' or 'implementation' (only used in legacy mode)
         legacy: If True, look for split files in legacy/ subfolder
+        registry: Registry from agent_registry.load_registry() (loaded if not given)
     """
+    if registry is None:
+        registry = load_registry(agents_dir)
+    role = registry['roles'].get(agent_name)
+    if role is None:
+        return None
+    known = {entry['path'] for entry in role['files'] + role['legacy']}
+
     if legacy:
         # Legacy mode: look for split files in legacy/ subfolder
-        if agent_type == "implementation":
-            possible_files = [
-                os.path.join(agents_dir, agent_name, "legacy", f"{agent_name}-implementation.md"),
-                os.path.join(agents_dir, agent_name, f"{agent_name}-implementation.md"),
-            ]
-        else:
-            possible_files = [
-                os.path.join(agents_dir, agent_name, "legacy", f"{agent_name}-planning.md"),
-                os.path.join(agents_dir, agent_name, f"{agent_name}-planning.md"),
-            ]
+        suffix = "implementation" if agent_type == "implementation" else "planning"
+        candidates = [
+            f"{agent_name}/legacy/{agent_name}-{suffix}.md",
+            f"{agent_name}/{agent_name}-{suffix}.md",
+        ]
     else:
         # Unified mode: look for single {agent}.md file
-        possible_files = [
-            os.path.join(agents_dir, agent_name, f"{agent_name}.md"),
+        candidates = [
+            f"{agent_name}/{agent_name}.md",
             # Fallback to legacy files if unified not found
-            os.path.join(agents_dir, agent_name, "legacy", f"{agent_name}-planning.md"),
-            os.path.join(agents_dir, agent_name, f"{agent_name}-planning.md"),
+            f"{agent_name}/legacy/{agent_name}-planning.md",
+            f"{agent_name}/{agent_name}-planning.md",
         ]
     
-    for p_file in possible_files:
-        if os.path.exists(p_file):
-            return p_file
+    for candidate in candidates:
+        if candidate in known:
+            return role_path(agents_dir, candidate)
     return None
 
 
+def select_context_roles(agents_dir, roles=None, task=None, top_n=None, keep=()):
+    """
+    Return the roles of the multi-agent context: `roles` (None: all), cut
+    down to the `top_n` most relevant to `task` when given. Roles in `keep`
+    (the agents being launched) are always included.
+    """
+    if not top_n:
+        return list(dict.fromkeys(list(roles or []) + list(keep))) if roles else None
+
+    from agent_library import load_library
+    from role_ranking import rank_roles, top_roles
+
+    with tracing.span("rank_roles"):
+        ranked = rank_roles(load_library(agents_dir, roles), task, roles)
+    selected = top_roles(ranked, top_n, list(keep))
+    if not selected:
+        print("Warning: No role matches the task; including all roles.", file=sys.stderr)
+        return roles
+    scores = dict(ranked)
+    print(f"Roles for task: {', '.join(f'{role} ({scores.get(role, 0):.1f})' for role in selected)}")
+    return selected
+
+
+def list_agents(agents_dir):
+    """Print the roles available in `agents_dir`."""
+    print("Available agents:")
+    if os.path.exists(agents_dir):
+        for agent in load_registry(agents_dir)['roles']:
+            print(f"  - {agent}")
+    else:
+        print(f"  Agents directory not found: {agents_dir}")
+
+
+def list_clis():
+    """Print the available CLI adapters with their capabilities."""
+    from cli_adapters import available_adapters, capabilities, get_adapter
+
+    print("Available CLIs:")
+    for name in available_adapters():
+        adapter = get_adapter(name)
+        if adapter is None:
+            continue
+        caps = capabilities(adapter)
+        modes = [mode for mode, key in (("interactive", 'supports_interactive'), ("batch", 'supports_batch')) if caps[key]]
+        notes = []
+        if caps['prompt_channels']:
+            notes.append(f"prompt via {'/'.join(caps['prompt_channels'])}")
+        if caps['prompt_delivery'] == "clipboard":
+            notes.append("interactive via clipboard")
+        if caps['destructive']:
+            notes.append("batch needs --auto-approve")
+        suffix = f" ({', '.join(notes)})" if notes else ""
+        print(f"  - {name:<12} {'/'.join(modes):<18} {caps['description']}{suffix}")
+
+
 def main():
+    # Fast path: `--list [--agents-dir DIR]` (called constantly by editor tasks) skips argparse
+    argv = sys.argv[1:]
+    if argv[:1] in (["--list"], ["-l"]) and (len(argv) == 1 or (len(argv) == 3 and argv[1] == "--agents-dir")):
+        list_agents(os.path.abspath(argv[2]) if len(argv) == 3 else os.path.join(CAPSTONE_AGENTS_DIR, "agents"))
+        return
+
+    import argparse
+
     parser = argparse.ArgumentParser(
         description="Capstone Agents Runner - Load AI agents into CLI tools",
         formatter_class=argparse.RawDescriptionHelpFormatter,
         epilog="""
 Examples:
-  # Interactive planning session
+  # Interactive session (both modes; switch with "@designer planning" / "@designer impl")
   python run_agents.py -a designer -w /path/to/your/project -i
   
-  # Interactive implementation session
+  # Interactive implementation session (only the IMPLEMENTATION MODE of each agent is loaded)
   python run_agents.py -a designer -w /path/to/your/project -i --type impl
   
   # Batch mode - auto-run and exit
   python run_agents.py -a backend -w /path/to/project -c gemini
+
+  # Parallel batch mode - several agents at once (at most 2 concurrent CLI processes)
+  python run_agents.py --agents frontend backend designer devops -c gemini --auto-approve --max-parallel 2
   
+  # Workflow: stages run as soon as the stages they need are done, outputs are handed on
+  python run_agents.py --workflow workflows/greenfield.json -w /path/to/project -c gemini --auto-approve
+
+  # Execute the tasks of the plans in the workspace; ready tasks run in parallel
+  python run_agents.py --plans -w /path/to/project -c gemini --auto-approve
+
+  # Continue an interrupted batch run; agents that already succeeded with the same inputs are skipped
+  python run_agents.py --workflow workflows/greenfield.json -c gemini --auto-approve --resume 20260101-120000-ab12
+
+  # Give each CLI up to an hour (0: no limit)
+  python run_agents.py --agents frontend backend -c gemini --auto-approve --timeout 3600
+
   # List available agents
   python run_agents.py -l
   
   # Test mode
   python run_agents.py -a coordinator -c test
+
+  # Workspace last in every prompt, so runs in different workspaces share a cacheable prefix
+  python run_agents.py --agents frontend backend -c gemini --auto-approve --layout stable
+
+  # Interactive session with only the roles a task needs (ranked against the task description)
+  python run_agents.py -a coordinator -i --auto-roles 3 --task "add invoice endpoints to the REST API"
+
+  # Leave out roles this workspace does not need (no *.sol: no blockchain agent, ...)
+  python run_agents.py -a coordinator -i --stack-filter drop
+
+  # Interactive session with a fixed set of roles
+  python run_agents.py -a coordinator -i --roles backend,frontend,qa
+
+  # List the CLIs agents can run with
+  python run_agents.py --list-clis
+  
+  # Record where launch time goes (open the file in chrome://tracing or ui.perfetto.dev)
+  python run_agents.py -a backend -i -c gemini --trace launch-trace.json
         """
     )
     parser.add_argument("-w", "--workspace", default=".", 
                         help="Path to YOUR project workspace (where the agent will work)")
     parser.add_argument("-c", "--cli", default="gemini", 
-                        choices=["gemini", "cursor", "cursor-ide", "codex", "claude", "copilot-cli", "vscode", "rovodev", "antigravity", "qwen", "test"],
-                        help="CLI tool to use (default: gemini)")
+                        help="CLI tool to use (default: gemini; see --list-clis)")
     parser.add_argument("-a", "--agent", 
                         help="Agent to run (e.g., designer, frontend, backend, coordinator)")
+    parser.add_argument("--agents", nargs="+", metavar="AGENT",
+                        help="Run several agents; in batch mode they run in parallel")
+    parser.add_argument("--workflow", metavar="FILE",
+                        help="Run the stages of a workflow file in batch mode, each as soon as the stages it needs "
+                             "have succeeded (see docs/multi-agent-workflows.md)")
+    parser.add_argument("--plans", nargs="*", metavar="PLAN",
+                        help="Run the tasks of these {role}-plan.json files (relative to the workspace; default: all "
+                             "in it) that are not completed, each by its role in IMPLEMENTATION MODE once its "
+                             "dependencies are done")
+    parser.add_argument("--max-parallel", type=int, default=4,
+                        help="Maximum number of agents to run concurrently in batch mode (default: 4)")
+    parser.add_argument("--engine", default="asyncio", choices=["asyncio", "threads"],
+                        help="How parallel batch runs are driven: one asyncio event loop for all CLI processes, "
+                             "or a thread per process (default: %(default)s)")
+    parser.add_argument("--timeout", type=float, default=BATCH_TIMEOUT, metavar="SECONDS",
+                        help="Kill a batch CLI run after this many seconds; 0 for no limit (default: %(default)s)")
+    parser.add_argument("--resume", metavar="RUN_ID",
+                        help="Continue batch run RUN_ID (printed when a run starts): agents, stages and tasks that "
+                             "already succeeded in it with the same prompt and input files are not run again")
+    parser.add_argument("--log-dir",
+                        help="Directory for per-run log files when batch output is large (default: system temp dir)")
     parser.add_argument("-i", "--interactive", action="store_true",
                         help="Run in interactive mode (stay open for conversation)")
-    parser.add_argument("-t", "--type", default="planning",
+    parser.add_argument("-t", "--type",
                         choices=["planning", "plan", "p", "implementation", "impl", "i"],
-                        help="Agent type: planning (default) or implementation")
+                        help="Agent type: planning or implementation. Unified agents load only that mode "
+                             "(default: both); legacy agents load that split file (default: planning)")
     parser.add_argument("-l", "--list", action="store_true",
                         help="List available agents")
+    parser.add_argument("--list-clis", action="store_true",
+                        help="List available CLI adapters and their capabilities")
     parser.add_argument("--auto-approve", action="store_true",
                         help="Allow agent batch runs to execute tools or modify the workspace without interactive confirmation")
     parser.add_argument("--agents-dir", 
                         help="Custom path to agents directory")
     parser.add_argument("--legacy", action="store_true",
                         help="Use legacy split agents (planning/implementation) instead of unified agents")
+    parser.add_argument("--roles",
+                        help="Comma-separated roles to include in the multi-agent context (default: all)")
+    parser.add_argument("--auto-roles", type=int, metavar="N",
+                        help="Include only the N roles most relevant to --task in the multi-agent context")
+    parser.add_argument("--task",
+                        help="Task description that --auto-roles ranks the roles against")
+    parser.add_argument("--stack-filter", choices=["drop", "demote"],
+                        help="Detect the workspace stack from marker files and drop (or list last) roles it does not "
+                             "need in the multi-agent context (default: keep all roles)")
+    parser.add_argument("--stack-depth", type=int, metavar="N",
+                        help="Directories below the workspace root that --stack-filter scans for markers "
+                             "(default: 3, or $CAPSTONE_AGENTS_STACK_DEPTH)")
     parser.add_argument("--context-mode", choices=["single", "multi"],
                         help="Context mode: 'single' (focused agent) or 'multi' (all agents with @-mentions). Default: multi for interactive, single for batch.")
     
+    parser.add_argument("--prompt-via", default="auto", choices=["auto", "argv", "stdin", "file"],
+                        help="How to pass the prompt to the CLI: on the command line, on stdin (batch only) or as a "
+                             "prompt file (default: auto, by prompt size and CLI support)")
+    parser.add_argument("--layout", default="default", choices=["default", "stable"],
+                        help="'stable' puts the workspace and other per-run values after the agent instructions, "
+                             "so the prompt prefix is the same in every workspace, and prints its hash (default: %(default)s)")
+    parser.add_argument("--trace", metavar="FILE",
+                        help="Write timing spans of this launch to FILE (Chrome trace format, opens in chrome://tracing or Perfetto)")
+    
     args = parser.parse_args()
+
+    from cli_adapters import available_adapters, get_adapter
+
+    if args.list_clis:
+        list_clis()
+        return
+    if get_adapter(args.cli) is None:
+        parser.error(f"unknown CLI '{args.cli}' (choose from {', '.join(available_adapters())})")
+    if args.workflow and args.plans is not None:
+        parser.error("--workflow and --plans cannot be combined")
+    if args.stack_depth is not None and args.stack_depth < 0:
+        parser.error("--stack-depth must be 0 or more")
+    if args.timeout < 0:
+        parser.error("--timeout must be 0 (no limit) or a positive number of seconds")
+    if args.auto_roles is not None and (args.auto_roles < 1 or not args.task):
+        parser.error("--auto-roles needs a positive count and a --task description")
     
+    if args.trace:
+        tracing.enable(args.trace, origin=_IMPORT_START)
+        tracing.record("imports", _IMPORT_START, _IMPORT_END)
+    try:
+        with tracing.span("main"):
+            run(args)
+    finally:
+        path = tracing.flush()
+        if path:
+            print(f"Trace written to: {path}", file=sys.stderr)
+
+
+def open_run_journal(args, workspace):
+    """Open the journal of this batch run (run_journal.py), or of the run to resume; exits if it is unknown."""
+    from run_journal import open_journal, recent_runs
+
+    try:
+        journal = open_journal(args.resume, {
+            'workspace': workspace,
+            'cli': args.cli,
+            'argv': sys.argv[1:],
+            'started': time.strftime("%Y-%m-%dT%H:%M:%SZ", time.gmtime()),
+        })
+    except FileNotFoundError:
+        print(f"Error: Unknown run '{args.resume}' (no journal, or nothing ran in it)")
+        runs = recent_runs()
+        if runs:
+            print(f"Recent runs: {', '.join(runs)}")
+        sys.exit(1)
+    if args.resume:
+        done = sum(len(entries) for entries in journal['done'].values())
+        print(f"Run: {journal['id']} (resuming; {done} succeeded invocation(s) on record)")
+    else:
+        print(f"Run: {journal['id']} (continue it with --resume {journal['id']})")
+    return journal
+
+
+def run(args):
+    """Run the launcher for parsed command-line arguments."""
     # Determine agents directory
     if args.agents_dir:
         agents_dir = os.path.abspath(args.agents_dir)
@@ -514,14 +946,7 @@ Examples:
     
     # List agents if requested
     if args.list:
-        print("Available agents:")
-        if os.path.exists(agents_dir):
-            for agent in sorted(os.listdir(agents_dir)):
-                agent_path = os.path.join(agents_dir, agent)
-                if os.path.isdir(agent_path):
-                    print(f"  - {agent}")
-        else:
-            print(f"  Agents directory not found: {agents_dir}")
+        list_agents(agents_dir)
         return
     
     workspace = os.path.abspath(args.workspace)
@@ -531,26 +956,71 @@ Examples:
         print("Use --agents-dir to specify the path to your agents folder.")
         sys.exit(1)
     
-    # Get agent to run
-    agent_name = args.agent or "coordinator"
-    
-    # Normalize agent type
-    agent_type = "implementation" if args.type in ["implementation", "impl", "i"] else "planning"
+    # Get agents to run
+    if args.agents:
+        agent_names = list(dict.fromkeys(args.agents))
+    else:
+        agent_names = [args.agent or "coordinator"]
     
-    agent_file = find_agent_file(agent_name, agents_dir, agent_type, legacy=args.legacy)
+    # Normalize agent type. Legacy mode picks the split file of that type (planning by
+    # default); unified mode loads only that half of each agent file, if given.
+    if args.type:
+        agent_type = "implementation" if args.type in ["implementation", "impl", "i"] else "planning"
+    else:
+        agent_type = "planning" if args.legacy else None
+    mode = None if args.legacy else agent_type
     
-    if not agent_file:
-        print(f"Error: Agent '{agent_name}' not found.")
+    timeout = args.timeout or None
+    with tracing.span("load_registry"):
+        registry = load_registry(agents_dir)
+    if args.plans is not None:
+        if args.interactive:
+            print("Note: plan tasks run in batch mode; ignoring -i.")
+        journal = open_run_journal(args, workspace)
+        results = run_plan_tasks([os.path.join(workspace, path) for path in args.plans], args.cli, workspace,
+                                 agents_dir, registry, args.auto_approve, args.max_parallel, args.log_dir,
+                                 args.prompt_via, args.layout, args.legacy, timeout, journal)
+        if any(result['status'] not in ("ok", "test", "resumed") for result in results):
+            sys.exit(1)
+        return
+    if args.workflow:
+        if args.interactive:
+            print("Note: workflows run in batch mode; ignoring -i.")
+        journal = open_run_journal(args, workspace)
+        results = run_workflow_file(args.workflow, args.cli, workspace, agents_dir, registry, args.auto_approve,
+                                    args.max_parallel, args.log_dir, args.prompt_via, agent_type, args.layout,
+                                    args.legacy, timeout, journal)
+        if any(result['status'] not in ("ok", "test", "resumed") for result in results):
+            sys.exit(1)
+        return
+
+    jobs = []
+    for agent_name in agent_names:
+        agent_file = find_agent_file(agent_name, agents_dir, agent_type or "planning", legacy=args.legacy,
+                                     registry=registry)
+        if not agent_file:
+            print(f"Error: Agent '{agent_name}' not found.")
+            print("Use -l to list available agents.")
+            sys.exit(1)
+        jobs.append((agent_name, agent_file))
+    agent_name, agent_file = jobs[0]
+
+    roles = [r.strip() for r in args.roles.split(',')] if args.roles else None
+    unknown = [role for role in roles or [] if role not in registry['roles']]
+    if unknown:
+        print(f"Error: Unknown role(s) in --roles: {', '.join(unknown)}")
         print("Use -l to list available agents.")
         sys.exit(1)
     
     # Determine display mode
     if args.legacy:
         mode_display = f"{agent_type} (legacy)"
+    elif mode:
+        mode_display = f"unified, {mode} only"
     else:
         mode_display = "unified"
     
-    print(f"Agent: {agent_name} ({mode_display})")
+    print(f"Agent: {', '.join(agent_names)} ({mode_display})")
     print(f"Workspace: {workspace}")
     print(f"CLI: {args.cli}")
     print(f"Mode: {'interactive' if args.interactive else 'batch'}")
@@ -562,11 +1032,36 @@ Examples:
     else:
         context_mode = 'multi' if args.interactive else 'single'
     print(f"Context: {context_mode}")
+    if roles or args.auto_roles:
+        if context_mode == 'multi' and args.interactive:
+            roles = select_context_roles(agents_dir, roles, args.task, args.auto_roles, [agent_name])
+        else:
+            print("Note: --roles and --auto-roles only apply to the interactive multi-agent context.")
     
     if args.interactive:
-        run_agent_interactive(agent_name, agent_file, args.cli, workspace, context_mode, agents_dir, args.auto_approve)
-    else:
-        run_agent_batch(agent_name, agent_file, args.cli, workspace, args.auto_approve)
+        if len(jobs) > 1:
+            print(f"Note: interactive mode runs a single session; starting '{agent_name}'.")
+        if args.resume:
+            print("Note: --resume only applies to batch runs.")
+        run_agent_interactive(agent_name, agent_file, args.cli, workspace, context_mode, agents_dir, args.auto_approve,
+                              args.prompt_via, mode, args.layout, roles, args.stack_filter, args.stack_depth)
+        return
+    
+    journal = open_run_journal(args, workspace)
+    if len(jobs) == 1:
+        result = run_agent_batch(agent_name, agent_file, args.cli, workspace, args.auto_approve, args.log_dir,
+                                 args.prompt_via, mode, args.layout, timeout, journal)
+        if result['exit_code']:
+            sys.exit(1)
+        return
+    
+    print(f"Parallel: up to {max(1, args.max_parallel)} agent(s) at once")
+    start = time.monotonic()
+    results = run_agents_parallel(jobs, args.cli, workspace, args.auto_approve, args.max_parallel, args.log_dir,
+                                  args.prompt_via, mode, args.layout, args.engine, timeout, journal)
+    print_batch_summary(results, time.monotonic() - start)
+    if any(result['exit_code'] for result in results):
+        sys.exit(1)
 
 
 if __name__ == "__main__":
@@ -0,0 +1,163 @@
+#!/usr/bin/env python3
+"""
+run_journal.py
+
+Run journal for batch runs, so an interrupted run can be resumed.
+
+Every batch run (single agent, --agents, --workflow, --plans) gets a run id.
+Each agent invocation that started a CLI is appended to the run's journal
+(CACHE_ROOT/runs/<run id>.jsonl) as soon as it ends: a hash of its inputs
+(CLI, approval, prompt and the contents of its input files), its exit
+status and its output artifacts with their hashes. Lines are flushed and
+synced one by one, so a crash or Ctrl+C loses at most the runs that were
+still going.
+
+`run_agents.py --resume <run id>` replays the journal: an invocation whose
+inputs hash matches one that succeeded in that run, and whose artifacts
+are still as it left them, is not run again.
+
+    journal = open_journal(resume=run_id)
+    inputs = inputs_hash("gemini", True, prompt, [], workspace)
+    record = resumed_result(journal, "backend", inputs) or run(...)
+    record_run(journal, "backend", inputs, record, artifacts, workspace)
+"""
+
+import hashlib
+import json
+import os
+import threading
+import time
+
+from batch_output import batch_result, emit_line
+from context_cache import CACHE_ROOT
+
+JOURNAL_DIR = os.path.join(CACHE_ROOT, "runs")
+JOURNAL_SUFFIX = ".jsonl"
+
+# Journals kept; the oldest are removed when a new run starts
+MAX_JOURNALS = 100
+
+# Statuses of a journaled run that --resume does not repeat
+RESUMABLE_STATUSES = ("ok",)
+
+_lock = threading.Lock()
+
+
+def journal_path(run_id: str) -> str:
+    """Return the journal file of a run."""
+    return os.path.join(JOURNAL_DIR, run_id + JOURNAL_SUFFIX)
+
+
+def recent_runs(limit: int = 5) -> list[str]:
+    """Return the ids of the most recent runs, newest first."""
+    try:
+        names = [name for name in os.listdir(JOURNAL_DIR) if name.endswith(JOURNAL_SUFFIX)]
+    except OSError:
+        return []
+    return sorted((name[:-len(JOURNAL_SUFFIX)] for name in names), reverse=True)[:limit]
+
+
+def _file_hash(path: str) -> str | None:
+    digest = hashlib.sha256()
+    try:
+        with open(path, 'rb') as f:
+            for chunk in iter(lambda: f.read(1024 * 1024), b""):
+                digest.update(chunk)
+    except OSError:
+        return None
+    return digest.hexdigest()
+
+
+def open_journal(resume: str | None = None, meta: dict | None = None) -> dict:
+    """
+    Start the journal of a new run, or reopen run `resume` to continue it.
+    A new journal file is only created once the first invocation is recorded.
+
+    Returns:
+        dict: {'id', 'path', 'meta', 'done': {label: [succeeded entries]}}
+
+    Raises:
+        FileNotFoundError: if the run to resume has no journal.
+    """
+    if resume:
+        path = journal_path(resume)
+        done = {}
+        with open(path, 'r', encoding='utf-8') as f:
+            for line in f:
+                try:
+                    entry = json.loads(line)
+                except ValueError:
+                    # A line cut short by a crash
+                    continue
+                if entry.get('status') in RESUMABLE_STATUSES:
+                    done.setdefault(entry['agent'], []).append(entry)
+        return {'id': resume, 'path': path, 'meta': None, 'done': done}
+    run_id = time.strftime("%Y%m%d-%H%M%S") + "-" + os.urandom(2).hex()
+    return {'id': run_id, 'path': journal_path(run_id), 'meta': meta or {}, 'done': {}}
+
+
+def _trim_journals() -> None:
+    for run_id in recent_runs(limit=10**9)[MAX_JOURNALS:]:
+        try:
+            os.unlink(journal_path(run_id))
+        except OSError:
+            pass
+
+
+def inputs_hash(cli_tool: str, auto_approve: bool, prompt: str, files: list[str], workspace: str) -> str:
+    """Return the hash of everything an invocation depends on: CLI, approval, prompt and input file contents."""
+    digest = hashlib.sha256()
+    digest.update(json.dumps([cli_tool, bool(auto_approve)]).encode('utf-8'))
+    digest.update(prompt.encode('utf-8'))
+    for path in sorted(files):
+        digest.update(f"\0{path}\0{_file_hash(os.path.join(workspace, path))}".encode('utf-8'))
+    return digest.hexdigest()
+
+
+def resumed_result(journal: dict | None, label: str, inputs: str) -> dict | None:
+    """
+    Return a result record with status 'resumed' if `label` already
+    succeeded with these inputs in the journaled run and its artifacts
+    still have the recorded hashes; None if it has to run.
+    """
+    if not journal:
+        return None
+    for entry in reversed(journal['done'].get(label, [])):
+        if entry['inputs'] != inputs:
+            continue
+        if any(_file_hash(os.path.join(entry['workspace'], path)) != digest
+               for path, digest in entry['artifacts'].items()):
+            continue
+        emit_line(f"[{label}]", f"Resumed: succeeded in run {journal['id']} with the same inputs")
+        # Nothing ran this time: no run time or output of its own
+        return dict(batch_result(label, "resumed", 0), outputs=list(entry['artifacts']))
+    return None
+
+
+def record_run(journal: dict | None, label: str, inputs: str | None, record: dict, artifacts: list[str],
+               workspace: str) -> None:
+    """Append an ended invocation (not resumed ones) to the journal."""
+    if not journal or inputs is None or record['status'] == "resumed":
+        return
+    entry = {
+        'agent': label,
+        'inputs': inputs,
+        'status': record['status'],
+        'exit_code': record['exit_code'],
+        'elapsed': round(record['elapsed'], 3),
+        'output_bytes': record['output_bytes'],
+        'workspace': workspace,
+        'artifacts': {path: _file_hash(os.path.join(workspace, path)) for path in artifacts},
+        'finished': time.strftime("%Y-%m-%dT%H:%M:%SZ", time.gmtime()),
+    }
+    with _lock:
+        os.makedirs(JOURNAL_DIR, exist_ok=True)
+        new = not os.path.exists(journal['path'])
+        if new:
+            _trim_journals()
+        with open(journal['path'], 'a', encoding='utf-8') as f:
+            if new and journal['meta'] is not None:
+                f.write(json.dumps(dict(journal['meta'], run=journal['id'])) + "\n")
+            f.write(json.dumps(entry) + "\n")
+            f.flush()
+            os.fsync(f.fileno())
@@ -0,0 +1,143 @@
+#!/usr/bin/env python3
+"""
+tracing.py
+
+Lightweight timing spans exported in the Chrome trace event format.
+
+Spans are only recorded after enable() is called; otherwise span() and
+@traced cost a single flag check. The written JSON file opens in
+chrome://tracing, https://ui.perfetto.dev and other trace viewers, with
+nested spans shown per thread.
+
+    tracing.enable("launch-trace.json")
+    with tracing.span("load_context", agent="backend"):
+        ...
+    tracing.flush()
+"""
+
+import _thread
+import functools
+import os
+import sys
+import time
+
+# Low-level primitives keep this module cheap to import; threading and
+# json are only imported once tracing is enabled.
+_lock = _thread.allocate_lock()
+_state = {
+    'path': None,
+    'events': [],
+    'open': {},
+    'threads': set(),
+    'origin': time.perf_counter(),
+}
+_next_id = iter(range(1, sys.maxsize))
+
+
+def enabled() -> bool:
+    """Return True if spans are being recorded."""
+    return _state['path'] is not None
+
+
+def enable(path: str, origin: float | None = None) -> None:
+    """
+    Start recording spans; flush() writes them to `path`. Timestamps are
+    relative to `origin` (a perf_counter() value), default module import.
+    """
+    _state['path'] = path
+    if origin is not None:
+        _state['origin'] = origin
+
+
+def _ts(perf_time: float) -> float:
+    """Convert a perf_counter() value to trace microseconds."""
+    return round((perf_time - _state['origin']) * 1_000_000, 3)
+
+
+def _thread_meta() -> int:
+    import threading
+
+    tid = _thread.get_ident()
+    if tid not in _state['threads']:
+        _state['threads'].add(tid)
+        _state['events'].append({
+            'name': 'thread_name', 'ph': 'M', 'pid': os.getpid(), 'tid': tid,
+            'args': {'name': threading.current_thread().name},
+        })
+    return tid
+
+
+def record(name: str, start: float, end: float, **args) -> None:
+    """Record a completed span from two perf_counter() values."""
+    if not enabled():
+        return
+    with _lock:
+        _state['events'].append({
+            'name': name, 'ph': 'X', 'pid': os.getpid(), 'tid': _thread_meta(),
+            'ts': _ts(start), 'dur': round((end - start) * 1_000_000, 3),
+            'args': {key: str(value) for key, value in args.items()},
+        })
+
+
+class span:
+    """Context manager timing the enclosed block as a span named `name`."""
+
+    def __init__(self, name: str, **args):
+        self.name = name
+        self.args = args
+        self.span_id = None
+
+    def __enter__(self):
+        if enabled():
+            self.span_id = next(_next_id)
+            self.start = time.perf_counter()
+            with _lock:
+                _state['open'][self.span_id] = (self.name, self.start, _thread.get_ident(), self.args)
+        return self
+
+    def __exit__(self, *exc_info):
+        if self.span_id is not None:
+            with _lock:
+                _state['open'].pop(self.span_id, None)
+            record(self.name, self.start, time.perf_counter(), **self.args)
+        return False
+
+
+def traced(func):
+    """Decorator recording a span named after the function for every call."""
+    @functools.wraps(func)
+    def wrapper(*args, **kwargs):
+        if not enabled():
+            return func(*args, **kwargs)
+        with span(func.__name__):
+            return func(*args, **kwargs)
+    return wrapper
+
+
+def flush() -> str | None:
+    """
+    Write all recorded spans to the trace file. Spans still open (e.g.
+    before the process is replaced by exec) are written as ending now.
+    Returns the path written, or None if tracing is disabled or failed.
+    """
+    import json
+
+    path = _state['path']
+    if path is None:
+        return None
+    now = time.perf_counter()
+    with _lock:
+        events = list(_state['events'])
+        for name, start, tid, args in _state['open'].values():
+            events.append({
+                'name': name, 'ph': 'X', 'pid': os.getpid(), 'tid': tid,
+                'ts': _ts(start), 'dur': round((now - start) * 1_000_000, 3),
+                'args': {**{key: str(value) for key, value in args.items()}, 'unfinished': 'true'},
+            })
+    try:
+        with open(path, 'w', encoding='utf-8') as f:
+            json.dump({'traceEvents': events, 'displayTimeUnit': 'ms'}, f)
+    except OSError as e:
+        print(f"Warning: Could not write trace file {path}: {e}", file=sys.stderr)
+        return None
+    return path
@@ -4,11 +4,29 @@ validate-agent.py
 
 Validates agent definition files for required structure.
 Supports both legacy (split) and unified agent formats.
+
+Each file is parsed once into a heading tree (see agent_sections.py).
+Files are validated concurrently, and files whose content hash already
+passed are skipped using a local cache. Results can be written as JSON
+or JUnit XML for CI in addition to the PASS/FAIL lines.
+
+Usage:
+    python scripts/validate-agent.py .
+    python scripts/validate-agent.py . --format junit --output validate.xml
+    python scripts/validate-agent.py . --no-cache --jobs 8
 """
 
+import argparse
+import glob
+import json
 import os
 import sys
-import glob
+import time
+import xml.etree.ElementTree as ET
+from concurrent.futures import ThreadPoolExecutor
+
+from agent_sections import heading_titles
+from context_cache import CACHE_ROOT, atomic_write, sha256_bytes
 
 # Headers required for legacy split agents (planning/implementation files)
 LEGACY_HEADERS = [
@@ -29,65 +47,229 @@ UNIFIED_HEADERS = [
     "## IMPLEMENTATION MODE"
 ]
 
+# Content hashes of files that passed, keyed per header schema
+VALIDATION_CACHE_FILE = os.path.join(CACHE_ROOT, "validate-cache.json")
+SCHEMA_KEY = sha256_bytes(json.dumps([LEGACY_HEADERS, UNIFIED_HEADERS]).encode('utf-8'))[:16]
+
 
-def is_unified_agent(content):
+def scan_headers(content):
+    """Return the text of every level 2+ Markdown header (one pass, memoized per content)."""
+    return heading_titles(content, min_level=2)
+
+
+def _has_header(headers, header):
+    # Allow flexible header levels (## or ###) and trailing text ("## PLANNING MODE (Default)")
+    header_text = header.lstrip('#').strip()
+    return any(text.startswith(header_text) for text in headers)
+
+
+def is_unified_agent(content, headers=None):
     """Check if the agent file uses the unified format."""
-    return "## Mode Switching" in content or "## System Role" in content
+    if headers is None:
+        headers = scan_headers(content)
+    return _has_header(headers, "## Mode Switching") or _has_header(headers, "## System Role")
+
 
+def check_agent_content(filepath, content):
+    """
+    Check one agent file's content.
 
-def validate_agent_file(filepath):
-    """Validate a single agent file."""
-    with open(filepath, 'r', encoding='utf-8') as f:
-        content = f.read()
+    Returns:
+        tuple: (format_type, missing_headers)
+    """
+    headers = scan_headers(content)
 
     # Skip legacy subfolder files when checking for unified format
     if '/legacy/' in filepath.replace('\\', '/'):
         headers_to_check = LEGACY_HEADERS
         format_type = "legacy"
-    elif is_unified_agent(content):
+    elif is_unified_agent(content, headers):
         headers_to_check = UNIFIED_HEADERS
         format_type = "unified"
     else:
         headers_to_check = LEGACY_HEADERS
         format_type = "legacy"
 
-    missing = []
-    for header in headers_to_check:
-        # Allow flexible header levels (## or ###)
-        header_text = header.lstrip('#').strip()
-        if header not in content and f"### {header_text}" not in content:
-            missing.append(header)
+    missing = [header for header in headers_to_check if not _has_header(headers, header)]
+    return format_type, missing
+
+
+def load_cache(path=VALIDATION_CACHE_FILE):
+    """Load the {cache_key: format_type} map of files that already passed."""
+    try:
+        with open(path, 'r', encoding='utf-8') as f:
+            return json.load(f)
+    except (OSError, ValueError):
+        return {}
+
+
+def _cache_key(filepath, data):
+    legacy = '/legacy/' in filepath.replace('\\', '/')
+    return sha256_bytes(f"{SCHEMA_KEY}:{int(legacy)}:".encode('utf-8') + data)
+
+
+def validate_agent_file(filepath, cache=None):
+    """
+    Validate a single agent file.
+
+    Args:
+        filepath: Path of the agent file
+        cache: Optional {cache_key: format_type} of files that already passed
+
+    Returns:
+        dict: {'path', 'format', 'passed', 'missing', 'cached', 'elapsed'}
+    """
+    start = time.perf_counter()
+    result = {'path': filepath, 'format': None, 'passed': False, 'missing': [], 'cached': False}
+    try:
+        with open(filepath, 'rb') as f:
+            data = f.read()
+    except OSError as e:
+        result['error'] = str(e)
+        result['elapsed'] = time.perf_counter() - start
+        return result
+
+    key = _cache_key(filepath, data)
+    if cache is not None and key in cache:
+        result.update(format=cache[key], passed=True, cached=True)
+    else:
+        format_type, missing = check_agent_content(filepath, data.decode('utf-8', errors='replace'))
+        result.update(format=format_type, passed=not missing, missing=missing)
+    result['key'] = key
+    result['elapsed'] = time.perf_counter() - start
+    return result
 
-    if missing:
-        print(f"FAIL: {filepath} ({format_type}) is missing headers: {missing}")
-        return False
 
-    print(f"PASS: {filepath} ({format_type})")
-    return True
+def validate_files(md_files, jobs=None, use_cache=True):
+    """Validate files concurrently. Returns results sorted by path."""
+    cache = load_cache() if use_cache else None
+    with ThreadPoolExecutor(max_workers=jobs) as executor:
+        results = list(executor.map(lambda path: validate_agent_file(path, cache), sorted(md_files)))
 
+    if use_cache:
+        passed = {r['key']: r['format'] for r in results if r['passed'] and not r['cached']}
+        if passed:
+            cache.update(passed)
+            try:
+                atomic_write(VALIDATION_CACHE_FILE, json.dumps(cache, sort_keys=True))
+            except OSError as e:
+                print(f"Warning: Could not write validation cache: {e}", file=sys.stderr)
+    return results
 
-def validate_workspace(workspace_root):
-    """Validate all agent files in the workspace."""
+
+def validate_workspace(workspace_root, jobs=None, use_cache=True):
+    """Validate all agent files in the workspace. Returns a list of results."""
     agents_dir = os.path.join(workspace_root, "agents")
     md_files = glob.glob(os.path.join(agents_dir, "**", "*.md"), recursive=True)
+    return validate_files(md_files, jobs, use_cache)
 
-    if not md_files:
-        print("No agent files found!")
-        return False
 
-    all_pass = True
-    for md_file in md_files:
-        if not validate_agent_file(md_file):
-            all_pass = False
+def format_text(results):
+    """Return the PASS/FAIL lines for a list of results."""
+    lines = []
+    for r in results:
+        if 'error' in r:
+            lines.append(f"FAIL: {r['path']} could not be read: {r['error']}")
+        elif r['passed']:
+            lines.append(f"PASS: {r['path']} ({r['format']})")
+        else:
+            lines.append(f"FAIL: {r['path']} ({r['format']}) is missing headers: {r['missing']}")
+    return '\n'.join(lines)
 
-    return all_pass
 
+def format_json(results):
+    """Return a JSON report for a list of results."""
+    failed = sum(1 for r in results if not r['passed'])
+    report = {
+        'total': len(results),
+        'passed': len(results) - failed,
+        'failed': failed,
+        'cached': sum(1 for r in results if r['cached']),
+        'files': [
+            {k: r[k] for k in ('path', 'format', 'passed', 'missing', 'cached', 'error') if k in r}
+            for r in results
+        ],
+    }
+    return json.dumps(report, indent=2)
 
-if __name__ == "__main__":
-    workspace = sys.argv[1] if len(sys.argv) > 1 else "."
-    if validate_workspace(workspace):
+
+def format_junit(results, elapsed=0.0):
+    """Return a JUnit XML report for a list of results."""
+    failed = sum(1 for r in results if not r['passed'])
+    suite = ET.Element('testsuite', name='validate-agent', tests=str(len(results)),
+                       failures=str(failed), errors='0', time=f"{elapsed:.3f}")
+    for r in results:
+        case = ET.SubElement(suite, 'testcase', classname=r['format'] or 'agent', name=r['path'],
+                             time=f"{r['elapsed']:.4f}")
+        if 'error' in r:
+            ET.SubElement(case, 'failure', message=f"could not be read: {r['error']}")
+        elif not r['passed']:
+            ET.SubElement(case, 'failure', message=f"missing headers: {', '.join(r['missing'])}")
+    return ET.tostring(suite, encoding='unicode')
+
+
+def main():
+    parser = argparse.ArgumentParser(
+        description="Validate Capstone agent definition files",
+        formatter_class=argparse.RawDescriptionHelpFormatter,
+        epilog="""
+Examples:
+  # Validate the agents/ folder of the current workspace
+  python scripts/validate-agent.py .
+
+  # Write a JUnit report for CI (PASS/FAIL lines still go to stdout)
+  python scripts/validate-agent.py . --format junit --output validate.xml
+
+  # Print a JSON report, revalidating every file
+  python scripts/validate-agent.py . --format json --no-cache
+        """
+    )
+    parser.add_argument("workspace", nargs="?", default=".",
+                        help="Workspace containing the agents/ folder (default: current directory)")
+    parser.add_argument("--format", choices=["text", "json", "junit"], default="text",
+                        help="Report format (default: text)")
+    parser.add_argument("-o", "--output",
+                        help="Write the report to this file instead of stdout")
+    parser.add_argument("-j", "--jobs", type=int,
+                        help="Number of files validated in parallel (default: based on CPU count)")
+    parser.add_argument("--no-cache", action="store_true",
+                        help="Revalidate files even if their content already passed")
+
+    args = parser.parse_args()
+
+    start = time.perf_counter()
+    results = validate_workspace(args.workspace, args.jobs, use_cache=not args.no_cache)
+    elapsed = time.perf_counter() - start
+
+    if not results:
+        print("No agent files found!")
+        sys.exit(1)
+
+    all_pass = all(r['passed'] for r in results)
+    if args.format == "json":
+        report = format_json(results)
+    elif args.format == "junit":
+        report = format_junit(results, elapsed)
+    else:
+        report = None
+
+    if report is None or args.output:
+        print(format_text(results))
+    if report is not None:
+        if args.output:
+            with open(args.output, 'w', encoding='utf-8') as f:
+                f.write(report + "\n")
+        else:
+            print(report)
+            sys.exit(0 if all_pass else 1)
+
+    if all_pass:
         print("All agents validated successfully.")
         sys.exit(0)
     else:
         print("Validation failed.")
         sys.exit(1)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,248 @@
+#!/usr/bin/env python3
+"""
+workflow.py
+
+Dependency-aware multi-agent workflows.
+
+A workflow file (JSON) lists stages, each running one agent in batch mode,
+and the stages it needs:
+
+    {
+      "name": "Greenfield",
+      "stages": [
+        {"id": "plan", "agent": "coordinator", "type": "planning"},
+        {"id": "architecture", "agent": "software-architect", "needs": ["plan"]},
+        {"id": "frontend", "agent": "frontend", "needs": ["architecture"], "type": "implementation"},
+        {"id": "backend", "agent": "backend", "needs": ["architecture"], "type": "implementation"},
+        {"id": "qa", "agent": "qa", "needs": ["frontend", "backend"]}
+      ]
+    }
+
+Every stage starts as soon as all the stages it needs have succeeded, so
+independent stages run in parallel and the pipeline takes as long as its
+longest chain. A stage's output files (its `outputs` globs, by default the
+agent's `{agent}-plan.json` / `{agent}-plan.md` handoff files) are passed to
+the stages that need it. Stages whose dependencies failed do not run and are
+reported as blocked.
+
+    workflow = load_workflow("workflows/greenfield.json")
+    results = run_workflow(workflow, workspace, run_stage, max_parallel=4)
+    path, seconds = critical_path(workflow, results)
+"""
+
+import asyncio
+import glob
+import json
+import os
+import time
+
+import async_engine
+from batch_output import batch_result, emit_line
+
+STAGE_KEYS = {"id", "agent", "needs", "type", "task", "outputs"}
+STAGE_TYPES = ("planning", "implementation")
+
+# Handoff files of an agent (see docs/multi-agent-workflows.md, "Plan File Handoff")
+DEFAULT_OUTPUTS = ("{agent}-plan.json", "{agent}-plan.md")
+
+# Statuses of a finished stage that let the stages needing it start
+# ('resumed': it already succeeded in the run being resumed, see run_journal.py)
+SUCCESS_STATUSES = ("ok", "test", "resumed")
+
+
+def load_workflow(path: str) -> dict:
+    """
+    Read and validate a workflow file.
+
+    Returns:
+        dict: {
+            'name': workflow name,
+            'path': absolute path of the file,
+            'stages': {stage id: {'id', 'agent', 'needs', 'type', 'task', 'outputs'}} in file order,
+            'order': stage ids in dependency order,
+        }
+
+    Raises:
+        ValueError: if the file is not valid JSON or does not describe an acyclic workflow.
+    """
+    path = os.path.abspath(path)
+    with open(path, 'r', encoding='utf-8') as f:
+        data = json.load(f)
+    if not isinstance(data, dict) or not isinstance(data.get('stages'), list) or not data['stages']:
+        raise ValueError("a workflow needs a non-empty 'stages' list")
+
+    stages = {}
+    for index, raw in enumerate(data['stages']):
+        if not isinstance(raw, dict) or not raw.get('agent'):
+            raise ValueError(f"stage {index + 1} has no 'agent'")
+        unknown = set(raw) - STAGE_KEYS
+        if unknown:
+            raise ValueError(f"stage {index + 1} has unknown key(s): {', '.join(sorted(unknown))}")
+        stage_id = raw.get('id') or raw['agent']
+        if stage_id in stages:
+            raise ValueError(f"duplicate stage id '{stage_id}'")
+        needs = raw.get('needs', [])
+        if isinstance(needs, str):
+            needs = [needs]
+        if raw.get('type') is not None and raw['type'] not in STAGE_TYPES:
+            raise ValueError(f"stage '{stage_id}' has type '{raw['type']}' (use {' or '.join(STAGE_TYPES)})")
+        outputs = raw.get('outputs', [pattern.format(agent=raw['agent']) for pattern in DEFAULT_OUTPUTS])
+        stages[stage_id] = {
+            'id': stage_id,
+            'agent': raw['agent'],
+            'needs': list(dict.fromkeys(needs)),
+            'type': raw.get('type'),
+            'task': raw.get('task'),
+            'outputs': [outputs] if isinstance(outputs, str) else list(outputs),
+        }
+    for stage in stages.values():
+        missing = [need for need in stage['needs'] if need not in stages]
+        if missing:
+            raise ValueError(f"stage '{stage['id']}' needs unknown stage(s): {', '.join(missing)}")
+
+    return {
+        'name': data.get('name') or os.path.splitext(os.path.basename(path))[0],
+        'path': path,
+        'stages': stages,
+        'order': topological_order(stages),
+    }
+
+
+def topological_order(stages: dict) -> list[str]:
+    """
+    Return the ids of `stages` ({id: {'needs': [ids], ...}}) so every stage
+    comes after the stages it needs (input order among equals).
+    """
+    remaining = {stage_id: set(stage['needs']) for stage_id, stage in stages.items()}
+    order = []
+    while remaining:
+        ready = [stage_id for stage_id, needs in remaining.items() if not needs]
+        if not ready:
+            raise ValueError(f"dependency cycle between: {', '.join(remaining)}")
+        for stage_id in ready:
+            del remaining[stage_id]
+            order.append(stage_id)
+        for needs in remaining.values():
+            needs.difference_update(ready)
+    return order
+
+
+def stage_waves(workflow: dict) -> list[list[str]]:
+    """Group stage ids by the length of the longest chain leading to them."""
+    depth = {}
+    for stage_id in workflow['order']:
+        needs = workflow['stages'][stage_id]['needs']
+        depth[stage_id] = 1 + max((depth[need] for need in needs), default=-1)
+    waves = [[] for _ in range(max(depth.values()) + 1)]
+    for stage_id in workflow['order']:
+        waves[depth[stage_id]].append(stage_id)
+    return waves
+
+
+def collect_outputs(workspace: str, patterns: list[str]) -> list[str]:
+    """Return the workspace-relative files matching a stage's output globs."""
+    found = []
+    for pattern in patterns:
+        for path in sorted(glob.glob(os.path.join(workspace, pattern), recursive=True)):
+            if os.path.isfile(path):
+                found.append(os.path.relpath(path, workspace))
+    return list(dict.fromkeys(found))
+
+
+def stage_instructions(stage: dict, inputs: dict[str, list[str]]) -> str | None:
+    """
+    Return the text appended to a stage's agent instructions: its task and
+    the output files of the stages it needs ({stage id: files}).
+    """
+    lines = []
+    if stage['task']:
+        lines += ["## Workflow Task", "", stage['task'], ""]
+    if any(inputs.values()):
+        lines += ["## Inputs From Previous Stages", "",
+                  "Read these files in the workspace before you start:", ""]
+        for stage_id, files in inputs.items():
+            for path in files:
+                lines.append(f"- `{path}` ({stage_id})")
+        lines.append("")
+    return "\n".join(lines) if lines else None
+
+
+async def _execute(workflow: dict, workspace: str, run_stage, max_parallel: int, on_done) -> dict:
+    semaphore = asyncio.Semaphore(max(1, max_parallel))
+    origin = time.monotonic()
+    tasks = {}
+
+    async def stage_task(stage):
+        record = await run_ready_stage(stage)
+        if on_done:
+            on_done(stage, record)
+        return record
+
+    async def run_ready_stage(stage):
+        needed = {need: await tasks[need] for need in stage['needs']}
+        failed = [need for need, record in needed.items() if record['status'] not in SUCCESS_STATUSES]
+        if failed:
+            emit_line(f"[{stage['id']}]", f"Blocked: needs {', '.join(failed)}, which did not succeed")
+            now = time.monotonic() - origin
+            return dict(batch_result(stage['id'], "blocked"), started=now, finished=now, outputs=[])
+        inputs = {need: record['outputs'] for need, record in needed.items()}
+        async with semaphore:
+            started = time.monotonic() - origin
+            record = await run_stage(stage, stage_instructions(stage, inputs), inputs)
+        record = dict(record, agent=stage['id'], started=started, finished=time.monotonic() - origin)
+        if record['status'] in ("ok", "resumed"):
+            record['outputs'] = collect_outputs(workspace, stage['outputs'])
+        else:
+            record['outputs'] = []
+        if record['outputs']:
+            emit_line(f"[{stage['id']}]", f"Outputs: {', '.join(record['outputs'])}")
+        return record
+
+    # Dependency order guarantees every awaited stage already has its task
+    for stage_id in workflow['order']:
+        tasks[stage_id] = asyncio.ensure_future(stage_task(workflow['stages'][stage_id]))
+    records = await asyncio.gather(*tasks.values())
+    return dict(zip(tasks, records))
+
+
+def run_workflow(workflow: dict, workspace: str, run_stage, max_parallel: int = 4, on_done=None) -> dict:
+    """
+    Run every stage of `workflow` once the stages it needs have succeeded.
+
+    Args:
+        workflow: load_workflow() result
+        workspace: Workspace the output globs are resolved in
+        run_stage: `async run_stage(stage, instructions, inputs) -> result record` that
+                   runs one stage's agent (instructions: stage_instructions() text or None;
+                   inputs: {needed stage id: its output files})
+        max_parallel: Maximum number of stages running at once
+        on_done: Optional `on_done(stage, record)` called as each stage finishes or is blocked
+
+    Returns:
+        dict: {stage id: result record with extra 'started', 'finished' (seconds
+        since the workflow started) and 'outputs'}, in dependency order
+    """
+    return async_engine.run(_execute(workflow, workspace, run_stage, max_parallel, on_done))
+
+
+def critical_path(workflow: dict, results: dict) -> tuple[list[str], float]:
+    """
+    Return the chain of stages with the largest total run time, and that
+    time. The workflow cannot finish faster than this chain.
+    """
+    best = {}
+    for stage_id in workflow['order']:
+        needs = workflow['stages'][stage_id]['needs']
+        before = max((best[need] for need in needs), key=lambda item: item[1], default=([], 0.0))
+        best[stage_id] = (before[0] + [stage_id], before[1] + results[stage_id]['elapsed'])
+    return max(best.values(), key=lambda item: item[1])
+
+
+def format_waves(workflow: dict) -> list[str]:
+    """Return lines describing which stages can run together."""
+    lines = []
+    for index, wave in enumerate(stage_waves(workflow), 1):
+        stages = [f"{stage_id} ({workflow['stages'][stage_id]['agent']})"
+                  if stage_id != workflow['stages'][stage_id]['agent'] else stage_id for stage_id in wave]
+        lines.append(f"  {index}. {' ∥ '.join(stages)}")
+    return lines
@@ -0,0 +1,269 @@
+#!/usr/bin/env python3
+"""
+workspace_stack.py
+
+Fingerprint the technology stack of a workspace from marker files
+(package.json, hardhat.config.*, Dockerfile, k8s/, *.sql, supabase/, ...)
+so contexts can leave out roles the project plainly does not need.
+
+The scan walks the workspace breadth-first down to a configurable depth,
+skipping dependency and VCS directories and anything matched by the
+.gitignore files it meets. Results are cached per workspace
+(CACHE_ROOT/workspace-stack-v2.json) together with the mtimes of the scanned
+directories and of the marker files found; a later call only re-stats
+those paths and rescans if any of them changed.
+
+    result = detect_stack("/path/to/project")
+    agents = prune_agents(agents, result['stack'])
+"""
+
+import fnmatch
+import json
+import os
+import sys
+import time
+from collections import deque
+
+from context_cache import CACHE_ROOT, atomic_write
+
+# Versioned so scans made with older ignore rules are not reused
+STACK_CACHE_FILE = os.path.join(CACHE_ROOT, "workspace-stack-v2.json")
+
+# Directories below the workspace root that are scanned (root = 0; --stack-depth)
+DEFAULT_DEPTH = int(os.environ.get("CAPSTONE_AGENTS_STACK_DEPTH", 3))
+
+# Workspaces remembered in the cache file
+MAX_CACHED_WORKSPACES = 256
+
+# Never descended into, ignored or not
+SKIP_DIRS = {".git", ".hg", ".svn", "node_modules", ".venv", "venv", "__pycache__", ".tox", ".mypy_cache"}
+
+# Stack tag -> marker patterns. A pattern ending in "/" names a directory;
+# one containing "/" is matched against the path from the workspace root.
+STACK_MARKERS = {
+    'node': ["package.json"],
+    'frontend': ["*.tsx", "*.jsx", "*.vue", "*.svelte", "index.html", "vite.config.*", "next.config.*",
+                 "angular.json", "tailwind.config.*"],
+    'python': ["pyproject.toml", "setup.py", "requirements*.txt"],
+    'go': ["go.mod"],
+    'rust': ["Cargo.toml"],
+    'jvm': ["pom.xml", "build.gradle", "build.gradle.kts"],
+    'blockchain': ["hardhat.config.*", "foundry.toml", "truffle-config.js", "Anchor.toml", "*.sol"],
+    'containers': ["Dockerfile", "Dockerfile.*", "docker-compose*.yml", "docker-compose*.yaml", "compose.yaml"],
+    'kubernetes': ["k8s/", "kubernetes/", "helm/", "Chart.yaml", "kustomization.yaml"],
+    'infrastructure': ["terraform/", "*.tf", "Pulumi.yaml"],
+    'ci': [".github/workflows/", ".gitlab-ci.yml", "Jenkinsfile", ".circleci/"],
+    'database': ["*.sql", "supabase/", "migrations/", "schema.prisma", "alembic.ini", "knexfile.*"],
+}
+
+# Role -> stack tags of which at least one must be present for the role to be relevant.
+# Roles not listed here are always relevant.
+ROLE_STACKS = {
+    'blockchain': {'blockchain'},
+    'devops': {'containers', 'kubernetes', 'infrastructure', 'ci'},
+    'database-engineer': {'database'},
+    'frontend': {'frontend'},
+}
+
+PRUNE_POLICIES = ("drop", "demote")
+
+
+def _load_cache() -> dict:
+    try:
+        with open(STACK_CACHE_FILE, 'r', encoding='utf-8') as f:
+            return json.load(f)
+    except (OSError, ValueError):
+        return {}
+
+
+def _read_gitignore(path: str, base: str) -> list[tuple]:
+    """Return (base, pattern, negate, dir_only, anchored) rules of a .gitignore file."""
+    rules = []
+    try:
+        with open(path, 'r', encoding='utf-8', errors='replace') as f:
+            lines = f.read().splitlines()
+    except OSError:
+        return rules
+    for line in lines:
+        line = line.strip()
+        if not line or line.startswith("#"):
+            continue
+        negate = line.startswith("!")
+        if negate:
+            line = line[1:]
+        dir_only = line.endswith("/")
+        line = line.rstrip("/")
+        # A leading or inner slash anchors the pattern to the .gitignore's
+        # directory; a leading `**/` matches at any depth
+        any_depth = line.startswith("**/")
+        if any_depth:
+            line = line[3:]
+        anchored = not any_depth and "/" in line
+        line = line.lstrip("/")
+        if line:
+            rules.append((base, line, negate, dir_only, anchored))
+    return rules
+
+
+def is_ignored(rel_path: str, is_dir: bool, rules: list[tuple]) -> bool:
+    """Return whether `rel_path` (from the workspace root) is ignored; the last matching rule wins."""
+    ignored = False
+    name = os.path.basename(rel_path)
+    for base, pattern, negate, dir_only, anchored in rules:
+        if dir_only and not is_dir:
+            continue
+        if base:
+            if not rel_path.startswith(base + "/"):
+                continue
+            local = rel_path[len(base) + 1:]
+        else:
+            local = rel_path
+        if anchored:
+            matched = fnmatch.fnmatchcase(local, pattern)
+        elif "/" in pattern:
+            # `**/x/y`: the trailing path components match
+            matched = fnmatch.fnmatchcase(local, pattern) or fnmatch.fnmatchcase(local, "*/" + pattern)
+        else:
+            matched = fnmatch.fnmatchcase(name, pattern)
+        if matched:
+            ignored = not negate
+    return ignored
+
+
+def _match_markers(rel_path: str, is_dir: bool) -> list[str]:
+    """Return the stack tags `rel_path` is a marker of."""
+    name = os.path.basename(rel_path)
+    tags = []
+    for tag, patterns in STACK_MARKERS.items():
+        for pattern in patterns:
+            wants_dir = pattern.endswith("/")
+            pattern = pattern.rstrip("/")
+            if wants_dir != is_dir:
+                continue
+            target = rel_path if "/" in pattern else name
+            if fnmatch.fnmatchcase(target, pattern):
+                tags.append(tag)
+                break
+    return tags
+
+
+def scan_workspace(workspace: str, max_depth: int = DEFAULT_DEPTH) -> dict:
+    """
+    Scan `workspace` for stack markers (uncached).
+
+    Returns:
+        dict: {
+            'workspace': absolute path,
+            'depth': max_depth,
+            'stack': sorted stack tags,
+            'markers': {tag: [relative paths of the first few markers]},
+            'stamps': {relative path: mtime_ns} of the scanned directories and markers,
+        }
+    """
+    workspace = os.path.abspath(workspace)
+    markers = {}
+    stamps = {}
+    rules = []
+    queue = deque([("", 0)])
+    while queue:
+        rel_dir, depth = queue.popleft()
+        path = os.path.join(workspace, rel_dir) if rel_dir else workspace
+        try:
+            stamps[rel_dir or "."] = os.stat(path).st_mtime_ns
+            entries = sorted(os.scandir(path), key=lambda entry: entry.name)
+        except OSError:
+            continue
+        if any(entry.name == ".gitignore" for entry in entries):
+            rules = rules + _read_gitignore(os.path.join(path, ".gitignore"), rel_dir)
+        for entry in entries:
+            rel_path = f"{rel_dir}/{entry.name}" if rel_dir else entry.name
+            try:
+                is_dir = entry.is_dir(follow_symlinks=False)
+            except OSError:
+                continue
+            if (is_dir and entry.name in SKIP_DIRS) or is_ignored(rel_path, is_dir, rules):
+                continue
+            for tag in _match_markers(rel_path, is_dir):
+                found = markers.setdefault(tag, [])
+                if len(found) < 5:
+                    found.append(rel_path)
+                    try:
+                        stamps[rel_path] = entry.stat(follow_symlinks=False).st_mtime_ns
+                    except OSError:
+                        pass
+            if is_dir and depth < max_depth:
+                queue.append((rel_path, depth + 1))
+    return {
+        'workspace': workspace,
+        'depth': max_depth,
+        'stack': sorted(markers),
+        'markers': markers,
+        'stamps': stamps,
+    }
+
+
+def _unchanged(workspace: str, stamps: dict) -> bool:
+    for rel_path, mtime in stamps.items():
+        try:
+            if os.stat(os.path.join(workspace, rel_path)).st_mtime_ns != mtime:
+                return False
+        except OSError:
+            return False
+    return True
+
+
+def detect_stack(workspace: str, max_depth: int = DEFAULT_DEPTH, use_cache: bool = True) -> dict:
+    """
+    Return the scan_workspace() result for `workspace`, reusing the cached
+    scan while none of its directories or markers changed. The result has
+    an extra 'cached' flag.
+    """
+    workspace = os.path.abspath(workspace)
+    cache = _load_cache() if use_cache else {}
+    entry = cache.get(workspace)
+    if entry and entry.get('depth') == max_depth and _unchanged(workspace, entry.get('stamps', {})):
+        return dict(entry, cached=True)
+
+    result = scan_workspace(workspace, max_depth)
+    if use_cache:
+        cache[workspace] = dict(result, scanned_at=time.time())
+        if len(cache) > MAX_CACHED_WORKSPACES:
+            oldest = sorted(cache, key=lambda path: cache[path].get('scanned_at', 0))
+            for path in oldest[:len(cache) - MAX_CACHED_WORKSPACES]:
+                del cache[path]
+        try:
+            atomic_write(STACK_CACHE_FILE, json.dumps(cache, sort_keys=True))
+        except OSError as e:
+            print(f"Warning: Could not update workspace stack cache: {e}", file=sys.stderr)
+    return dict(result, cached=False)
+
+
+def irrelevant_roles(roles, stack: list[str]) -> list[str]:
+    """
+    Return the roles whose stack is absent from `stack`. An empty stack (a
+    new or unrecognized workspace) makes every role relevant.
+    """
+    if not stack:
+        return []
+    present = set(stack)
+    return [role for role in roles if role in ROLE_STACKS and not ROLE_STACKS[role] & present]
+
+
+def prune_agents(agents: list[dict], stack: list[str], policy: str = "drop", keep=()) -> list[dict]:
+    """
+    Drop (or, with policy "demote", move to the end) the agents of roles
+    irrelevant to `stack`. Roles in `keep` are left alone.
+    """
+    pruned = set(irrelevant_roles({agent['role'] for agent in agents}, stack)) - set(keep)
+    if not pruned:
+        return agents
+    relevant = [agent for agent in agents if agent['role'] not in pruned]
+    if policy == "demote":
+        return relevant + [agent for agent in agents if agent['role'] in pruned]
+    return relevant
+
+
+def format_stack(result: dict) -> str:
+    """Return a one-line summary of a detect_stack() result."""
+    stack = ", ".join(result['stack']) or "nothing recognized"
+    return f"Workspace stack: {stack}{' (cached)' if result.get('cached') else ''}"